@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark de construcción del Grafo Bipartito Dirigido (build_graph_desde_db).
+
+Genera catálogos sintéticos de tamaño creciente y mide el tiempo de
+construcción. Con los índices por nombre la construcción es O(V + E): al
+duplicar el catálogo, el tiempo debe crecer más o menos al doble (y el tiempo
+por arista mantenerse estable), no al cuádruple.
+
+Uso:
+    python benchmark_grafo.py [cantidad_inicial] [duplicaciones]
+"""
+import random
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '.'))
+
+from platos.algoritmos.grafoBusquedaReceta import build_graph_desde_db
+
+
+def generar_catalogo(cantidad_platos, semilla=1):
+    """Catálogo sintético: 3 a 9 ingredientes por plato de un vocabulario ~ platos / 10."""
+    aleatorio = random.Random(semilla)
+    vocabulario = [f'ingrediente {i}' for i in range(max(50, cantidad_platos // 10))]
+    return [
+        {
+            'id': i,
+            'nombre': f'Plato {i}',
+            'ingredientes': aleatorio.sample(vocabulario, aleatorio.randint(3, 9)),
+        }
+        for i in range(cantidad_platos)
+    ]
+
+
+def medir_construccion(platos_db, repeticiones=3):
+    """Mejor tiempo (segundos) de varias construcciones."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        grafo = build_graph_desde_db(platos_db)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, grafo
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    duplicaciones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print("⏱️  CONSTRUCCIÓN DEL GRAFO (build_graph_desde_db)")
+    print("=" * 64)
+    print(f"{'platos':>8} {'vértices':>9} {'aristas':>9} {'ms':>10} {'µs/arista':>10} {'x anterior':>11}")
+
+    anterior = None
+    for _ in range(duplicaciones):
+        platos_db = generar_catalogo(cantidad)
+        segundos, grafo = medir_construccion(platos_db)
+        vertices = len(grafo.ingredientes) + len(grafo.recetas)
+        aristas = grafo.total_aristas
+        crecimiento = f"{segundos / anterior:.2f}" if anterior else "-"
+        print(f"{cantidad:>8} {vertices:>9} {aristas:>9} {segundos * 1000:>10.1f} "
+              f"{segundos * 1e6 / aristas:>10.2f} {crecimiento:>11}")
+        anterior = segundos
+        cantidad *= 2
+
+    print("\nSi la construcción es lineal, cada fila tarda ~2x la anterior.")
+
+
+if __name__ == "__main__":
+    main()
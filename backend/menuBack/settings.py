@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -136,6 +137,115 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# SmartMeal
+# Archivo JSON con el catálogo de platos (ver platos/catalogo.py)
+
+SMARTMEAL_CATALOGO_RUTA = BASE_DIR / 'platos_database.json'
+
+# Segundos entre revisiones del archivo del catálogo (hilo vigilante; con el
+# paquete inotify_simple instalado se reacciona a los cambios al momento).
+# "python manage.py recargar_catalogo" fuerza la recarga en todos los procesos.
+SMARTMEAL_CATALOGO_INTERVALO = 2.0
+
+# Fuente del grafo de recetas: 'catalogo' (el JSON de SMARTMEAL_CATALOGO_RUTA)
+# o 'bd' (modelos Plato/Ingrediente, actualizado por señales; ver platos/grafo.py)
+SMARTMEAL_GRAFO_FUENTE = 'catalogo'
+
+# Grafo de recetas con ids enteros y adyacencia CSR (platos/algoritmos/grafoCompacto.py);
+# False usa el grafo de objetos Vertex
+SMARTMEAL_GRAFO_COMPACTO = True
+
+# Instantánea binaria del grafo compacto (platos/algoritmos/instantaneaGrafo.py).
+# Se genera con "python manage.py generar_instantanea_grafo" y solo se usa si
+# corresponde al JSON actual del catálogo; si no, el grafo se construye.
+# El backend la escribe en tiempo de ejecución, así que debe apuntar a un
+# directorio de datos (ej: /var/lib/smartmeal/platos_grafo.bin), nunca al
+# código fuente. Por defecto no hay instantánea.
+SMARTMEAL_GRAFO_INSTANTANEA_RUTA = os.environ.get('SMARTMEAL_GRAFO_INSTANTANEA_RUTA') or None
+
+# Mapear la instantánea en memoria (mmap) en lugar de copiarla: los workers
+# comparten las aristas, la tabla de nombres, los índices por nombre y la vista
+# compilada de grafo/buscar/, y cada uno guarda solo lo de cada consulta. Si no
+# hay instantánea para el JSON actual, el primer worker que construye el grafo
+# la guarda.
+SMARTMEAL_GRAFO_MAPEADO = True
+
+# Qué hacen las peticiones mientras un hilo reconstruye el grafo (cambió el
+# catálogo): 'esperar' el grafo nuevo o seguir usando el 'anterior'
+SMARTMEAL_GRAFO_RECONSTRUCCION = 'esperar'
+
+# Caché LRU de resultados de grafo/buscar/ (por proceso): máximo de entradas
+# (0 la desactiva) y de bytes aproximados. Sus contadores salen en
+# grafo/monitoreo/
+SMARTMEAL_GRAFO_CACHE_ENTRADAS = 256
+SMARTMEAL_GRAFO_CACHE_BYTES = 32 * 1024 * 1024
+
+# Caché de respuestas de menu-arbol/buscar-platos/ (por proceso), por conjunto
+# de ingredientes: máximo de entradas (0 la desactiva) y de bytes
+SMARTMEAL_BUSQUEDA_CACHE_ENTRADAS = 128
+SMARTMEAL_BUSQUEDA_CACHE_BYTES = 8 * 1024 * 1024
+
+# Máximo de consultas por petición en grafo/buscar-lote/
+SMARTMEAL_GRAFO_LOTE_MAXIMO = 500
+
+# Caché (alias de CACHES) de las respuestas ya renderizadas de
+# grafo/ingredientes/, grafo/recetas/ y grafo/estadisticas/, por versión del grafo
+SMARTMEAL_GRAFO_CACHE_RESPUESTAS = 'default'
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMem es por proceso; para compartir las respuestas entre workers puede
+# usarse 'django.core.cache.backends.filebased.FileBasedCache' con LOCATION
+# apuntando a un directorio.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'smartmeal',
+    },
+}
+
+# Logging
+# Los loggers de la app cuelgan de "platos" (ver platos/algoritmos/registro.py).
+# SMARTMEAL_LOG_LEVEL=DEBUG activa la depuración (muestreada) y
+# SMARTMEAL_TIEMPOS=1 registra la duración de cada fase en "platos.tiempos"
+# (muestreada por fase) y acumula su resumen en grafo/monitoreo/.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'muestreo': {
+            '()': 'platos.algoritmos.registro.FiltroMuestreo',
+            'maximo': 20,
+            'intervalo': 10.0,
+        },
+    },
+    'formatters': {
+        'simple': {
+            'format': '[{levelname}] {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'consola': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+            'filters': ['muestreo'],
+        },
+    },
+    'loggers': {
+        'platos': {
+            'handlers': ['consola'],
+            'level': os.environ.get('SMARTMEAL_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'platos.tiempos': {
+            'level': 'DEBUG' if os.environ.get('SMARTMEAL_TIEMPOS') == '1' else 'WARNING',
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
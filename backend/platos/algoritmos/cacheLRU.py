@@ -0,0 +1,111 @@
+"""
+Caché LRU en memoria del proceso, acotada por entradas y por bytes aproximados.
+
+Cada entrada pertenece a una versión de los datos (por ejemplo, la del grafo
+de recetas). Las versiones deben ser comparables y crecer con los datos (un
+número de versión, no una huella): la caché guarda solo la versión más nueva
+que ha visto. Consultar con otra versión es un fallo sin borrar nada (una
+petición que todavía usa el grafo anterior no vacía la caché del nuevo), y
+guardar un valor de una versión más nueva vacía la caché. Nunca se sirve un
+resultado de otra versión.
+
+Los contadores (aciertos, fallos, desalojos, invalidaciones) se exponen con
+estadisticas() para monitoreo.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_AUSENTE = object()
+
+
+class CacheLRUVersionada:
+    """
+    Caché LRU segura entre hilos.
+
+    Los valores se guardan tal cual (sin copiar): deben tratarse como de solo
+    lectura.
+    """
+
+    def __init__(self, max_entradas: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_entradas (int): Máximo de entradas; 0 desactiva la caché
+            max_bytes (int): Máximo de bytes aproximados (suma de los tamaños
+                declarados al guardar)
+        """
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas: OrderedDict = OrderedDict()  # clave --> (valor, tamaño)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+
+    def obtener(self, version: Any, clave: Hashable, defecto=None) -> Any:
+        """Retorna el valor guardado para `clave` en `version`, o `defecto`."""
+        with self._lock:
+            entrada = self._entradas.get(clave, _AUSENTE) if version == self._version else _AUSENTE
+            if entrada is _AUSENTE:
+                self.fallos += 1
+                return defecto
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, version: Any, clave: Hashable, valor: Any, tamanio: int) -> None:
+        """
+        Guarda un valor calculado con los datos de `version`.
+
+        Una versión más nueva que la guardada vacía la caché y pasa a ser la
+        actual; si es más vieja (otro hilo ya vio datos más nuevos), el valor
+        se descarta. Un valor más grande que max_bytes no se guarda.
+        """
+        with self._lock:
+            if self.max_entradas <= 0 or tamanio > self.max_bytes:
+                return
+            if self._version is None or version > self._version:
+                self._fijar_version(version)
+            elif version != self._version:
+                return
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[clave] = (valor, tamanio)
+            self._bytes += tamanio
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                _, (_, tamanio_desalojado) = self._entradas.popitem(last=False)
+                self._bytes -= tamanio_desalojado
+                self.desalojos += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+            self._version = None
+
+    def estadisticas(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'max_entradas': self.max_entradas,
+                'max_bytes': self.max_bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'invalidaciones': self.invalidaciones,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else None,
+            }
+
+    def _fijar_version(self, version):
+        if self._entradas:
+            self.invalidaciones += 1
+        self._entradas.clear()
+        self._bytes = 0
+        self._version = version
@@ -11,8 +11,15 @@ Permite buscar eficientemente qué recetas se pueden preparar con los ingredient
 disponibles, identificar recetas completas, casi completas e incompletas.
 """
 
-from typing import List, Dict, Set, Tuple
-from collections import defaultdict, deque
+import heapq
+import logging
+import threading
+from typing import Callable, List, Dict, Optional, Set, Tuple
+from collections import Counter, defaultdict, deque
+
+from platos.algoritmos.registro import obtener_logger, medir
+
+logger = obtener_logger('grafo')
 
 
 class Vertex:
@@ -93,6 +100,106 @@ class Edge:
         return f"Edge({self.origen}, {self.destino})"
 
 
+def crear_resultado_receta(nombre: str, ingredientes_totales: int, ingredientes_presentes: int,
+                           ingredientes_faltantes: List[str]) -> Dict:
+    """
+    Construye el resultado de una receta en una búsqueda por ingredientes.
+    
+    Args:
+        nombre (str): Nombre de la receta
+        ingredientes_totales (int): Cantidad de ingredientes que necesita
+        ingredientes_presentes (int): Cantidad de ellos que están disponibles
+        ingredientes_faltantes (List[str]): Nombres de los que faltan
+    """
+    ratio = ingredientes_presentes / ingredientes_totales
+    return {
+        'nombre': nombre,
+        'ingredientes_totales': ingredientes_totales,
+        'ingredientes_disponibles': ingredientes_presentes,
+        'ingredientes_faltantes': ingredientes_faltantes,
+        'cantidad_faltantes': len(ingredientes_faltantes),
+        'ratio': round(ratio, 4),
+        'score': round(ratio * 100, 2)
+    }
+
+
+def categoria_por_ratio(ratio: float, umbral_casi_completa: float) -> str:
+    """Clasifica una receta según su ratio de ingredientes disponibles."""
+    if ratio == 1.0:
+        return 'completas'
+    elif ratio >= umbral_casi_completa:
+        return 'casi_completas'
+    return 'incompletas'
+
+
+def ordenar_por_score(resultados: List[Dict]) -> None:
+    """Ordena (estable, en el lugar) una lista de resultados por score descendente."""
+    resultados.sort(key=lambda x: x['score'], reverse=True)
+
+
+CATEGORIAS = ('completas', 'casi_completas', 'incompletas')
+
+
+def paginar_resultados(resultados: Dict[str, List[Dict]],
+                       limite: Optional[int] = None,
+                       desplazamiento: int = 0,
+                       top_k: Optional[int] = None,
+                       totales: Optional[Dict[str, int]] = None,
+                       colas: Optional[Dict[str, Tuple[int, Callable[[int], List[Dict]]]]] = None) -> Dict:
+    """
+    Ordena por score y recorta cada categoría de un resultado de búsqueda.
+    
+    Sin límites ordena cada lista completa (en el lugar). Con `limite` o
+    `top_k`, cada categoría se selecciona con un heap acotado a
+    desplazamiento + cantidad elementos en lugar de ordenarse entera; el
+    resultado es el mismo que ordenar y cortar.
+    
+    Args:
+        resultados: {categoría: lista sin ordenar}
+        limite (int): Máximo de recetas por categoría
+        desplazamiento (int): Recetas a saltar al inicio de cada categoría
+        top_k (int): Máximo de recetas en total, llenando en orden completas,
+            casi_completas, incompletas (que es el orden global por score)
+        totales (dict): Si se entrega, se llena con el total exacto de recetas
+            de cada categoría, antes de recortar
+        colas: {categoría: (cantidad, obtener)} con recetas ya ordenadas que
+            van después de la lista (score 0); obtener(n) retorna las primeras n
+    
+    Returns:
+        Dict: {categoría: lista recortada y ordenada por score descendente}
+    """
+    colas = colas or {}
+    paginados = {}
+    restantes = top_k
+    for categoria in CATEGORIAS:
+        lista = resultados[categoria]
+        en_cola, obtener_cola = colas.get(categoria, (0, None))
+        if totales is not None:
+            totales[categoria] = len(lista) + en_cola
+        
+        cantidad = limite
+        if restantes is not None:
+            cantidad = restantes if cantidad is None else min(cantidad, restantes)
+        
+        if cantidad is None:
+            ordenar_por_score(lista)
+            if en_cola:
+                lista.extend(obtener_cola(en_cola))
+            seleccion = lista[desplazamiento:] if desplazamiento else lista
+        else:
+            hasta = desplazamiento + cantidad
+            # nsmallest es estable: equivale a sorted(...)[:hasta]
+            seleccion = heapq.nsmallest(hasta, lista, key=lambda x: -x['score'])
+            if len(seleccion) < hasta and en_cola:
+                seleccion += obtener_cola(min(en_cola, hasta - len(seleccion)))
+            seleccion = seleccion[desplazamiento:]
+        
+        paginados[categoria] = seleccion
+        if restantes is not None:
+            restantes -= len(seleccion)
+    return paginados
+
+
 class BipartiteDirectedGraph:
     """
     Grafo Bipartito Dirigido: Ingredientes --> Recetas.
@@ -119,6 +226,69 @@ class BipartiteDirectedGraph:
         # Inverso: {receta_vertex: [ingrediente_vertex, ...]}
         # Útil para saber qué ingredientes necesita una receta
         self.recetas_ingredientes = defaultdict(list)
+        
+        # Índices por nombre en minúsculas: {tipo: {nombre: vertex}}
+        # (si dos vértices difieren solo en mayúsculas, queda el primero añadido)
+        self._vertices_por_nombre: Dict[str, Dict[str, Vertex]] = {'ingrediente': {}, 'receta': {}}
+        
+        # Ingredientes por nombre normalizado (strip + minúsculas), como se
+        # comparan en las búsquedas
+        self._ingredientes_normalizados: Dict[str, List[Vertex]] = defaultdict(list)
+        
+        # Forma compilada (bitsets) para búsquedas; se invalida al modificar el
+        # grafo. El lock hace que la construya un solo hilo (ver compilar())
+        self._compilado = None
+        self._lock_compilacion = threading.Lock()
+        
+        # Contadores que mantienen las operaciones de modificación, para no
+        # recorrer la adyacencia: total de aristas e histogramas de grados
+        # {grado: cantidad de vértices} (ver estadisticas())
+        self._total_aristas = 0
+        self._grados_ingredientes = Counter()
+        self._grados_recetas = Counter()
+        self._estadisticas = None
+        
+        # Versión: aumenta con cada modificación del grafo
+        self.version = 0
+        # Instantánea de la versión actual (ver instantanea()) y listas de
+        # adyacencia que ya no comparte con ella (se pueden modificar en sitio)
+        self._fijado = None
+        self._propias = None
+        # Recetas cambiadas desde la última instantánea: la forma compilada de
+        # la próxima se actualiza desde la anterior solo para ellas
+        self._tocadas = set()
+    
+    def _modificado(self, *recetas: Vertex) -> None:
+        """Registra una modificación que cambió las `recetas` dadas (o ninguna)."""
+        self.version += 1
+        self._compilado = None
+        self._estadisticas = None
+        if self._fijado is not None:
+            self._tocadas.update(recetas)
+    
+    @staticmethod
+    def _mover_grado(histograma: Counter, anterior: Optional[int], nuevo: Optional[int]) -> None:
+        """Cambia el grado de un vértice en el histograma (None: el vértice no está)."""
+        if anterior is not None:
+            histograma[anterior] -= 1
+            if not histograma[anterior]:
+                del histograma[anterior]
+        if nuevo is not None:
+            histograma[nuevo] += 1
+    
+    def _lista_propia(self, indice, clave) -> list:
+        """
+        Lista `indice[clave]` que se puede modificar sin cambiar las instantáneas.
+        
+        Mientras no se ha tomado ninguna instantánea, es la lista misma. Después,
+        la primera modificación de cada lista la copia (copia al escribir): el
+        costo es el tamaño de esa lista, no el del grafo.
+        """
+        lista = indice[clave]
+        if self._propias is not None and (id(indice), clave) not in self._propias:
+            lista = indice[clave] = list(lista)
+            self._propias.add((id(indice), clave))
+        return lista
     
     def add_vertex(self, vertex: Vertex) -> None:
         """
@@ -131,11 +301,20 @@ class BipartiteDirectedGraph:
             ValueError: Si el vértice no es de tipo válido
         """
         if vertex.get_type() == "ingrediente":
+            if vertex in self.ingredientes:
+                return
             self.ingredientes.add(vertex)
+            self._lista_propia(self._ingredientes_normalizados, vertex.get_name().strip().lower()).append(vertex)
+            self._grados_ingredientes[0] += 1
         elif vertex.get_type() == "receta":
+            if vertex in self.recetas:
+                return
             self.recetas.add(vertex)
+            self._grados_recetas[0] += 1
         else:
             raise ValueError(f"Tipo de vértice inválido: {vertex.get_type()}")
+        self._vertices_por_nombre[vertex.get_type()].setdefault(vertex.get_name().lower(), vertex)
+        self._modificado(*([vertex] if vertex.get_type() == "receta" else []))
     
     def add_edge(self, edge: Edge) -> None:
         """
@@ -156,10 +335,235 @@ class BipartiteDirectedGraph:
             raise ValueError(f"Receta {destino.get_name()} no está en el grafo")
         
         # Añadir arista: ingrediente --> receta
-        self.adyacencia[origen].append(destino)
+        recetas = self._lista_propia(self.adyacencia, origen)
+        recetas.append(destino)
+        self._mover_grado(self._grados_ingredientes, len(recetas) - 1, len(recetas))
         
         # Inverso: receta <-- ingrediente (para búsquedas inversas)
-        self.recetas_ingredientes[destino].append(origen)
+        ingredientes = self._lista_propia(self.recetas_ingredientes, destino)
+        ingredientes.append(origen)
+        self._mover_grado(self._grados_recetas, len(ingredientes) - 1, len(ingredientes))
+        self._total_aristas += 1
+        self._modificado(destino)
+    
+    def remove_edge(self, edge: Edge) -> None:
+        """
+        Quita una arista Ingrediente --> Receta (una sola, si está repetida).
+        
+        Costo: O(grado del ingrediente + grado de la receta).
+        
+        Raises:
+            ValueError: Si la arista no está en el grafo
+        """
+        origen = edge.get_origen()
+        destino = edge.get_destino()
+        recetas = self.adyacencia.get(origen)
+        if not recetas or destino not in recetas:
+            raise ValueError(f"La arista {edge} no está en el grafo")
+        
+        recetas = self._lista_propia(self.adyacencia, origen)
+        recetas.remove(destino)
+        self._mover_grado(self._grados_ingredientes, len(recetas) + 1, len(recetas))
+        if not recetas:
+            del self.adyacencia[origen]
+        ingredientes = self._lista_propia(self.recetas_ingredientes, destino)
+        ingredientes.remove(origen)
+        self._mover_grado(self._grados_recetas, len(ingredientes) + 1, len(ingredientes))
+        if not ingredientes:
+            del self.recetas_ingredientes[destino]
+        self._total_aristas -= 1
+        self._modificado(destino)
+    
+    def remove_vertex(self, vertex: Vertex) -> None:
+        """
+        Quita un vértice y todas sus aristas.
+        
+        Costo: O(suma de los grados de sus vecinos), no depende del tamaño del grafo.
+        Si otro vértice tenía el mismo nombre en otras mayúsculas, deja de
+        encontrarse con get_vertex_by_name.
+        
+        Raises:
+            ValueError: Si el vértice no está en el grafo
+        """
+        # Las listas de los vecinos se reemplazan (no se modifican en sitio),
+        # así que las instantáneas no cambian
+        tocadas = ()
+        if vertex.get_type() == "ingrediente" and vertex in self.ingredientes:
+            recetas = tocadas = self.adyacencia.pop(vertex, ())
+            self._mover_grado(self._grados_ingredientes, len(recetas), None)
+            self._total_aristas -= len(recetas)
+            for receta in set(recetas):
+                anteriores = self.recetas_ingredientes[receta]
+                restantes = [i for i in anteriores if i != vertex]
+                self._mover_grado(self._grados_recetas, len(anteriores), len(restantes))
+                if restantes:
+                    self.recetas_ingredientes[receta] = restantes
+                else:
+                    del self.recetas_ingredientes[receta]
+            self.ingredientes.discard(vertex)
+            normalizado = vertex.get_name().strip().lower()
+            restantes = [i for i in self._ingredientes_normalizados[normalizado] if i != vertex]
+            if restantes:
+                self._ingredientes_normalizados[normalizado] = restantes
+            else:
+                del self._ingredientes_normalizados[normalizado]
+        elif vertex.get_type() == "receta" and vertex in self.recetas:
+            ingredientes = self.recetas_ingredientes.pop(vertex, ())
+            self._mover_grado(self._grados_recetas, len(ingredientes), None)
+            self._total_aristas -= len(ingredientes)
+            for ingrediente in set(ingredientes):
+                anteriores = self.adyacencia[ingrediente]
+                restantes = [r for r in anteriores if r != vertex]
+                self._mover_grado(self._grados_ingredientes, len(anteriores), len(restantes))
+                if restantes:
+                    self.adyacencia[ingrediente] = restantes
+                else:
+                    del self.adyacencia[ingrediente]
+            self.recetas.discard(vertex)
+            tocadas = (vertex,)
+        else:
+            raise ValueError(f"{vertex} no está en el grafo")
+        
+        por_nombre = self._vertices_por_nombre[vertex.get_type()]
+        if por_nombre.get(vertex.get_name().lower()) == vertex:
+            del por_nombre[vertex.get_name().lower()]
+        self._modificado(*tocadas)
+    
+    # ----- Operaciones por receta -----
+    
+    def _vertices_ingredientes(self, ingredientes: List[str]) -> List[Vertex]:
+        """Vértices (creados si hace falta) de una lista de nombres, normalizados como en build_graph_desde_db."""
+        vertices = []
+        for ing in ingredientes:
+            nombre_ing = ing.strip().lower() if isinstance(ing, str) else ""
+            if nombre_ing:
+                vertex = Vertex(nombre_ing, "ingrediente")
+                self.add_vertex(vertex)
+                vertices.append(vertex)
+        return vertices
+    
+    def _quitar_si_aislado(self, ingrediente: Vertex) -> None:
+        if ingrediente in self.ingredientes and not self.adyacencia.get(ingrediente):
+            self.remove_vertex(ingrediente)
+    
+    def agregar_receta(self, nombre: str, ingredientes: List[str]) -> Vertex:
+        """
+        Añade una receta con sus ingredientes (creando los ingredientes nuevos).
+        
+        Costo: O(cantidad de ingredientes de la receta).
+        
+        Raises:
+            ValueError: Si el nombre está vacío o la receta ya existe
+        """
+        receta = Vertex(nombre.strip(), "receta")
+        if not receta.get_name():
+            raise ValueError("La receta necesita un nombre")
+        if receta in self.recetas:
+            raise ValueError(f"La receta '{receta.get_name()}' ya existe")
+        self.add_vertex(receta)
+        for ingrediente in self._vertices_ingredientes(ingredientes):
+            self.add_edge(Edge(ingrediente, receta))
+        return receta
+    
+    def quitar_receta(self, nombre: str) -> None:
+        """
+        Quita una receta y sus aristas; los ingredientes que quedan sin recetas
+        también se quitan.
+        
+        Costo: O(suma de los grados de sus ingredientes).
+        
+        Raises:
+            ValueError: Si la receta no existe
+        """
+        receta = Vertex(nombre.strip(), "receta")
+        ingredientes = set(self.get_ingredientes_por_receta(receta))
+        self.remove_vertex(receta)
+        for ingrediente in ingredientes:
+            self._quitar_si_aislado(ingrediente)
+    
+    def reemplazar_ingredientes(self, nombre: str, ingredientes: List[str]) -> None:
+        """
+        Reemplaza la lista de ingredientes de una receta.
+        
+        Solo se tocan las aristas que cambian (las que sobran se quitan de la
+        adyacencia de su ingrediente y las nuevas se agregan); la receta queda
+        con los ingredientes en el orden dado. Los ingredientes que quedan sin
+        recetas se quitan.
+        
+        Costo: O(grado de la receta + grados de los ingredientes quitados).
+        
+        Raises:
+            ValueError: Si la receta no existe
+        """
+        receta = Vertex(nombre.strip(), "receta")
+        if receta not in self.recetas:
+            raise ValueError(f"Receta '{receta.get_name()}' no encontrada")
+        
+        anteriores = Counter(self.get_ingredientes_por_receta(receta))
+        nuevos_vertices = self._vertices_ingredientes(ingredientes)
+        nuevos = Counter(nuevos_vertices)
+        
+        for ingrediente, veces in (anteriores - nuevos).items():
+            recetas = self._lista_propia(self.adyacencia, ingrediente)
+            for _ in range(veces):
+                recetas.remove(receta)
+            self._mover_grado(self._grados_ingredientes, len(recetas) + veces, len(recetas))
+            if not recetas:
+                del self.adyacencia[ingrediente]
+        for ingrediente, veces in (nuevos - anteriores).items():
+            recetas = self._lista_propia(self.adyacencia, ingrediente)
+            recetas.extend([receta] * veces)
+            self._mover_grado(self._grados_ingredientes, len(recetas) - veces, len(recetas))
+        
+        grado_anterior = sum(anteriores.values())
+        self._mover_grado(self._grados_recetas, grado_anterior, len(nuevos_vertices))
+        self._total_aristas += len(nuevos_vertices) - grado_anterior
+        
+        # Lista nueva: no cambia la de las instantáneas
+        if nuevos_vertices:
+            self.recetas_ingredientes[receta] = nuevos_vertices
+        else:
+            self.recetas_ingredientes.pop(receta, None)
+        self._modificado(receta)
+        
+        for ingrediente in anteriores - nuevos:
+            self._quitar_si_aislado(ingrediente)
+    
+    # ----- Instantáneas -----
+    
+    def instantanea(self) -> 'BipartiteDirectedGraph':
+        """
+        Retorna una vista de solo lectura del grafo en su versión actual.
+        
+        La vista no cambia aunque el grafo se siga modificando: una consulta
+        que la usa de principio a fin ve un grafo consistente. Se crea una vez
+        por versión (O(V), copiando los índices pero no las listas de
+        adyacencia, que se copian al escribir) y se reutiliza mientras el grafo
+        no cambie.
+        
+        No es seguro llamarla a la vez que se modifica el grafo desde otro
+        hilo: las modificaciones y las instantáneas deben hacerse bajo el mismo
+        lock (ver platos/grafo.py).
+        """
+        if self._fijado is None or self._fijado.version != self.version:
+            anterior = self._fijado
+            self._fijado = GrafoFijado(self)
+            # Su forma compilada se actualiza desde la de la instantánea
+            # anterior (o desde la que esperaba esa, si no llegó a compilarse)
+            if anterior is not None:
+                if anterior._compilado is not None:
+                    self._fijado._pendiente = (anterior._compilado, self._tocadas)
+                else:
+                    pendiente = anterior._pendiente
+                    if pendiente is not None:
+                        tocadas = pendiente[1] | self._tocadas
+                        # Con demasiados cambios se compilará desde cero
+                        if pendiente[0].admite_cambios(len(tocadas)):
+                            self._fijado._pendiente = (pendiente[0], tocadas)
+            self._tocadas = set()
+            # Desde ahora todas las listas se comparten con la instantánea
+            self._propias = set()
+        return self._fijado
     
     def is_vertex_in(self, vertex: Vertex) -> bool:
         """Verifica si un vértice está en el grafo."""
@@ -179,14 +583,9 @@ class BipartiteDirectedGraph:
         Raises:
             ValueError: Si el vértice no existe
         """
-        if vertex_type == "ingrediente":
-            for v in self.ingredientes:
-                if v.get_name().lower() == name.lower():
-                    return v
-        elif vertex_type == "receta":
-            for v in self.recetas:
-                if v.get_name().lower() == name.lower():
-                    return v
+        vertex = self._vertices_por_nombre.get(vertex_type, {}).get(name.lower())
+        if vertex is not None:
+            return vertex
         
         raise ValueError(f"{vertex_type.capitalize()} '{name}' no encontrado")
     
@@ -201,17 +600,11 @@ class BipartiteDirectedGraph:
         Returns:
             Vertex: El vértice encontrado o None
         """
-        # Buscar en ingredientes
-        for v in self.ingredientes:
-            if v.get_name().lower() == vertex_name.lower():
-                return v
+        nombre = vertex_name.lower()
         
-        # Buscar en recetas
-        for v in self.recetas:
-            if v.get_name().lower() == vertex_name.lower():
-                return v
-        
-        return None
+        # Buscar en ingredientes y luego en recetas
+        return (self._vertices_por_nombre['ingrediente'].get(nombre) or
+                self._vertices_por_nombre['receta'].get(nombre))
     
     def get_recetas_por_ingrediente(self, ingrediente: Vertex) -> List[Vertex]:
         """
@@ -237,6 +630,63 @@ class BipartiteDirectedGraph:
         """
         return self.recetas_ingredientes.get(receta, [])
     
+    @property
+    def total_aristas(self) -> int:
+        """Cantidad de aristas Ingrediente --> Receta (contador, O(1))."""
+        return self._total_aristas
+    
+    def distribucion_grados(self) -> Dict[str, Dict[int, int]]:
+        """
+        Histogramas de grados: {'ingredientes': {recetas que lo usan: cantidad},
+        'recetas': {ingredientes que necesita: cantidad}}, por grado ascendente.
+        """
+        return {
+            'ingredientes': dict(sorted(self._grados_ingredientes.items())),
+            'recetas': dict(sorted(self._grados_recetas.items())),
+        }
+    
+    def ingredientes_mas_usados(self, cantidad: int = 10) -> List[Tuple[str, int]]:
+        """Los `cantidad` ingredientes con más aristas: [(nombre, aristas), ...], empates por nombre."""
+        mas_usados = heapq.nsmallest(cantidad, self.adyacencia.items(),
+                                     key=lambda par: (-len(par[1]), par[0].get_name()))
+        return [(ingrediente.get_name(), len(recetas)) for ingrediente, recetas in mas_usados]
+    
+    def estadisticas(self) -> Dict:
+        """
+        Estadísticas del grafo para monitoreo y planificación de capacidad.
+        
+        Los totales y los histogramas de grados salen de los contadores que
+        mantienen las modificaciones; el resultado completo se calcula una vez
+        por versión del grafo y se reutiliza (debe tratarse como de solo lectura).
+        
+        Returns:
+            Dict: total_ingredientes, total_recetas, total_aristas,
+                promedio_ingredientes_por_receta, distribucion_grados,
+                ingredientes_mas_usados ([{'nombre', 'recetas'}, ...])
+        """
+        if self._estadisticas is None:
+            total_recetas = len(self.recetas)
+            self._estadisticas = {
+                'total_ingredientes': len(self.ingredientes),
+                'total_recetas': total_recetas,
+                'total_aristas': self.total_aristas,
+                'promedio_ingredientes_por_receta':
+                    round(self.total_aristas / total_recetas, 2) if total_recetas else 0.0,
+                'distribucion_grados': self.distribucion_grados(),
+                'ingredientes_mas_usados': [
+                    {'nombre': nombre, 'recetas': aristas} for nombre, aristas in self.ingredientes_mas_usados()
+                ],
+            }
+        return self._estadisticas
+    
+    def recorrer_recetas(self):
+        """
+        Itera (nombre de receta, [nombres de sus ingredientes]) en el orden en que
+        las búsquedas recorren las recetas.
+        """
+        for receta in self.recetas:
+            yield receta.get_name(), [ingrediente.get_name() for ingrediente in self.get_ingredientes_por_receta(receta)]
+    
     def get_neighbors(self, vertex: Vertex) -> List[Vertex]:
         """
         Obtiene los vértices vecinos (compatibilidad con código anterior).
@@ -251,7 +701,11 @@ class BipartiteDirectedGraph:
     
     def buscar_recetas_por_ingredientes(self, 
                                        ingredientes_disponibles: List[str],
-                                       umbral_casi_completa: float = 0.75) -> Dict:
+                                       umbral_casi_completa: float = 0.75,
+                                       limite: Optional[int] = None,
+                                       desplazamiento: int = 0,
+                                       top_k: Optional[int] = None,
+                                       totales: Optional[Dict[str, int]] = None) -> Dict:
         """
         Busca recetas que pueden prepararse con los ingredientes disponibles.
         
@@ -263,6 +717,8 @@ class BipartiteDirectedGraph:
         Args:
             ingredientes_disponibles (List[str]): Lista de nombres de ingredientes disponibles
             umbral_casi_completa (float): Umbral para clasificar como "casi completa" (0..1)
+            limite, desplazamiento, top_k, totales: Recorte de cada categoría
+                (ver paginar_resultados)
         
         Returns:
             Dict: Diccionario con claves 'completas', 'casi_completas', 'incompletas'
@@ -271,7 +727,9 @@ class BipartiteDirectedGraph:
         # Normalizar nombres de ingredientes (minúsculas y sin espacios)
         ingredientes_disponibles_norm = {ing.strip().lower() for ing in ingredientes_disponibles}
         
-        print(f"[DEBUG] Ingredientes disponibles normalizados: {ingredientes_disponibles_norm}")
+        depurar = logger.isEnabledFor(logging.DEBUG)
+        if depurar:
+            logger.debug("Ingredientes disponibles normalizados: %s", ingredientes_disponibles_norm)
         
         resultados = {
             'completas': [],
@@ -285,7 +743,8 @@ class BipartiteDirectedGraph:
             
             if not ingredientes_necesarios:
                 # Receta sin ingredientes (caso raro)
-                print(f"[DEBUG] Receta '{receta.get_name()}' sin ingredientes")
+                if depurar:
+                    logger.debug("Receta '%s' sin ingredientes", receta.get_name())
                 continue
             
             # Contar ingredientes disponibles y faltantes
@@ -303,31 +762,142 @@ class BipartiteDirectedGraph:
             ratio = ingredientes_presentes / len(ingredientes_necesarios)
             
             # Crear resultado parcial
-            resultado_receta = {
-                'nombre': receta.get_name(),
-                'ingredientes_totales': len(ingredientes_necesarios),
-                'ingredientes_disponibles': ingredientes_presentes,
-                'ingredientes_faltantes': ingredientes_faltantes,
-                'cantidad_faltantes': len(ingredientes_faltantes),
-                'ratio': round(ratio, 4),
-                'score': round(ratio * 100, 2)
-            }
+            resultado_receta = crear_resultado_receta(
+                receta.get_name(), len(ingredientes_necesarios), ingredientes_presentes, ingredientes_faltantes
+            )
             
-            print(f"[DEBUG] Receta: {receta.get_name()}, Ratio: {ratio}, Score: {resultado_receta['score']}")
+            if depurar:
+                logger.debug("Receta: %s, Ratio: %s, Score: %s", receta.get_name(), ratio, resultado_receta['score'])
             
             # Clasificar según ratio
-            if ratio == 1.0:
-                resultados['completas'].append(resultado_receta)
-            elif ratio >= umbral_casi_completa:
-                resultados['casi_completas'].append(resultado_receta)
-            else:
-                resultados['incompletas'].append(resultado_receta)
+            resultados[categoria_por_ratio(ratio, umbral_casi_completa)].append(resultado_receta)
         
-        # Ordenar cada categoría por score (descendente)
-        for categoria in resultados:
-            resultados[categoria].sort(key=lambda x: x['score'], reverse=True)
+        # Ordenar cada categoría por score (descendente) y recortar si se pidió
+        return paginar_resultados(resultados, limite, desplazamiento, top_k, totales)
+    
+    def buscar_recetas_candidatas(self,
+                                  ingredientes_disponibles: List[str],
+                                  umbral_casi_completa: float = 0.75,
+                                  incluir_sin_coincidencias: bool = True,
+                                  limite: Optional[int] = None,
+                                  desplazamiento: int = 0,
+                                  top_k: Optional[int] = None,
+                                  totales: Optional[Dict[str, int]] = None) -> Dict:
+        """
+        Igual que buscar_recetas_por_ingredientes, pero partiendo de la despensa.
+        
+        Recorre la adyacencia de los ingredientes disponibles contando cuántos
+        tiene cada receta alcanzada, y solo evalúa esas recetas (las que
+        comparten al menos un ingrediente). El costo depende de cuántas recetas
+        usan los ingredientes de la despensa, no del tamaño del catálogo.
+        
+        A igual score, las recetas quedan en el orden en que se alcanzaron, que
+        puede diferir del de buscar_recetas_por_ingredientes.
+        
+        Args:
+            ingredientes_disponibles (List[str]): Lista de nombres de ingredientes disponibles
+            umbral_casi_completa (float): Umbral para clasificar como "casi completa" (0..1)
+            incluir_sin_coincidencias (bool): Si es True (por defecto, igual que
+                GrafoCompilado y la API), agrega al final de su categoría las
+                recetas sin ningún ingrediente disponible (score 0), lo que
+                vuelve a recorrer todas las recetas. Con False solo se evalúan
+                las recetas alcanzadas desde la despensa
+            limite, desplazamiento, top_k, totales: Recorte de cada categoría
+                (ver paginar_resultados)
+        
+        Returns:
+            Dict: Diccionario con claves 'completas', 'casi_completas', 'incompletas'
+        """
+        ingredientes_disponibles_norm = {ing.strip().lower() for ing in ingredientes_disponibles}
+        
+        resultados = {
+            'completas': [],
+            'casi_completas': [],
+            'incompletas': []
+        }
+        
+        # Recetas alcanzadas desde la despensa --> ingredientes presentes
+        # (una receta que repite un ingrediente aparece repetida en su adyacencia)
+        presentes_por_receta = {}
+        for ingrediente in self._ingredientes_con_nombres(ingredientes_disponibles_norm):
+            for receta in self.get_recetas_por_ingrediente(ingrediente):
+                presentes_por_receta[receta] = presentes_por_receta.get(receta, 0) + 1
+        
+        for receta, ingredientes_presentes in presentes_por_receta.items():
+            ingredientes_necesarios = self.get_ingredientes_por_receta(receta)
+            ingredientes_faltantes = [
+                ingrediente.get_name() for ingrediente in ingredientes_necesarios
+                if ingrediente.get_name().strip().lower() not in ingredientes_disponibles_norm
+            ]
+            ratio = ingredientes_presentes / len(ingredientes_necesarios)
+            resultados[categoria_por_ratio(ratio, umbral_casi_completa)].append(
+                crear_resultado_receta(receta.get_name(), len(ingredientes_necesarios),
+                                       ingredientes_presentes, ingredientes_faltantes)
+            )
         
-        return resultados
+        colas = None
+        if incluir_sin_coincidencias:
+            sin_coincidencias = []
+            for receta in self.recetas:
+                ingredientes_necesarios = self.get_ingredientes_por_receta(receta)
+                if ingredientes_necesarios and receta not in presentes_por_receta:
+                    sin_coincidencias.append(crear_resultado_receta(
+                        receta.get_name(), len(ingredientes_necesarios), 0,
+                        [ingrediente.get_name() for ingrediente in ingredientes_necesarios]
+                    ))
+            # Score 0: van al final de su categoría, sin ordenar
+            colas = {categoria_por_ratio(0.0, umbral_casi_completa):
+                     (len(sin_coincidencias), lambda cantidad: sin_coincidencias[:cantidad])}
+        
+        return paginar_resultados(resultados, limite, desplazamiento, top_k, totales, colas)
+    
+    def _ingredientes_con_nombres(self, nombres_normalizados: Set[str]) -> List[Vertex]:
+        """Vértices de ingrediente cuyo nombre normalizado está en el conjunto."""
+        return [
+            ingrediente for nombre in nombres_normalizados
+            for ingrediente in self._ingredientes_normalizados.get(nombre, ())
+        ]
+    
+    def compilar(self):
+        """
+        Retorna la forma compilada (bitsets) del grafo, construyéndola si hace falta.
+        
+        La forma compilada da los mismos resultados que buscar_recetas_por_ingredientes
+        y es mucho más rápida en catálogos grandes (ver grafoCompilado.py).
+        
+        Se construye una vez por versión: si varios hilos la piden a la vez, uno
+        la construye y los demás esperan y reutilizan la misma.
+        
+        Returns:
+            GrafoCompilado: Vista compilada, válida hasta la próxima modificación del grafo
+        """
+        compilado = self._compilado
+        if compilado is None:
+            with self._lock_compilacion:
+                if self._compilado is None:
+                    self._compilado = self._compilar()
+                compilado = self._compilado
+        return compilado
+    
+    def _compilar(self):
+        from platos.algoritmos.grafoCompilado import GrafoCompilado
+        return GrafoCompilado(self)
+    
+    def puntuar_lote(self, despensas: List[List[str]], usar_numpy: bool = None):
+        """
+        Calcula el ratio de cada receta para muchas despensas a la vez.
+        
+        Usa la matriz de incidencia ingredientes x recetas (CSR) con NumPy si
+        está instalado, o el camino en Python puro si no.
+        
+        Args:
+            despensas (List[List[str]]): Ingredientes disponibles de cada despensa
+            usar_numpy (bool): None para decidir según la instalación; False fuerza Python puro
+        
+        Returns:
+            Tuple: (nombres de recetas, ratios recetas x despensas)
+        """
+        return self.compilar().puntuar_lote(despensas, usar_numpy=usar_numpy)
     
     def bfs_recetas_accesibles(self, ingrediente_inicio: Vertex) -> List[Vertex]:
         """
@@ -367,7 +937,7 @@ class BipartiteDirectedGraph:
         output = "=== GRAFO BIPARTITO DIRIGIDO ===\n"
         output += f"Ingredientes: {len(self.ingredientes)}\n"
         output += f"Recetas: {len(self.recetas)}\n"
-        output += f"Aristas: {sum(len(v) for v in self.adyacencia.values())}\n\n"
+        output += f"Aristas: {self.total_aristas}\n\n"
         output += "=== ARISTAS (Ingrediente --> Receta) ===\n"
         
         for ingrediente in self.ingredientes:
@@ -378,12 +948,81 @@ class BipartiteDirectedGraph:
         return output
 
 
+class GrafoFijado(BipartiteDirectedGraph):
+    """
+    Instantánea de solo lectura de un BipartiteDirectedGraph en una versión.
+    
+    Se obtiene con BipartiteDirectedGraph.instantanea(). Tiene la misma API de
+    lectura y búsqueda (y su propia forma compilada); las modificaciones
+    lanzan error.
+    
+    Su forma compilada se obtiene actualizando la de la instantánea anterior
+    con las recetas que cambiaron (GrafoCompilado.actualizado), en lugar de
+    compilar todo el grafo después de cada edición.
+    """
+    
+    def __init__(self, grafo: BipartiteDirectedGraph):
+        self.adyacencia = dict(grafo.adyacencia)
+        self.recetas_ingredientes = dict(grafo.recetas_ingredientes)
+        self.ingredientes = set(grafo.ingredientes)
+        self.recetas = set(grafo.recetas)
+        self._vertices_por_nombre = {tipo: dict(vertices) for tipo, vertices in grafo._vertices_por_nombre.items()}
+        self._ingredientes_normalizados = dict(grafo._ingredientes_normalizados)
+        self._compilado = None
+        self._lock_compilacion = threading.Lock()
+        # (forma compilada de una versión anterior, recetas cambiadas desde
+        # entonces), o None (ver BipartiteDirectedGraph.instantanea)
+        self._pendiente = None
+        self._total_aristas = grafo._total_aristas
+        self._grados_ingredientes = Counter(grafo._grados_ingredientes)
+        self._grados_recetas = Counter(grafo._grados_recetas)
+        self._estadisticas = None
+        self.version = grafo.version
+    
+    def _modificado(self) -> None:
+        raise TypeError("La instantánea del grafo es de solo lectura")
+    
+    def _lista_propia(self, indice, clave) -> list:
+        raise TypeError("La instantánea del grafo es de solo lectura")
+    
+    def add_vertex(self, vertex: Vertex) -> None:
+        raise TypeError("La instantánea del grafo es de solo lectura")
+    
+    def add_edge(self, edge: Edge) -> None:
+        raise TypeError("La instantánea del grafo es de solo lectura")
+    
+    def remove_vertex(self, vertex: Vertex) -> None:
+        raise TypeError("La instantánea del grafo es de solo lectura")
+    
+    def remove_edge(self, edge: Edge) -> None:
+        raise TypeError("La instantánea del grafo es de solo lectura")
+    
+    def instantanea(self) -> 'GrafoFijado':
+        return self
+    
+    def compilar(self):
+        compilado = super().compilar()
+        # Ya no hace falta la forma compilada anterior
+        self._pendiente = None
+        return compilado
+    
+    def _compilar(self):
+        pendiente = self._pendiente
+        if pendiente is not None:
+            anterior, tocadas = pendiente
+            compilado = anterior.actualizado(self, tocadas)
+            if compilado is not None:
+                return compilado
+        return super()._compilar()
+
+
 def build_graph_desde_db(platos_db: List[Dict]) -> BipartiteDirectedGraph:
     """
     Construye un grafo bipartito dirigido a partir de una base de datos de platos.
     
     Args:
-        platos_db (List[Dict]): Lista de diccionarios con estructura:
+        platos_db (List[Dict]): Lista (o tupla) de platos con acceso tipo dict
+            (dicts o registros PlatoCatalogo) con estructura:
             {
                 'id': 1,
                 'nombre': 'Arroz con pollo',
@@ -396,72 +1035,53 @@ def build_graph_desde_db(platos_db: List[Dict]) -> BipartiteDirectedGraph:
     Raises:
         ValueError: Si la base de datos es inválida
     """
-    if not isinstance(platos_db, list):
+    if not isinstance(platos_db, (list, tuple)):
         raise ValueError("platos_db debe ser una lista")
     
     grafo = BipartiteDirectedGraph()
     
-    # Conjuntos para evitar duplicados
-    ingredientes_añadidos = set()
+    # Vértices ya creados, por nombre exacto (las recetas) o normalizado (los ingredientes)
     recetas_añadidas = set()
+    ingredientes_añadidos = {}
     
-    print(f"[DEBUG] Construyendo grafo desde {len(platos_db)} platos...")
+    logger.debug("Construyendo grafo desde %d platos...", len(platos_db))
     
-    # Primero, recorrer todos los platos para añadir vértices
-    for plato in platos_db:
-        nombre_receta = plato.get('nombre', '').strip()
-        if not nombre_receta or nombre_receta in recetas_añadidas:
-            continue
-        
-        # Crear vértice de receta
-        receta_vertex = Vertex(nombre_receta, "receta")
-        grafo.add_vertex(receta_vertex)
-        recetas_añadidas.add(nombre_receta)
-        
-        # Procesar ingredientes de esta receta
-        ingredientes = plato.get('ingredientes', [])
-        for ing in ingredientes:
-            nombre_ing = ing.strip().lower() if isinstance(ing, str) else ""
-            
-            if not nombre_ing:
+    # Una sola pasada: vértices y aristas (Ingrediente --> Receta) de cada plato.
+    # Todas las búsquedas por nombre son O(1), así que la construcción es O(V + E)
+    with medir('grafo.construccion_pasada'):
+        aristas_creadas = 0
+        for plato in platos_db:
+            nombre_receta = plato.get('nombre', '').strip()
+            if not nombre_receta:
                 continue
             
-            # Crear vértice de ingrediente (si no existe)
-            if nombre_ing not in ingredientes_añadidos:
-                ingrediente_vertex = Vertex(nombre_ing, "ingrediente")
-                grafo.add_vertex(ingrediente_vertex)
-                ingredientes_añadidos.add(nombre_ing)
-    
-    print(f"[DEBUG] Vértices creados: {len(ingredientes_añadidos)} ingredientes, {len(recetas_añadidas)} recetas")
-    
-    # Segundo, crear las aristas (Ingrediente --> Receta)
-    aristas_creadas = 0
-    for plato in platos_db:
-        nombre_receta = plato.get('nombre', '').strip()
-        if not nombre_receta:
-            continue
-        
-        try:
+            # Crear vértice de receta (si no existe)
+            if nombre_receta not in recetas_añadidas:
+                grafo.add_vertex(Vertex(nombre_receta, "receta"))
+                recetas_añadidas.add(nombre_receta)
+            # Un plato con nombre repetido (sin distinguir mayúsculas) suma
+            # sus ingredientes a la receta ya creada
             receta_vertex = grafo.get_vertex_by_name(nombre_receta, "receta")
-        except ValueError:
-            continue
-        
-        ingredientes = plato.get('ingredientes', [])
-        for ing in ingredientes:
-            nombre_ing = ing.strip().lower() if isinstance(ing, str) else ""
-            if not nombre_ing:
-                continue
             
-            try:
-                ingrediente_vertex = grafo.get_vertex_by_name(nombre_ing, "ingrediente")
+            # Procesar ingredientes de esta receta
+            ingredientes = plato.get('ingredientes', [])
+            for ing in ingredientes:
+                nombre_ing = ing.strip().lower() if isinstance(ing, str) else ""
+                if not nombre_ing:
+                    continue
+                
+                # Crear vértice de ingrediente (si no existe)
+                ingrediente_vertex = ingredientes_añadidos.get(nombre_ing)
+                if ingrediente_vertex is None:
+                    ingrediente_vertex = Vertex(nombre_ing, "ingrediente")
+                    grafo.add_vertex(ingrediente_vertex)
+                    ingredientes_añadidos[nombre_ing] = ingrediente_vertex
+                
                 # Crear arista: ingrediente --> receta
-                arista = Edge(ingrediente_vertex, receta_vertex)
-                grafo.add_edge(arista)
+                grafo.add_edge(Edge(ingrediente_vertex, receta_vertex))
                 aristas_creadas += 1
-            except ValueError:
-                # Ingrediente no encontrado (no debería ocurrir)
-                pass
     
-    print(f"[DEBUG] Aristas creadas: {aristas_creadas}")
+    logger.debug("Vértices creados: %d ingredientes, %d recetas", len(ingredientes_añadidos), len(recetas_añadidas))
+    logger.debug("Aristas creadas: %d", aristas_creadas)
     
     return grafo
@@ -0,0 +1,310 @@
+"""
+Almacenamiento compacto (CSR) del Grafo Bipartito Dirigido.
+
+En lugar de objetos Vertex/Edge y listas de referencias:
+- Cada ingrediente y cada receta es un entero (su id), con una tabla de
+  nombres por tipo: nombres_ingredientes[i], nombres_recetas[r].
+- La adyacencia se guarda en formato CSR con array('i'), en ambos sentidos:
+
+    recetas del ingrediente i:     recetas_de[inicio_recetas[i]:inicio_recetas[i + 1]]
+    ingredientes de la receta r:   ingredientes_de[inicio_ingredientes[r]:inicio_ingredientes[r + 1]]
+
+  Cada arista ocupa 4 bytes por sentido (frente a una referencia de 8 bytes
+  más la lista que la contiene, y el Edge temporal de cada arista).
+
+GrafoCompacto tiene la misma API de lectura que BipartiteDirectedGraph
+(get_recetas_por_ingrediente, get_ingredientes_por_receta, búsquedas,
+compilar, ...). Los Vertex se crean solo al pedirlos. Es de solo lectura:
+add_vertex, add_edge, remove_vertex y remove_edge lanzan error.
+"""
+
+import heapq
+import threading
+from array import array
+from collections import Counter
+from collections.abc import Mapping, Set as ConjuntoAbstracto
+from typing import Dict, List, Tuple
+
+from platos.algoritmos.grafoBusquedaReceta import BipartiteDirectedGraph, Vertex
+from platos.algoritmos.registro import obtener_logger, medir
+
+logger = obtener_logger('grafo')
+
+
+class VerticesCompactos(ConjuntoAbstracto):
+    """Conjunto (solo lectura) de los vértices de un tipo, en orden de id."""
+
+    def __init__(self, nombres: List[str], ids: Dict[str, int], tipo: str):
+        self._nombres = nombres
+        self._ids = ids
+        self._tipo = tipo
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def __iter__(self):
+        tipo = self._tipo
+        return (Vertex(nombre, tipo) for nombre in self._nombres)
+
+    def __contains__(self, vertex):
+        return (isinstance(vertex, Vertex) and vertex.get_type() == self._tipo and
+                vertex.get_name() in self._ids)
+
+
+class AdyacenciaCompacta(Mapping):
+    """Vista {Vertex: [Vertex, ...]} de un sentido de la adyacencia CSR."""
+
+    def __init__(self, vertices: VerticesCompactos, obtener):
+        self._vertices = vertices
+        self._obtener = obtener
+
+    def __getitem__(self, vertex):
+        if vertex not in self._vertices:
+            raise KeyError(vertex)
+        return self._obtener(vertex)
+
+    def __iter__(self):
+        return iter(self._vertices)
+
+    def __len__(self):
+        return len(self._vertices)
+
+
+class GrafoCompacto(BipartiteDirectedGraph):
+    """
+    Grafo bipartito Ingredientes --> Recetas con ids enteros y adyacencia CSR.
+
+    Se construye con GrafoCompacto.desde_db(platos_db),
+    GrafoCompacto.desde_grafo(grafo) o desde una instantánea en disco
+    (ver instantaneaGrafo.py).
+    """
+
+    def __init__(self, nombres_ingredientes: List[str], nombres_recetas: List[str],
+                 inicio_ingredientes, ingredientes_de, inicio_recetas, recetas_de):
+        """
+        Args:
+            nombres_ingredientes (List[str]): Tabla de nombres de ingredientes (id = posición)
+            nombres_recetas (List[str]): Tabla de nombres de recetas (id = posición)
+            inicio_ingredientes, ingredientes_de: CSR receta --> ingredientes
+            inicio_recetas, recetas_de: CSR ingrediente --> recetas
+                (array('i') o cualquier secuencia de enteros con protocolo de buffer)
+        """
+        self.nombres_ingredientes = nombres_ingredientes
+        self.nombres_recetas = nombres_recetas
+        self.inicio_ingredientes = inicio_ingredientes
+        self.ingredientes_de = ingredientes_de
+        self.inicio_recetas = inicio_recetas
+        self.recetas_de = recetas_de
+        self._indexar_nombres()
+
+        self.ingredientes = VerticesCompactos(nombres_ingredientes, self._id_ingrediente, 'ingrediente')
+        self.recetas = VerticesCompactos(nombres_recetas, self._id_receta, 'receta')
+        self.adyacencia = AdyacenciaCompacta(self.ingredientes, self.get_recetas_por_ingrediente)
+        self.recetas_ingredientes = AdyacenciaCompacta(self.recetas, self.get_ingredientes_por_receta)
+        # Vistas sin copia para recorrer rangos de los arreglos
+        self._vista_recetas_de = memoryview(self.recetas_de)
+        self._vista_ingredientes_de = memoryview(self.ingredientes_de)
+        self._compilado = None
+        self._lock_compilacion = threading.Lock()
+        self._estadisticas = None
+        self.version = 0
+
+    def _indexar_nombres(self) -> None:
+        """
+        Índices por nombre exacto (igualdad de Vertex), en minúsculas
+        (get_vertex_by_name; queda el primero) y normalizado (búsquedas).
+
+        Solo se usan con get(): GrafoMapeado los reemplaza por búsquedas
+        binarias sobre el archivo mapeado.
+        """
+        self._id_ingrediente = {nombre: i for i, nombre in enumerate(self.nombres_ingredientes)}
+        self._id_receta = {nombre: r for r, nombre in enumerate(self.nombres_recetas)}
+        self._ids_por_nombre = {'ingrediente': {}, 'receta': {}}
+        for i, nombre in enumerate(self.nombres_ingredientes):
+            self._ids_por_nombre['ingrediente'].setdefault(nombre.lower(), i)
+        for r, nombre in enumerate(self.nombres_recetas):
+            self._ids_por_nombre['receta'].setdefault(nombre.lower(), r)
+        self._ingredientes_normalizados: Dict[str, List[int]] = {}
+        for i, nombre in enumerate(self.nombres_ingredientes):
+            self._ingredientes_normalizados.setdefault(nombre.strip().lower(), []).append(i)
+
+    @classmethod
+    def desde_listas(cls, nombres_ingredientes: List[str], nombres_recetas: List[str],
+                     ingredientes_por_receta: List[List[int]]) -> 'GrafoCompacto':
+        """
+        Construye los arreglos CSR en ambos sentidos.
+
+        Args:
+            ingredientes_por_receta (List[List[int]]): Ids de ingredientes de cada receta,
+                en orden y con repeticiones
+        """
+        # CSR receta --> ingredientes
+        inicio_ingredientes = array('i', [0])
+        ingredientes_de = array('i')
+        for ids in ingredientes_por_receta:
+            ingredientes_de.extend(ids)
+            inicio_ingredientes.append(len(ingredientes_de))
+
+        # CSR ingrediente --> recetas (contando primero el grado de cada ingrediente)
+        grados = [0] * len(nombres_ingredientes)
+        for id_ingrediente in ingredientes_de:
+            grados[id_ingrediente] += 1
+        inicio_recetas = array('i', [0]) * (len(nombres_ingredientes) + 1)
+        for id_ingrediente, grado in enumerate(grados):
+            inicio_recetas[id_ingrediente + 1] = inicio_recetas[id_ingrediente] + grado
+        recetas_de = array('i', [0]) * len(ingredientes_de)
+        siguiente = array('i', inicio_recetas[:-1])
+        for id_receta, ids in enumerate(ingredientes_por_receta):
+            for id_ingrediente in ids:
+                recetas_de[siguiente[id_ingrediente]] = id_receta
+                siguiente[id_ingrediente] += 1
+
+        return cls(nombres_ingredientes, nombres_recetas, inicio_ingredientes, ingredientes_de,
+                   inicio_recetas, recetas_de)
+
+    @classmethod
+    def desde_db(cls, platos_db: List[Dict]) -> 'GrafoCompacto':
+        """
+        Construye el grafo desde los platos, con las mismas reglas que build_graph_desde_db
+        (ingredientes normalizados, un plato con nombre repetido suma sus ingredientes
+        a la receta ya creada), sin crear Vertex ni Edge.
+        """
+        if not isinstance(platos_db, (list, tuple)):
+            raise ValueError("platos_db debe ser una lista")
+
+        nombres_ingredientes = []
+        nombres_recetas = []
+        ingredientes_por_receta = []
+        id_ingrediente = {}
+        id_receta = {}
+        id_receta_minusculas = {}
+        with medir('grafo.construccion_compacta'):
+            for plato in platos_db:
+                nombre_receta = plato.get('nombre', '').strip()
+                if not nombre_receta:
+                    continue
+                if nombre_receta not in id_receta:
+                    id_receta[nombre_receta] = len(nombres_recetas)
+                    id_receta_minusculas.setdefault(nombre_receta.lower(), len(nombres_recetas))
+                    nombres_recetas.append(nombre_receta)
+                    ingredientes_por_receta.append([])
+                ids = ingredientes_por_receta[id_receta_minusculas[nombre_receta.lower()]]
+
+                for ing in plato.get('ingredientes', []):
+                    nombre_ing = ing.strip().lower() if isinstance(ing, str) else ""
+                    if not nombre_ing:
+                        continue
+                    if nombre_ing not in id_ingrediente:
+                        id_ingrediente[nombre_ing] = len(nombres_ingredientes)
+                        nombres_ingredientes.append(nombre_ing)
+                    ids.append(id_ingrediente[nombre_ing])
+
+            grafo = cls.desde_listas(nombres_ingredientes, nombres_recetas, ingredientes_por_receta)
+        logger.debug("Grafo compacto: %d ingredientes, %d recetas, %d aristas",
+                     len(nombres_ingredientes), len(nombres_recetas), len(grafo.ingredientes_de))
+        return grafo
+
+    @classmethod
+    def desde_grafo(cls, grafo: BipartiteDirectedGraph) -> 'GrafoCompacto':
+        """Copia un BipartiteDirectedGraph, conservando el orden de recorrido de sus recetas."""
+        nombres_ingredientes = [ingrediente.get_name() for ingrediente in grafo.ingredientes]
+        id_ingrediente = {nombre: i for i, nombre in enumerate(nombres_ingredientes)}
+        recetas = list(grafo.recetas)
+        return cls.desde_listas(
+            nombres_ingredientes,
+            [receta.get_name() for receta in recetas],
+            [[id_ingrediente[ingrediente.get_name()] for ingrediente in grafo.get_ingredientes_por_receta(receta)]
+             for receta in recetas],
+        )
+
+    @property
+    def total_aristas(self) -> int:
+        return len(self.ingredientes_de)
+
+    def _grados(self, inicio) -> List[int]:
+        return [inicio[v + 1] - inicio[v] for v in range(len(inicio) - 1)]
+
+    def distribucion_grados(self) -> Dict[str, Dict[int, int]]:
+        # Sale de los arreglos de inicio del CSR; como el grafo no cambia,
+        # estadisticas() la calcula una sola vez
+        return {
+            'ingredientes': dict(sorted(Counter(self._grados(self.inicio_recetas)).items())),
+            'recetas': dict(sorted(Counter(self._grados(self.inicio_ingredientes)).items())),
+        }
+
+    def ingredientes_mas_usados(self, cantidad: int = 10) -> List[Tuple[str, int]]:
+        grados = self._grados(self.inicio_recetas)
+        mas_usados = heapq.nsmallest(cantidad, range(len(grados)),
+                                     key=lambda i: (-grados[i], self.nombres_ingredientes[i]))
+        return [(self.nombres_ingredientes[i], grados[i]) for i in mas_usados]
+
+    # ----- Solo lectura -----
+
+    def add_vertex(self, vertex: Vertex) -> None:
+        raise TypeError("GrafoCompacto es de solo lectura")
+
+    def add_edge(self, edge) -> None:
+        raise TypeError("GrafoCompacto es de solo lectura")
+
+    def remove_vertex(self, vertex: Vertex) -> None:
+        raise TypeError("GrafoCompacto es de solo lectura")
+
+    def remove_edge(self, edge) -> None:
+        raise TypeError("GrafoCompacto es de solo lectura")
+
+    def instantanea(self) -> 'GrafoCompacto':
+        # Ya es de solo lectura
+        return self
+
+    # ----- Ids --> nombres / Vertex -----
+
+    def recetas_de_ingrediente(self, id_ingrediente: int) -> memoryview:
+        """Ids de las recetas que usan el ingrediente (vista sin copiar)."""
+        return self._vista_recetas_de[self.inicio_recetas[id_ingrediente]:self.inicio_recetas[id_ingrediente + 1]]
+
+    def ingredientes_de_receta(self, id_receta: int) -> memoryview:
+        """Ids de los ingredientes de la receta, en orden y con repeticiones (vista sin copiar)."""
+        return self._vista_ingredientes_de[self.inicio_ingredientes[id_receta]:self.inicio_ingredientes[id_receta + 1]]
+
+    def get_vertex_by_name(self, name: str, vertex_type: str) -> Vertex:
+        id_vertice = self._ids_por_nombre.get(vertex_type, {}).get(name.lower())
+        if id_vertice is not None:
+            nombres = self.nombres_ingredientes if vertex_type == 'ingrediente' else self.nombres_recetas
+            return Vertex(nombres[id_vertice], vertex_type)
+        raise ValueError(f"{vertex_type.capitalize()} '{name}' no encontrado")
+
+    def get_vertex(self, vertex_name: str) -> Vertex:
+        for tipo in ('ingrediente', 'receta'):
+            try:
+                return self.get_vertex_by_name(vertex_name, tipo)
+            except ValueError:
+                pass
+        return None
+
+    def get_recetas_por_ingrediente(self, ingrediente: Vertex) -> List[Vertex]:
+        id_ingrediente = self._id_ingrediente.get(ingrediente.get_name())
+        if id_ingrediente is None or ingrediente.get_type() != 'ingrediente':
+            return []
+        nombres = self.nombres_recetas
+        return [Vertex(nombres[r], 'receta') for r in self.recetas_de_ingrediente(id_ingrediente)]
+
+    def get_ingredientes_por_receta(self, receta: Vertex) -> List[Vertex]:
+        id_receta = self._id_receta.get(receta.get_name())
+        if id_receta is None or receta.get_type() != 'receta':
+            return []
+        nombres = self.nombres_ingredientes
+        return [Vertex(nombres[i], 'ingrediente') for i in self.ingredientes_de_receta(id_receta)]
+
+    def recorrer_recetas(self):
+        nombres = self.nombres_ingredientes
+        for id_receta, nombre_receta in enumerate(self.nombres_recetas):
+            yield nombre_receta, [nombres[i] for i in self.ingredientes_de_receta(id_receta)]
+
+    def get_neighbors(self, vertex: Vertex) -> List[Vertex]:
+        return self.get_recetas_por_ingrediente(vertex)
+
+    def _ingredientes_con_nombres(self, nombres_normalizados) -> List[Vertex]:
+        return [
+            Vertex(self.nombres_ingredientes[i], 'ingrediente') for nombre in nombres_normalizados
+            for i in self._ingredientes_normalizados.get(nombre, ())
+        ]
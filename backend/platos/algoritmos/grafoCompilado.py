@@ -0,0 +1,387 @@
+"""
+Forma compilada (bitsets) del Grafo Bipartito Dirigido para clasificar recetas.
+
+- Cada ingrediente (nombre normalizado) recibe una posición de bit. Los más
+  usados reciben los bits más bajos para que las máscaras sean enteros pequeños.
+- Cada receta es una máscara (int) con los bits de sus ingredientes.
+- Una despensa (ingredientes disponibles) es una sola máscara.
+- Para cada bit, la lista de recetas que lo usan: solo se evalúan las recetas
+  que comparten algún bit con la despensa; las demás usan un resultado
+  precalculado.
+
+Para cada receta candidata, los presentes son popcount(receta & despensa) y
+los faltantes salen de receta & ~despensa, en el orden de la receta. Si la
+receta repite un ingrediente (mismo bit dos veces), cada repetición cuenta,
+como en el grafo: esas recetas cuentan los presentes por ingrediente.
+
+La clasificación en completas / casi_completas / incompletas es la misma que
+la de BipartiteDirectedGraph.buscar_recetas_por_ingredientes, en el mismo
+orden, pero sin normalizar nombres ni recorrer listas de vértices en cada
+consulta. Los resultados de las recetas sin ningún ingrediente disponible se
+precalculan y se comparten entre búsquedas, por lo que los resultados deben
+tratarse como de solo lectura.
+
+Después de editar unas pocas recetas, actualizado() crea la vista de la versión
+nueva a partir de la anterior sin volver a compilar todo: las recetas
+cambiadas se dan de baja en su posición y se agregan al final, y los
+ingredientes nuevos reciben los bits siguientes. Los resultados son los mismos
+que los de una compilación desde cero salvo el orden entre recetas con igual
+score, que sigue el orden de la vista (las recetas cambiadas van al final).
+"""
+
+from collections import Counter
+from itertools import compress, islice
+from typing import Dict, List, Optional, Set, Tuple
+
+from platos.algoritmos.grafoBusquedaReceta import (
+    crear_resultado_receta,
+    categoria_por_ratio,
+    paginar_resultados,
+)
+
+
+class RecetaCompilada:
+    """Datos precalculados de una receta para la clasificación con bitsets."""
+
+    __slots__ = ('nombre', 'mascara', 'total', 'ingredientes', 'repetidos', 'resultado_vacio')
+
+    def __init__(self, nombre, mascara, ingredientes):
+        self.nombre = nombre
+        self.mascara = mascara
+        self.total = len(ingredientes)
+        # Tupla de (posición de bit, nombre original) en el orden de la receta,
+        # con repeticiones si la receta repite un ingrediente
+        self.ingredientes = ingredientes
+        # Con repeticiones, popcount de la máscara no cuenta todos los ingredientes
+        self.repetidos = mascara.bit_count() != self.total
+        # Resultado cuando no hay ningún ingrediente disponible. Se comparte entre
+        # búsquedas: los resultados son de solo lectura
+        self.resultado_vacio = crear_resultado_receta(nombre, self.total, 0, [n for _, n in ingredientes])
+
+
+class GrafoCompilado:
+    """
+    Vista de solo lectura de un grafo, compilada a máscaras de bits.
+
+    Se construye con BipartiteDirectedGraph.compilar() y deja de ser válida si
+    el grafo cambia (compilar() la reconstruye en ese caso, o la actualiza
+    desde la de la instantánea anterior).
+    """
+
+    # Más recetas cambiadas que esta fracción de las de la vista: compilar desde cero
+    FRACCION_ACTUALIZABLE = 0.125
+
+    def __init__(self, grafo):
+        """
+        Args:
+            grafo: Grafo con `recorrer_recetas()` (BipartiteDirectedGraph o GrafoCompacto)
+        """
+        necesarios = []
+        frecuencia = Counter()
+        # Mismo orden de recorrido que el grafo original
+        for nombre_receta, nombres_ingredientes in grafo.recorrer_recetas():
+            if not nombres_ingredientes:
+                continue
+            nombres = [(nombre.strip().lower(), nombre) for nombre in nombres_ingredientes]
+            necesarios.append((nombre_receta, nombres))
+            frecuencia.update({normalizado for normalizado, _ in nombres})
+
+        # Bits más bajos para los ingredientes más frecuentes
+        bits = {nombre: posicion for posicion, (nombre, _) in enumerate(frecuencia.most_common())}
+        recetas = []
+        for nombre_receta, nombres in necesarios:
+            ingredientes = tuple((bits[normalizado], original) for normalizado, original in nombres)
+            mascara = 0
+            for posicion, _ in ingredientes:
+                mascara |= 1 << posicion
+            recetas.append(RecetaCompilada(nombre_receta, mascara, ingredientes))
+        self._indexar(bits, recetas)
+
+    def _indexar(self, bits: Dict[str, int], recetas: List[RecetaCompilada]) -> None:
+        """Arma los índices de la vista a partir de los bits y las recetas (todas activas)."""
+        self.bits: Dict[str, int] = bits
+        self.recetas: List[RecetaCompilada] = recetas
+        # posición de bit --> índices (en self.recetas) de las recetas activas que lo usan
+        self.recetas_por_bit: List[List[int]] = [[] for _ in bits]
+        for indice, receta in enumerate(recetas):
+            for posicion in {posicion for posicion, _ in receta.ingredientes}:
+                self.recetas_por_bit[posicion].append(indice)
+        # nombre de receta --> índice de su entrada activa
+        self._indices: Dict[str, int] = {receta.nombre: indice for indice, receta in enumerate(recetas)}
+        self._vacios = [receta.resultado_vacio for receta in recetas]
+        # 1 si la receta de esa posición está activa (0: se cambió o quitó del grafo)
+        self._activas = bytearray(b'\x01') * len(recetas)
+        self._total_activas = len(recetas)
+        self._matriz = None
+
+    def admite_cambios(self, cantidad: int) -> bool:
+        """Si conviene actualizar esta vista (actualizado()) con `cantidad` recetas cambiadas."""
+        return cantidad <= max(64, self.FRACCION_ACTUALIZABLE * self._total_activas)
+
+    def actualizado(self, grafo, tocadas) -> Optional['GrafoCompilado']:
+        """
+        Vista compilada de una versión posterior del grafo, a partir de esta.
+
+        Costo: copias de listas planas O(R + I) (sin normalizar nombres ni
+        recorrer aristas), más O(grado) por cada receta cambiada y por los bits
+        que usa. Esta vista no cambia.
+
+        Args:
+            grafo: Grafo en la versión nueva (BipartiteDirectedGraph o GrafoFijado)
+            tocadas: Vértices de las recetas agregadas, quitadas o con aristas
+                cambiadas desde la versión de esta vista
+
+        Returns:
+            GrafoCompilado, o None si cambiaron demasiadas recetas y conviene
+            compilar desde cero
+        """
+        if not self.admite_cambios(len(tocadas)):
+            return None
+
+        nueva = GrafoCompilado.__new__(GrafoCompilado)
+        nueva.bits = dict(self.bits)
+        nueva.recetas = list(self.recetas)
+        nueva.recetas_por_bit = list(self.recetas_por_bit)
+        nueva._indices = dict(self._indices)
+        nueva._vacios = list(self._vacios)
+        nueva._activas = bytearray(self._activas)
+        nueva._total_activas = self._total_activas
+        nueva._matriz = None
+
+        # Copia al escribir de las listas de cada bit (las comparte con esta vista)
+        propias = set()
+
+        def recetas_del_bit(posicion):
+            if posicion not in propias:
+                nueva.recetas_por_bit[posicion] = list(nueva.recetas_por_bit[posicion])
+                propias.add(posicion)
+            return nueva.recetas_por_bit[posicion]
+
+        # Orden fijo (por nombre) para que la vista no dependa del orden del conjunto
+        tocadas = sorted(tocadas, key=lambda receta: receta.get_name())
+        for receta in tocadas:
+            indice = nueva._indices.pop(receta.get_name(), None)
+            if indice is not None:
+                for posicion in {posicion for posicion, _ in nueva.recetas[indice].ingredientes}:
+                    recetas_del_bit(posicion).remove(indice)
+                nueva._activas[indice] = 0
+                nueva._total_activas -= 1
+
+        for receta in tocadas:
+            if receta not in grafo.recetas:
+                continue
+            nombres = [ingrediente.get_name() for ingrediente in grafo.get_ingredientes_por_receta(receta)]
+            if not nombres:
+                continue
+            ingredientes = []
+            mascara = 0
+            for nombre in nombres:
+                normalizado = nombre.strip().lower()
+                posicion = nueva.bits.get(normalizado)
+                if posicion is None:
+                    posicion = nueva.bits[normalizado] = len(nueva.recetas_por_bit)
+                    nueva.recetas_por_bit.append([])
+                    propias.add(posicion)
+                ingredientes.append((posicion, nombre))
+                mascara |= 1 << posicion
+            indice = len(nueva.recetas)
+            compilada = RecetaCompilada(receta.get_name(), mascara, tuple(ingredientes))
+            for posicion in {posicion for posicion, _ in compilada.ingredientes}:
+                recetas_del_bit(posicion).append(indice)
+            nueva.recetas.append(compilada)
+            nueva._indices[compilada.nombre] = indice
+            nueva._vacios.append(compilada.resultado_vacio)
+            nueva._activas.append(1)
+            nueva._total_activas += 1
+
+        # Con más bajas que recetas activas, se compacta (sin volver a normalizar)
+        if len(nueva.recetas) - nueva._total_activas > nueva._total_activas:
+            return nueva._compactada()
+        return nueva
+
+    def _compactada(self) -> 'GrafoCompilado':
+        """Copia con solo las recetas activas, en el mismo orden y con los mismos bits."""
+        compactada = GrafoCompilado.__new__(GrafoCompilado)
+        compactada._indexar(self.bits, list(compress(self.recetas, self._activas)))
+        return compactada
+
+    def mascara_despensa(self, ingredientes_disponibles: List[str]) -> int:
+        """Convierte una lista de nombres de ingredientes en una máscara."""
+        mascara = 0
+        for ingrediente in ingredientes_disponibles:
+            posicion = self.bits.get(ingrediente.strip().lower())
+            if posicion is not None:
+                mascara |= 1 << posicion
+        return mascara
+
+    @staticmethod
+    def posiciones_mascara(mascara: int) -> List[int]:
+        """Posiciones de los bits encendidos de una máscara, de menor a mayor."""
+        posiciones = []
+        while mascara:
+            bit = mascara & -mascara
+            posiciones.append(bit.bit_length() - 1)
+            mascara ^= bit
+        return posiciones
+
+    def posiciones_despensa(self, ingredientes_disponibles: List[str]) -> Set[int]:
+        """Convierte una lista de nombres de ingredientes en posiciones de bit."""
+        posiciones = set()
+        for ingrediente in ingredientes_disponibles:
+            posicion = self.bits.get(ingrediente.strip().lower())
+            if posicion is not None:
+                posiciones.add(posicion)
+        return posiciones
+
+    def matriz_incidencia(self):
+        """
+        Retorna la matriz de incidencia CSR (ver matrizIncidencia.py), construida una vez.
+
+        Sus filas son las recetas activas, en el orden de la vista.
+        """
+        if self._matriz is None:
+            from platos.algoritmos.matrizIncidencia import MatrizIncidencia
+            origen = self if self._total_activas == len(self.recetas) else self._compactada()
+            self._matriz = MatrizIncidencia(origen)
+        return self._matriz
+
+    def puntuar_lote(self, despensas: List[List[str]], usar_numpy: bool = None):
+        """
+        Ratios de todas las recetas para un lote de despensas, en un solo producto.
+
+        Args:
+            despensas (List[List[str]]): Ingredientes disponibles de cada despensa
+            usar_numpy (bool): None para usar NumPy si está instalado; False
+                fuerza el camino en Python puro
+
+        Returns:
+            Tuple: (nombres de las recetas, ratios recetas x despensas); ver
+            MatrizIncidencia.ratios
+        """
+        matriz = self.matriz_incidencia()
+        posiciones = [self.posiciones_despensa(despensa) for despensa in despensas]
+        return matriz.nombres_recetas, matriz.ratios(posiciones, usar_numpy=usar_numpy)
+
+    def buscar_recetas_por_ingredientes(self,
+                                        ingredientes_disponibles: List[str],
+                                        umbral_casi_completa: float = 0.75,
+                                        incluir_sin_coincidencias: bool = True,
+                                        limite: Optional[int] = None,
+                                        desplazamiento: int = 0,
+                                        top_k: Optional[int] = None,
+                                        totales: Optional[Dict[str, int]] = None) -> Dict:
+        """
+        Igual que BipartiteDirectedGraph.buscar_recetas_por_ingredientes, con bitsets.
+
+        Con incluir_sin_coincidencias=False se omiten las recetas sin ningún
+        ingrediente disponible (como BipartiteDirectedGraph.buscar_recetas_candidatas).
+        limite, desplazamiento, top_k y totales funcionan como en paginar_resultados.
+
+        Returns:
+            Dict: Diccionario con claves 'completas', 'casi_completas', 'incompletas'
+        """
+        return self._clasificar(self.mascara_despensa(ingredientes_disponibles),
+                                umbral_casi_completa, incluir_sin_coincidencias,
+                                limite, desplazamiento, top_k, totales)
+
+    def buscar_lote(self, consultas: List[Tuple[List[str], float, bool]]) -> List[Dict]:
+        """
+        Ejecuta varias búsquedas sobre esta misma vista compilada.
+
+        Cada nombre de ingrediente distinto del lote se normaliza una sola vez,
+        y las consultas con la misma despensa (en cualquier orden) y el mismo
+        umbral comparten el resultado.
+
+        Args:
+            consultas: Lista de (ingredientes_disponibles, umbral_casi_completa,
+                incluir_sin_coincidencias)
+
+        Returns:
+            List[Dict]: Un resultado por consulta, en el mismo orden
+        """
+        bits_por_nombre = {}
+        resultados_por_clave = {}
+        resultados = []
+        for ingredientes_disponibles, umbral_casi_completa, incluir in consultas:
+            despensa = 0
+            for ingrediente in ingredientes_disponibles:
+                if ingrediente not in bits_por_nombre:
+                    posicion = self.bits.get(ingrediente.strip().lower())
+                    bits_por_nombre[ingrediente] = 0 if posicion is None else 1 << posicion
+                despensa |= bits_por_nombre[ingrediente]
+
+            clave = (despensa, umbral_casi_completa, incluir)
+            if clave not in resultados_por_clave:
+                resultados_por_clave[clave] = self._clasificar(despensa, umbral_casi_completa, incluir)
+            resultados.append(resultados_por_clave[clave])
+        return resultados
+
+    def clasificar(self, despensa: int, umbral_casi_completa: float = 0.75,
+                   incluir_sin_coincidencias: bool = True) -> Dict:
+        """Clasifica todas las recetas para una despensa ya convertida a máscara."""
+        return self._clasificar(despensa, umbral_casi_completa, incluir_sin_coincidencias)
+
+    def _clasificar(self, despensa: int, umbral_casi_completa: float,
+                    incluir_sin_coincidencias: bool = True,
+                    limite: Optional[int] = None,
+                    desplazamiento: int = 0,
+                    top_k: Optional[int] = None,
+                    totales: Optional[Dict[str, int]] = None) -> Dict:
+        resultados = {
+            'completas': [],
+            'casi_completas': [],
+            'incompletas': []
+        }
+
+        candidatas = set()
+        for posicion in self.posiciones_mascara(despensa):
+            candidatas.update(self.recetas_por_bit[posicion])
+
+        for indice in sorted(candidatas):
+            receta = self.recetas[indice]
+            comunes = receta.mascara & despensa
+            # Los bits de receta & ~despensa son los de la receta fuera de
+            # `comunes`, que suele tener uno o pocos bits: se comparan las
+            # posiciones con esos en vez de desplazar la máscara (un entero
+            # grande) por cada ingrediente
+            if comunes == receta.mascara:
+                faltantes = []
+            elif not comunes & (comunes - 1):
+                en_despensa = comunes.bit_length() - 1
+                faltantes = [nombre for posicion, nombre in receta.ingredientes if posicion != en_despensa]
+            else:
+                en_despensa = self.posiciones_mascara(comunes)
+                faltantes = [nombre for posicion, nombre in receta.ingredientes if posicion not in en_despensa]
+            if receta.repetidos:
+                presentes = receta.total - len(faltantes)
+            else:
+                presentes = comunes.bit_count()
+            resultados[categoria_por_ratio(presentes / receta.total, umbral_casi_completa)].append(
+                crear_resultado_receta(receta.nombre, receta.total, presentes, faltantes)
+            )
+
+        return self._paginar(resultados, candidatas, umbral_casi_completa, incluir_sin_coincidencias,
+                             limite, desplazamiento, top_k, totales)
+
+    def _paginar(self, resultados: Dict, candidatas: Set[int], umbral_casi_completa: float,
+                 incluir_sin_coincidencias: bool, limite: Optional[int], desplazamiento: int,
+                 top_k: Optional[int], totales: Optional[Dict[str, int]]) -> Dict:
+        """Recorta los resultados de las candidatas, agregando las recetas sin coincidencias."""
+        colas = None
+        if incluir_sin_coincidencias:
+            # Las recetas sin ningún ingrediente disponible tienen score 0 (el
+            # mínimo), así que van al final de su categoría en orden de
+            # recorrido, igual que con el ordenamiento estable. Solo se
+            # materializan las que entran en el recorte
+            colas = {categoria_por_ratio(0.0, umbral_casi_completa):
+                     (self._total_activas - len(candidatas),
+                      lambda cantidad: self._sin_coincidencias(candidatas, cantidad))}
+
+        return paginar_resultados(resultados, limite, desplazamiento, top_k, totales, colas)
+
+    def _sin_coincidencias(self, candidatas: Set[int], cantidad: int) -> List[Dict]:
+        """Las primeras `cantidad` recetas activas que no están entre las candidatas."""
+        marcas = bytearray(self._activas)
+        for indice in candidatas:
+            marcas[indice] = 0
+        return list(islice(compress(self._vacios, marcas), cantidad))
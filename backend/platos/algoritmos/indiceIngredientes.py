@@ -0,0 +1,287 @@
+"""
+Índice invertido de ingredientes para la búsqueda de platos de SmartMeal.
+
+Estructura:
+- Vocabulario: ingredientes distintos (en minúsculas) de los platos disponibles
+- Postings: para cada entrada del vocabulario, los platos que la usan y la
+  posición del ingrediente dentro del plato
+
+Búsqueda:
+1. Cada ingrediente buscado se resuelve a las entradas del vocabulario que
+   coinciden con él (misma regla flexible de siempre, ver `coincide_flexible`)
+   usando un índice de trigramas sobre las palabras del vocabulario, sin
+   recorrer el vocabulario completo. El resultado se memoriza por término.
+2. Solo se puntúan los platos que aparecen en los postings de esas entradas.
+
+El resultado es el mismo que el recorrido original sobre todos los platos,
+ingredientes, términos y palabras.
+"""
+
+import heapq
+import logging
+from collections import defaultdict
+
+from platos.algoritmos.registro import obtener_logger
+
+logger = obtener_logger('indice')
+
+MAXIMO_TERMINOS_MEMORIZADOS = 4096
+LIMITE_RESULTADOS = 10
+
+
+def coincide_flexible(buscado, ingrediente):
+    """
+    Regla de coincidencia flexible entre un ingrediente buscado y uno del plato.
+
+    Coinciden si uno contiene al otro, o si alguna palabra de uno aparece
+    dentro del otro.
+
+    Args:
+        buscado (str): Ingrediente buscado, en minúsculas y sin espacios extremos
+        ingrediente (str): Ingrediente del plato, en minúsculas
+    """
+    return (buscado in ingrediente or
+            ingrediente in buscado or
+            any(palabra in ingrediente for palabra in buscado.split()) or
+            any(palabra in buscado for palabra in ingrediente.split()))
+
+
+def ingredientes_en_orden(terminos, ingrediente_por_termino):
+    """
+    Arma 'ingredientes_coincidentes' de un plato en el orden de la petición.
+
+    Args:
+        terminos (list): Términos normalizados de la petición, con repetidos
+        ingrediente_por_termino (dict): Ingrediente del plato que coincidió con cada término
+    """
+    return [ingrediente_por_termino[termino] for termino in terminos if termino in ingrediente_por_termino]
+
+
+class IndiceTrigramas:
+    """
+    Índice de n-gramas sobre un conjunto de palabras (sin espacios).
+
+    Indexa los trigramas de cada palabra, y también sus bigramas y caracteres
+    para poder resolver palabras buscadas de menos de tres letras.
+
+    Consultas:
+    - que_contienen(w): palabras del índice que contienen a w como subcadena.
+      Los candidatos salen de la intersección de las listas de trigramas de w
+      y luego se verifican.
+    - contenidas_en(w): palabras del índice que son subcadena de w. Se
+      enumeran las subcadenas de w y se buscan en un diccionario.
+
+    Ninguna de las dos recorre todas las palabras.
+    """
+
+    def __init__(self, palabras):
+        self.palabras = list(palabras)
+        self._id_palabra = {palabra: i for i, palabra in enumerate(self.palabras)}
+        self._ngramas = defaultdict(set)
+        for i, palabra in enumerate(self.palabras):
+            for n in (1, 2, 3):
+                for inicio in range(len(palabra) - n + 1):
+                    self._ngramas[palabra[inicio:inicio + n]].add(i)
+
+    def que_contienen(self, palabra):
+        if len(palabra) <= 3:
+            # Los n-gramas de hasta 3 letras están indexados tal cual
+            return set(self._ngramas.get(palabra, ()))
+        listas = []
+        for inicio in range(len(palabra) - 2):
+            lista = self._ngramas.get(palabra[inicio:inicio + 3])
+            if not lista:
+                return set()
+            listas.append(lista)
+        listas.sort(key=len)
+        candidatos = set(listas[0]).intersection(*listas[1:])
+        return {i for i in candidatos if palabra in self.palabras[i]}
+
+    def contenidas_en(self, palabra):
+        encontradas = set()
+        for inicio in range(len(palabra)):
+            for fin in range(inicio + 1, len(palabra) + 1):
+                i = self._id_palabra.get(palabra[inicio:fin])
+                if i is not None:
+                    encontradas.add(i)
+        return encontradas
+
+
+class IndiceInvertidoPlatos:
+    """Índice invertido ingrediente --> platos, construido una vez por versión del catálogo."""
+
+    def __init__(self, platos_db):
+        """
+        Args:
+            platos_db (list): Lista de platos (dicts) como en platos_database.json
+        """
+        self.platos = []
+        self.ingredientes_por_plato = []
+        self.vocabulario = []
+        self.postings = []
+        self._id_vocabulario = {}
+        self._terminos = {}
+
+        for plato in platos_db:
+            if not plato.get('disponible', True):
+                continue  # Los platos no disponibles nunca se devuelven
+            indice_plato = len(self.platos)
+            ingredientes = [ing.lower() for ing in plato.get('ingredientes', [])]
+            self.platos.append(plato)
+            self.ingredientes_por_plato.append(ingredientes)
+
+            vistos = set()
+            for posicion, ingrediente in enumerate(ingredientes):
+                if ingrediente in vistos:
+                    continue  # Solo importa la primera aparición dentro del plato
+                vistos.add(ingrediente)
+                id_vocabulario = self._id_vocabulario.get(ingrediente)
+                if id_vocabulario is None:
+                    id_vocabulario = len(self.vocabulario)
+                    self._id_vocabulario[ingrediente] = id_vocabulario
+                    self.vocabulario.append(ingrediente)
+                    self.postings.append([])
+                self.postings[id_vocabulario].append((indice_plato, posicion))
+
+        # Palabras del vocabulario --> entradas que las contienen
+        self._entradas_por_palabra = defaultdict(set)
+        self._entradas_sin_palabras = []
+        for id_vocabulario, ingrediente in enumerate(self.vocabulario):
+            palabras = ingrediente.split()
+            if not palabras:
+                self._entradas_sin_palabras.append(id_vocabulario)
+            for palabra in palabras:
+                self._entradas_por_palabra[palabra].add(id_vocabulario)
+        self._palabras = list(self._entradas_por_palabra)
+        self._trigramas = IndiceTrigramas(self._palabras)
+
+        logger.debug("Índice construido: %d platos, %d ingredientes distintos, %d palabras",
+                     len(self.platos), len(self.vocabulario), len(self._palabras))
+
+    def entradas_coincidentes(self, termino):
+        """
+        Retorna los ids del vocabulario que coinciden con un término normalizado.
+
+        Args:
+            termino (str): Ingrediente buscado, en minúsculas y sin espacios extremos
+        """
+        entradas = self._terminos.get(termino)
+        if entradas is None:
+            entradas = self._resolver_termino(termino)
+            if len(self._terminos) >= MAXIMO_TERMINOS_MEMORIZADOS:
+                self._terminos.clear()
+            self._terminos[termino] = entradas
+        return entradas
+
+    def _resolver_termino(self, termino):
+        """
+        Resuelve un término con el índice de trigramas.
+
+        Para un término con al menos una palabra y un ingrediente con al menos una
+        palabra, `coincide_flexible` equivale a: alguna palabra del término es
+        subcadena de alguna palabra del ingrediente, o al revés (una subcadena sin
+        espacios siempre cae dentro de una sola palabra). Los casos sin palabras
+        (término vacío, ingrediente vacío) se evalúan directamente.
+        """
+        palabras_termino = set(termino.split())
+        if not palabras_termino:
+            return tuple(
+                id_vocabulario for id_vocabulario, ingrediente in enumerate(self.vocabulario)
+                if coincide_flexible(termino, ingrediente)
+            )
+
+        entradas = set()
+        for palabra in palabras_termino:
+            for i in self._trigramas.que_contienen(palabra) | self._trigramas.contenidas_en(palabra):
+                entradas |= self._entradas_por_palabra[self._palabras[i]]
+        for id_vocabulario in self._entradas_sin_palabras:
+            if coincide_flexible(termino, self.vocabulario[id_vocabulario]):
+                entradas.add(id_vocabulario)
+        return tuple(sorted(entradas))
+
+    def buscar(self, ingredientes_buscados, limite=LIMITE_RESULTADOS):
+        """
+        Busca los platos que coinciden con los ingredientes buscados.
+
+        Args:
+            ingredientes_buscados (list): Ingredientes tal como llegan en la petición
+            limite (int): Cantidad máxima de platos a retornar
+
+        Returns:
+            list: Platos ordenados por score de relevancia y luego por coincidencias
+                  (a igualdad, en el orden del archivo)
+        """
+        return [resultado for resultado, _ in self.buscar_con_terminos(ingredientes_buscados, limite)]
+
+    def buscar_con_terminos(self, ingredientes_buscados, limite=LIMITE_RESULTADOS):
+        """
+        Igual que buscar(), pero junto a cada plato retorna qué ingrediente suyo
+        coincidió con cada término.
+
+        Los puntajes solo dependen de cuántas veces se pide cada término, no del
+        orden; con ese diccionario y ingredientes_en_orden() se rehace
+        'ingredientes_coincidentes' para otra petición con los mismos términos.
+
+        Returns:
+            list: Tuplas (resultado, {término normalizado: ingrediente del plato})
+        """
+        terminos = [ing_buscado.lower().strip() for ing_buscado in ingredientes_buscados]
+        # Un término repetido cuenta una coincidencia por cada vez que se pide
+        multiplicidad = defaultdict(int)
+        for termino in terminos:
+            multiplicidad[termino] += 1
+
+        encontrados_por_plato = {}
+        for termino in multiplicidad:
+            # Para cada plato, el primer ingrediente (en orden del plato) que coincide
+            primera_posicion = {}
+            for id_vocabulario in self.entradas_coincidentes(termino):
+                for indice_plato, posicion in self.postings[id_vocabulario]:
+                    if posicion < primera_posicion.get(indice_plato, posicion + 1):
+                        primera_posicion[indice_plato] = posicion
+            for indice_plato, posicion in primera_posicion.items():
+                encontrados_por_plato.setdefault(indice_plato, {})[termino] = (
+                    self.ingredientes_por_plato[indice_plato][posicion]
+                )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Búsqueda %s: %d platos candidatos", ingredientes_buscados, len(encontrados_por_plato))
+
+        total_buscados = len(terminos)
+        candidatos = []
+        for indice_plato in sorted(encontrados_por_plato):
+            plato = self.platos[indice_plato]
+            coincidencias = sum(multiplicidad[termino] for termino in encontrados_por_plato[indice_plato])
+            score_relevancia = round((coincidencias / total_buscados) * plato.get('puntuacion', 4.0), 2)
+            candidatos.append((score_relevancia, coincidencias, indice_plato))
+
+        # nlargest es estable: a igual llave conserva el orden del archivo
+        mejores = heapq.nlargest(limite, candidatos, key=lambda c: (c[0], c[1]))
+        return [
+            (self._resultado(self.platos[indice_plato],
+                             ingredientes_en_orden(terminos, encontrados_por_plato[indice_plato]),
+                             score_relevancia, total_buscados),
+             encontrados_por_plato[indice_plato])
+            for score_relevancia, _, indice_plato in mejores
+        ]
+
+    @staticmethod
+    def _resultado(plato, ingredientes_encontrados, score_relevancia, total_buscados):
+        coincidencias = len(ingredientes_encontrados)
+        return {
+            "id": plato["id"],
+            "nombre": plato["nombre"],
+            "descripcion": plato["descripcion"],
+            "categoria": plato.get("categoria", ""),
+            "tipo": plato.get("tipo", ""),
+            "imagen": plato.get("imagen", ""),
+            "precio": plato.get("precio", 0),
+            "puntuacion": plato.get("puntuacion", 4.0),
+            "tiempo_preparacion": plato.get("tiempo_preparacion", ""),
+            "calorias": plato.get("calorias", 0),
+            "ingredientes_coincidentes": ingredientes_encontrados,
+            "total_coincidencias": coincidencias,
+            "score_relevancia": score_relevancia,
+            "ingredientes_completos": plato.get("ingredientes", []),
+            "porcentaje_coincidencia": round((coincidencias / total_buscados) * 100, 2)
+        }
@@ -0,0 +1,641 @@
+"""
+Instantánea binaria en disco del grafo de recetas (GrafoCompacto).
+
+Permite que un proceso nuevo cargue el grafo en milisegundos en lugar de
+reconstruirlo. La instantánea guarda la huella (SHA-256) del JSON de platos
+del que salió: si el JSON cambió, la instantánea no se usa.
+
+Formato (versión 2, enteros little-endian de 32 bits):
+
+    encabezado   mágico "SMGRAFO\\0", versión, huella SHA-256, cantidades de
+                 ingredientes (I), recetas (R), aristas (E), bits (B) y
+                 entradas de las listas por bit (P), tamaño de la tabla de
+                 nombres y CRC-32 del cuerpo
+    cuerpo       inicio_ingredientes (R + 1) | ingredientes_de (E)
+                 inicio_recetas (I + 1)      | recetas_de (E)
+                 inicio_nombres (I + R + 1)
+                 orden_ingredientes (I) | orden_recetas (R)
+                 orden_ingredientes_minusculas (I) | orden_recetas_minusculas (R)
+                 orden_ingredientes_normalizados (I)
+                 bit_de_ingrediente (I) | inicio_por_bit (B + 1) | recetas_por_bit (P)
+                 nombres (UTF-8, primero los ingredientes y luego las recetas)
+
+- Los orden_* son los ids ordenados por nombre (exacto, en minúsculas o
+  normalizado; a igual nombre, por id): reemplazan a los diccionarios por
+  nombre con búsquedas binarias sobre la tabla de nombres.
+- bit_de_ingrediente, inicio_por_bit y recetas_por_bit son la forma compilada
+  (ver grafoCompilado.py): la posición de bit de cada ingrediente (-1 si
+  ninguna receta lo usa) y, en CSR, las recetas que usan cada bit.
+
+Los arreglos van antes que los nombres para quedar alineados a 4 bytes, de
+modo que se pueden leer sin copiar (memoryview.cast('i')).
+
+Hay dos formas de abrirla:
+- cargar_instantanea: copia los arreglos y los nombres a memoria del proceso.
+- abrir_instantanea: mapea el archivo (mmap de solo lectura) y consulta todo
+  desde él: las aristas, la tabla de nombres, los índices por nombre y la
+  forma compilada que usa grafo/buscar/ (CompiladoMapeado). Varios procesos
+  (workers de gunicorn) que abren la misma instantánea comparten las mismas
+  páginas físicas de la caché del sistema operativo; cada uno guarda solo
+  objetos de tamaño fijo y lo que calcula por consulta.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from platos.algoritmos.grafoBusquedaReceta import crear_resultado_receta, categoria_por_ratio
+from platos.algoritmos.grafoCompacto import GrafoCompacto
+from platos.algoritmos.grafoCompilado import GrafoCompilado
+from platos.algoritmos.registro import obtener_logger, medir
+
+logger = obtener_logger('grafo')
+
+MAGICO = b'SMGRAFO\x00'
+VERSION_FORMATO = 2
+# mágico, versión, huella, ingredientes, recetas, aristas, bits, entradas por bit,
+# bytes de nombres, crc, reservado
+ENCABEZADO = struct.Struct('<8sI32sIIIIIIII')
+
+
+class InstantaneaInvalida(ValueError):
+    """La instantánea no existe, está dañada, es de otro formato o de otro JSON."""
+
+
+@dataclass(frozen=True)
+class EncabezadoInstantanea:
+    version: int
+    huella: str
+    ingredientes: int
+    recetas: int
+    aristas: int
+    bits: int
+    entradas_bits: int
+    tamanio_nombres: int
+    crc: int
+
+    @property
+    def tamanios_enteros(self):
+        """Cantidad de enteros de cada arreglo del cuerpo, en el orden del archivo."""
+        i, r = self.ingredientes, self.recetas
+        return (r + 1, self.aristas, i + 1, self.aristas, i + r + 1,
+                i, r, i, r, i,
+                i, self.bits + 1, self.entradas_bits)
+
+    @property
+    def tamanio_cuerpo(self):
+        return sum(self.tamanios_enteros) * 4 + self.tamanio_nombres
+
+
+@dataclass(frozen=True)
+class SeccionesInstantanea:
+    """Vistas sin copia del cuerpo de una instantánea (ver secciones())."""
+    inicio_ingredientes: memoryview
+    ingredientes_de: memoryview
+    inicio_recetas: memoryview
+    recetas_de: memoryview
+    inicio_nombres: memoryview
+    orden_ingredientes: memoryview
+    orden_recetas: memoryview
+    orden_ingredientes_minusculas: memoryview
+    orden_recetas_minusculas: memoryview
+    orden_ingredientes_normalizados: memoryview
+    bit_de_ingrediente: memoryview
+    inicio_por_bit: memoryview
+    recetas_por_bit: memoryview
+    nombres: memoryview
+
+
+def huella_contenido(contenido: bytes) -> str:
+    """Huella (SHA-256 en hexadecimal) del contenido del JSON de platos."""
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def huella_archivo(ruta) -> str:
+    """Huella del archivo JSON de platos."""
+    with open(ruta, 'rb') as archivo:
+        return huella_contenido(archivo.read())
+
+
+def _a_little_endian(arreglo: array) -> bytes:
+    if sys.byteorder == 'big':
+        arreglo = array('i', arreglo)
+        arreglo.byteswap()
+    return arreglo.tobytes()
+
+
+def _desde_little_endian(seccion) -> array:
+    arreglo = array('i')
+    arreglo.frombytes(seccion.cast('B'))
+    if sys.byteorder == 'big':
+        arreglo.byteswap()
+    return arreglo
+
+
+def normalizar_nombre(nombre: str) -> str:
+    """Nombre normalizado de un ingrediente, como en las búsquedas del grafo."""
+    return nombre.strip().lower()
+
+
+def _orden_por_nombre(nombres, clave=None) -> array:
+    """Ids ordenados por clave(nombre) y, a igual clave, por id."""
+    claves = list(nombres) if clave is None else [clave(nombre) for nombre in nombres]
+    return array('i', sorted(range(len(claves)), key=lambda k: (claves[k], k)))
+
+
+def _forma_compilada(grafo: GrafoCompacto):
+    """
+    Bit de cada ingrediente y recetas de cada bit (en CSR, con ids de receta),
+    con la misma asignación de bits que GrafoCompilado.
+    """
+    compilado = grafo.compilar()
+    # La vista compilada omite las recetas sin ingredientes, en orden de id
+    inicio = grafo.inicio_ingredientes
+    ids_receta = [r for r in range(len(grafo.nombres_recetas)) if inicio[r] != inicio[r + 1]]
+    bit_de_ingrediente = array('i', (compilado.bits.get(normalizar_nombre(nombre), -1)
+                                     for nombre in grafo.nombres_ingredientes))
+    inicio_por_bit = array('i', [0])
+    recetas_por_bit = array('i')
+    for indices in compilado.recetas_por_bit:
+        recetas_por_bit.extend(ids_receta[indice] for indice in indices)
+        inicio_por_bit.append(len(recetas_por_bit))
+    return bit_de_ingrediente, inicio_por_bit, recetas_por_bit
+
+
+def guardar_instantanea(grafo, ruta, huella: str) -> EncabezadoInstantanea:
+    """
+    Escribe la instantánea del grafo (de forma atómica: archivo temporal y rename).
+
+    Args:
+        grafo: GrafoCompacto, o BipartiteDirectedGraph (se convierte)
+        ruta: Archivo de destino
+        huella (str): Huella del JSON de origen (ver huella_contenido)
+    """
+    if not isinstance(grafo, GrafoCompacto):
+        grafo = GrafoCompacto.desde_grafo(grafo)
+
+    nombres_ingredientes = list(grafo.nombres_ingredientes)
+    nombres_recetas = list(grafo.nombres_recetas)
+    nombres = [nombre.encode('utf-8') for nombre in nombres_ingredientes]
+    nombres += [nombre.encode('utf-8') for nombre in nombres_recetas]
+    inicio_nombres = array('i', [0])
+    for nombre in nombres:
+        inicio_nombres.append(inicio_nombres[-1] + len(nombre))
+    bit_de_ingrediente, inicio_por_bit, recetas_por_bit = _forma_compilada(grafo)
+
+    arreglos = [
+        array('i', grafo.inicio_ingredientes),
+        array('i', grafo.ingredientes_de),
+        array('i', grafo.inicio_recetas),
+        array('i', grafo.recetas_de),
+        inicio_nombres,
+        _orden_por_nombre(nombres_ingredientes),
+        _orden_por_nombre(nombres_recetas),
+        _orden_por_nombre(nombres_ingredientes, str.lower),
+        _orden_por_nombre(nombres_recetas, str.lower),
+        _orden_por_nombre(nombres_ingredientes, normalizar_nombre),
+        bit_de_ingrediente,
+        inicio_por_bit,
+        recetas_por_bit,
+    ]
+    partes = [_a_little_endian(arreglo) for arreglo in arreglos] + [b''.join(nombres)]
+    crc = 0
+    for parte in partes:
+        crc = zlib.crc32(parte, crc)
+
+    encabezado = EncabezadoInstantanea(
+        VERSION_FORMATO, huella, len(nombres_ingredientes), len(nombres_recetas),
+        len(grafo.ingredientes_de), len(inicio_por_bit) - 1, len(recetas_por_bit), len(partes[-1]), crc,
+    )
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(prefix='.grafo-', dir=directorio)
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(ENCABEZADO.pack(
+                MAGICO, VERSION_FORMATO, bytes.fromhex(huella), encabezado.ingredientes,
+                encabezado.recetas, encabezado.aristas, encabezado.bits, encabezado.entradas_bits,
+                encabezado.tamanio_nombres, crc, 0,
+            ))
+            for parte in partes:
+                archivo.write(parte)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+        raise
+    logger.info("Instantánea del grafo guardada en %s (%d recetas, %d aristas)",
+                ruta, encabezado.recetas, encabezado.aristas)
+    return encabezado
+
+
+def _desempaquetar(datos) -> EncabezadoInstantanea:
+    if len(datos) < ENCABEZADO.size:
+        raise InstantaneaInvalida("Instantánea truncada")
+    magico, version, huella, ingredientes, recetas, aristas, bits, entradas_bits, tamanio_nombres, crc, _ = \
+        ENCABEZADO.unpack_from(datos, 0)
+    if magico != MAGICO:
+        raise InstantaneaInvalida("El archivo no es una instantánea del grafo")
+    if version != VERSION_FORMATO:
+        raise InstantaneaInvalida(f"Versión de instantánea {version} no soportada (se esperaba {VERSION_FORMATO})")
+    return EncabezadoInstantanea(version, huella.hex(), ingredientes, recetas, aristas, bits, entradas_bits,
+                                 tamanio_nombres, crc)
+
+
+def leer_encabezado_bytes(datos) -> EncabezadoInstantanea:
+    """
+    Valida y lee el encabezado de una instantánea completa en memoria (bytes o mmap).
+
+    Raises:
+        InstantaneaInvalida: Si no es una instantánea de este formato o está truncada
+    """
+    encabezado = _desempaquetar(datos)
+    if len(datos) != ENCABEZADO.size + encabezado.tamanio_cuerpo:
+        raise InstantaneaInvalida("Instantánea truncada o con datos de más")
+    return encabezado
+
+
+def leer_encabezado(ruta) -> EncabezadoInstantanea:
+    """Lee y valida el encabezado de una instantánea en disco, sin leer el cuerpo."""
+    with open(ruta, 'rb') as archivo:
+        encabezado = _desempaquetar(archivo.read(ENCABEZADO.size))
+    if os.path.getsize(ruta) != ENCABEZADO.size + encabezado.tamanio_cuerpo:
+        raise InstantaneaInvalida("Instantánea truncada o con datos de más")
+    return encabezado
+
+
+def verificar_cuerpo(datos, encabezado: EncabezadoInstantanea) -> None:
+    """Compara el CRC-32 del cuerpo con el del encabezado."""
+    with memoryview(datos) as vista:
+        if zlib.crc32(vista[ENCABEZADO.size:]) != encabezado.crc:
+            raise InstantaneaInvalida("La instantánea está dañada (CRC distinto)")
+
+
+def secciones(datos, encabezado: EncabezadoInstantanea, verificar_crc=True) -> SeccionesInstantanea:
+    """
+    Divide el cuerpo de la instantánea en vistas sin copia.
+
+    Las vistas de enteros están en el orden de bytes del archivo (little-endian),
+    así que solo se pueden usar tal cual en plataformas little-endian.
+
+    Returns:
+        SeccionesInstantanea: los arreglos como memoryview de enteros ('i') y
+        nombres como memoryview de bytes
+    """
+    if verificar_crc:
+        verificar_cuerpo(datos, encabezado)
+    vista = memoryview(datos)[ENCABEZADO.size:]
+
+    resultado = []
+    desplazamiento = 0
+    for cantidad in encabezado.tamanios_enteros:
+        resultado.append(vista[desplazamiento:desplazamiento + cantidad * 4].cast('i'))
+        desplazamiento += cantidad * 4
+    resultado.append(vista[desplazamiento:])
+    return SeccionesInstantanea(*resultado)
+
+
+def decodificar_nombres(inicio_nombres, nombres, desde, hasta):
+    """Lista de nombres [desde, hasta) de la tabla de nombres."""
+    return [bytes(nombres[inicio_nombres[k]:inicio_nombres[k + 1]]).decode('utf-8') for k in range(desde, hasta)]
+
+
+def cargar_instantanea(ruta, huella: str = None) -> GrafoCompacto:
+    """
+    Carga una instantánea en memoria (los arreglos se copian a array('i')).
+
+    Args:
+        ruta: Archivo de la instantánea
+        huella (str): Huella esperada del JSON de origen; None para no verificarla
+
+    Raises:
+        InstantaneaInvalida: Si falta, está dañada o es de otro JSON
+    """
+    try:
+        with open(ruta, 'rb') as archivo:
+            datos = archivo.read()
+    except OSError as error:
+        raise InstantaneaInvalida(f"No se pudo leer la instantánea {ruta}: {error}")
+
+    with medir('grafo.instantanea_carga'):
+        encabezado = leer_encabezado_bytes(datos)
+        if huella is not None and encabezado.huella != huella:
+            raise InstantaneaInvalida("La instantánea corresponde a otro JSON de platos")
+        partes = secciones(datos, encabezado)
+        # Solo las aristas y los nombres: los índices y la forma compilada se
+        # rehacen en memoria, como con un grafo construido
+        arreglos = [_desde_little_endian(seccion) for seccion in
+                    (partes.inicio_ingredientes, partes.ingredientes_de, partes.inicio_recetas,
+                     partes.recetas_de, partes.inicio_nombres)]
+        inicio_nombres = arreglos.pop()
+        total_ingredientes = encabezado.ingredientes
+        grafo = GrafoCompacto(
+            decodificar_nombres(inicio_nombres, partes.nombres, 0, total_ingredientes),
+            decodificar_nombres(inicio_nombres, partes.nombres, total_ingredientes,
+                                total_ingredientes + encabezado.recetas),
+            *arreglos
+        )
+    logger.debug("Instantánea del grafo cargada desde %s", ruta)
+    return grafo
+
+
+class TablaNombres(Sequence):
+    """Nombres [desde, desde + cantidad) de la tabla mapeada; se decodifican al pedirlos."""
+
+    def __init__(self, inicio_nombres, nombres, desde: int, cantidad: int):
+        self._inicio = inicio_nombres
+        self._nombres = nombres
+        self._desde = desde
+        self._cantidad = cantidad
+
+    def __len__(self):
+        return self._cantidad
+
+    def __getitem__(self, k):
+        if not 0 <= k < self._cantidad:
+            raise IndexError(k)
+        j = self._desde + k
+        return str(self._nombres[self._inicio[j]:self._inicio[j + 1]], 'utf-8')
+
+    def __iter__(self):
+        inicio, nombres = self._inicio, self._nombres
+        for j in range(self._desde, self._desde + self._cantidad):
+            yield str(nombres[inicio[j]:inicio[j + 1]], 'utf-8')
+
+
+class IndiceNombres(Mapping):
+    """
+    {clave(nombre): id} por búsqueda binaria sobre una tabla de nombres.
+
+    `orden` son los ids ordenados por (clave(nombre), id), así que a igual
+    clave se obtiene el id menor (como setdefault al recorrer en orden).
+    """
+
+    def __init__(self, tabla: Sequence, orden, clave=None):
+        self._tabla = tabla
+        self._orden = orden
+        self._clave = clave
+
+    def _clave_de(self, id_nombre):
+        nombre = self._tabla[id_nombre]
+        return nombre if self._clave is None else self._clave(nombre)
+
+    def _rango(self, clave):
+        if not isinstance(clave, str):
+            return 0, 0
+        desde = bisect_left(self._orden, clave, key=self._clave_de)
+        if desde == len(self._orden) or self._clave_de(self._orden[desde]) != clave:
+            return desde, desde
+        return desde, bisect_right(self._orden, clave, lo=desde, key=self._clave_de)
+
+    def __getitem__(self, clave):
+        desde, hasta = self._rango(clave)
+        if desde == hasta:
+            raise KeyError(clave)
+        return self._orden[desde]
+
+    def __contains__(self, clave):
+        desde, hasta = self._rango(clave)
+        return desde != hasta
+
+    def __iter__(self):
+        anterior = None
+        for id_nombre in self._orden:
+            clave = self._clave_de(id_nombre)
+            if clave != anterior:
+                yield clave
+                anterior = clave
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class IndiceNombresMultiple(IndiceNombres):
+    """Como IndiceNombres, pero cada clave da la lista de todos sus ids (en orden de id)."""
+
+    def __getitem__(self, clave):
+        desde, hasta = self._rango(clave)
+        if desde == hasta:
+            raise KeyError(clave)
+        return self._orden[desde:hasta].tolist()
+
+
+class BitsMapeados(Mapping):
+    """{nombre normalizado: posición de bit} desde el índice normalizado y bit_de_ingrediente."""
+
+    def __init__(self, normalizados: IndiceNombresMultiple, bit_de_ingrediente, cantidad: int):
+        self._normalizados = normalizados
+        self._bit_de = bit_de_ingrediente
+        self._cantidad = cantidad
+
+    def __getitem__(self, nombre):
+        posicion = self._bit_de[self._normalizados[nombre][0]]
+        if posicion < 0:
+            raise KeyError(nombre)
+        return posicion
+
+    def __iter__(self):
+        return (nombre for nombre in self._normalizados if nombre in self)
+
+    def __len__(self):
+        return self._cantidad
+
+
+class ListasCSR(Sequence):
+    """Lista i-ésima de un par de arreglos CSR (vista sin copia)."""
+
+    def __init__(self, inicio, valores):
+        self._inicio = inicio
+        self._valores = valores
+
+    def __len__(self):
+        return len(self._inicio) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._valores[self._inicio[i]:self._inicio[i + 1]]
+
+
+class CompiladoMapeado(GrafoCompilado):
+    """
+    Forma compilada (ver grafoCompilado.py) leída de la instantánea mapeada.
+
+    Los bits de los ingredientes y las recetas de cada bit están en el
+    archivo, así que se comparten entre procesos. Los índices de receta son
+    los ids del grafo (las recetas sin ingredientes nunca son candidatas y se
+    saltan). Las máscaras de las recetas no se guardan, porque serían memoria
+    de cada proceso: los presentes se cuentan sobre los bits de la receta,
+    leídos del archivo. Los resultados son los mismos que los de GrafoCompilado.
+    """
+
+    def __init__(self, grafo: 'GrafoMapeado', bit_de_ingrediente, inicio_por_bit, recetas_por_bit,
+                 cantidad_bits: int):
+        self._grafo = grafo
+        self._bit_de = bit_de_ingrediente
+        self.bits = BitsMapeados(grafo._ingredientes_normalizados, bit_de_ingrediente, cantidad_bits)
+        self.recetas_por_bit = ListasCSR(inicio_por_bit, recetas_por_bit)
+        inicio = grafo.inicio_ingredientes
+        self._total_activas = sum(1 for r in range(len(inicio) - 1) if inicio[r] != inicio[r + 1])
+        self._en_memoria = None
+        self._lock_en_memoria = threading.Lock()
+
+    def admite_cambios(self, cantidad: int) -> bool:
+        return False
+
+    def actualizado(self, grafo, tocadas) -> Optional[GrafoCompilado]:
+        # La instantánea no cambia: un grafo nuevo es otra instantánea
+        return None
+
+    def _compilado_en_memoria(self) -> GrafoCompilado:
+        with self._lock_en_memoria:
+            if self._en_memoria is None:
+                self._en_memoria = GrafoCompilado(self._grafo)
+            return self._en_memoria
+
+    def matriz_incidencia(self):
+        # La matriz (NumPy o listas) es del proceso de todos modos
+        return self._compilado_en_memoria().matriz_incidencia()
+
+    def puntuar_lote(self, despensas: List[List[str]], usar_numpy: bool = None):
+        return self._compilado_en_memoria().puntuar_lote(despensas, usar_numpy=usar_numpy)
+
+    def _clasificar(self, despensa: int, umbral_casi_completa: float,
+                    incluir_sin_coincidencias: bool = True,
+                    limite: Optional[int] = None,
+                    desplazamiento: int = 0,
+                    top_k: Optional[int] = None,
+                    totales: Optional[Dict[str, int]] = None) -> Dict:
+        resultados = {
+            'completas': [],
+            'casi_completas': [],
+            'incompletas': []
+        }
+
+        en_despensa = set(self.posiciones_mascara(despensa))
+        candidatas = set()
+        for posicion in en_despensa:
+            candidatas.update(self.recetas_por_bit[posicion])
+
+        grafo = self._grafo
+        nombres = grafo.nombres_ingredientes
+        bit_de = self._bit_de
+        for id_receta in sorted(candidatas):
+            ids = grafo.ingredientes_de_receta(id_receta)
+            total = len(ids)
+            faltantes = [nombres[i] for i in ids if bit_de[i] not in en_despensa]
+            presentes = total - len(faltantes)
+            resultados[categoria_por_ratio(presentes / total, umbral_casi_completa)].append(
+                crear_resultado_receta(grafo.nombres_recetas[id_receta], total, presentes, faltantes)
+            )
+
+        return self._paginar(resultados, candidatas, umbral_casi_completa, incluir_sin_coincidencias,
+                             limite, desplazamiento, top_k, totales)
+
+    def _sin_coincidencias(self, candidatas: Set[int], cantidad: int) -> List[Dict]:
+        grafo = self._grafo
+        nombres = grafo.nombres_ingredientes
+        inicio = grafo.inicio_ingredientes
+        resultado = []
+        for id_receta in range(len(inicio) - 1):
+            if len(resultado) >= cantidad:
+                break
+            if id_receta in candidatas or inicio[id_receta] == inicio[id_receta + 1]:
+                continue
+            ids = grafo.ingredientes_de_receta(id_receta)
+            resultado.append(crear_resultado_receta(grafo.nombres_recetas[id_receta], len(ids), 0,
+                                                    [nombres[i] for i in ids]))
+        return resultado
+
+
+class GrafoMapeado(GrafoCompacto):
+    """
+    GrafoCompacto que consulta todo desde un archivo mapeado en memoria.
+
+    Los arreglos CSR son vistas del archivo; los nombres se decodifican al
+    pedirlos (TablaNombres) y las búsquedas por nombre son búsquedas binarias
+    sobre los orden_* (IndiceNombres), sin diccionarios del proceso.
+    compilar() retorna un CompiladoMapeado, también sobre el archivo.
+
+    Es de solo lectura como GrafoCompacto; el archivo queda mapeado mientras
+    exista el grafo. Reemplazar el archivo en disco (os.replace) no afecta a
+    los grafos ya abiertos: siguen viendo el archivo anterior.
+    """
+
+    def __init__(self, ruta, mapa, encabezado: EncabezadoInstantanea, partes: SeccionesInstantanea):
+        self.ruta = ruta
+        self.huella = encabezado.huella
+        self._mapa = mapa
+        self._encabezado = encabezado
+        self._partes = partes
+        total_ingredientes = encabezado.ingredientes
+        super().__init__(
+            TablaNombres(partes.inicio_nombres, partes.nombres, 0, total_ingredientes),
+            TablaNombres(partes.inicio_nombres, partes.nombres, total_ingredientes, encabezado.recetas),
+            partes.inicio_ingredientes, partes.ingredientes_de, partes.inicio_recetas, partes.recetas_de,
+        )
+
+    def _indexar_nombres(self) -> None:
+        partes = self._partes
+        self._id_ingrediente = IndiceNombres(self.nombres_ingredientes, partes.orden_ingredientes)
+        self._id_receta = IndiceNombres(self.nombres_recetas, partes.orden_recetas)
+        self._ids_por_nombre = {
+            'ingrediente': IndiceNombres(self.nombres_ingredientes, partes.orden_ingredientes_minusculas, str.lower),
+            'receta': IndiceNombres(self.nombres_recetas, partes.orden_recetas_minusculas, str.lower),
+        }
+        self._ingredientes_normalizados = IndiceNombresMultiple(
+            self.nombres_ingredientes, partes.orden_ingredientes_normalizados, normalizar_nombre)
+
+    def _compilar(self):
+        partes = self._partes
+        return CompiladoMapeado(self, partes.bit_de_ingrediente, partes.inicio_por_bit, partes.recetas_por_bit,
+                                self._encabezado.bits)
+
+
+def abrir_instantanea(ruta, huella: str = None, verificar_crc: bool = True) -> GrafoCompacto:
+    """
+    Abre una instantánea mapeándola en memoria, sin copiar los arreglos CSR.
+
+    En plataformas big-endian los arreglos no se pueden usar tal cual y se
+    carga una copia (cargar_instantanea).
+
+    Args:
+        ruta: Archivo de la instantánea
+        huella (str): Huella esperada del JSON de origen; None para no verificarla
+        verificar_crc (bool): Verificar el CRC del cuerpo (lee el archivo completo)
+
+    Raises:
+        InstantaneaInvalida: Si falta, está dañada o es de otro JSON
+    """
+    if sys.byteorder == 'big':
+        return cargar_instantanea(ruta, huella)
+
+    try:
+        with open(ruta, 'rb') as archivo:
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as error:
+        # ValueError: archivo vacío (no se puede mapear)
+        raise InstantaneaInvalida(f"No se pudo mapear la instantánea {ruta}: {error}")
+
+    try:
+        with medir('grafo.instantanea_mapeo'):
+            encabezado = leer_encabezado_bytes(mapa)
+            if huella is not None and encabezado.huella != huella:
+                raise InstantaneaInvalida("La instantánea corresponde a otro JSON de platos")
+            if verificar_crc:
+                verificar_cuerpo(mapa, encabezado)
+            grafo = GrafoMapeado(ruta, mapa, encabezado, secciones(mapa, encabezado, verificar_crc=False))
+    except InstantaneaInvalida:
+        mapa.close()
+        raise
+    logger.debug("Instantánea del grafo mapeada desde %s", ruta)
+    return grafo
@@ -1,3 +1,10 @@
+import logging
+
+from platos.algoritmos.registro import obtener_logger
+
+logger = obtener_logger('lista')
+
+
 class Nodo:
     def __init__(self, plato, puntuacion_total):
         self.plato = plato
@@ -12,7 +19,8 @@ class ListaDoblementeEnlazada:
         self.tamanio = 0
 
     def insertar_ordenado(self, plato, puntuacion_total):
-        print(f'Insertando: {plato["nombre"]} con puntuación {puntuacion_total}')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Insertando: %s con puntuación %s', plato["nombre"], puntuacion_total)
         nuevo = Nodo(plato, puntuacion_total)
         if self.cabeza is None:
             self.cabeza = nuevo
@@ -46,7 +54,8 @@ class ListaDoblementeEnlazada:
         while actual:
             elementos.append(f'{actual.plato["nombre"]} (Puntuación: {actual.puntuacion_total})')
             actual = actual.siguiente
-            print("Recorriendo adelante:", " <--> ".join(elementos))
-        return " <--> ".join(elementos) 
+        recorrido = " <--> ".join(elementos)
+        logger.debug("Recorriendo adelante: %s", recorrido)
+        return recorrido
 
 lista = ListaDoblementeEnlazada()
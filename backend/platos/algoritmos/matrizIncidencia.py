@@ -0,0 +1,145 @@
+"""
+Matriz de incidencia recetas x ingredientes (CSR) para puntuar lotes de despensas.
+
+- Fila r: receta r del grafo compilado (mismo orden de recorrido).
+- Columna i: ingrediente con posición de bit i.
+- Valor: cuántas veces la receta usa el ingrediente (normalmente 1).
+
+Un lote de k despensas es una matriz D de ingredientes x k con 1 donde la
+despensa tiene el ingrediente. Entonces
+
+    presentes = A @ D           (recetas x k)
+    ratios    = presentes / totales
+
+da el ratio de cada par receta x despensa con un solo producto de matrices.
+
+NumPy es opcional: si no está instalado se usa el camino en Python puro, que
+recorre solo las recetas que comparten algún ingrediente con cada despensa.
+Si además está SciPy, el producto se hace con scipy.sparse.
+"""
+
+from collections import Counter
+from typing import List, Set
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # pragma: no cover - depende del entorno
+    sparse = None
+
+HAY_NUMPY = np is not None
+
+
+class MatrizIncidencia:
+    """
+    Incidencia recetas x ingredientes de un GrafoCompilado en formato CSR.
+
+    Con NumPy, `indptr`, `indices` y `datos` son arreglos de NumPy; sin NumPy
+    son listas de Python y ratios() usa el camino puro.
+    """
+
+    def __init__(self, compilado):
+        """
+        Args:
+            compilado (GrafoCompilado): Grafo compilado del que sale la matriz
+        """
+        self.nombres_recetas = [receta.nombre for receta in compilado.recetas]
+        self.forma = (len(compilado.recetas), len(compilado.bits))
+        self._recetas_por_bit = compilado.recetas_por_bit
+
+        indptr = [0]
+        indices = []
+        datos = []
+        for receta in compilado.recetas:
+            repeticiones = Counter(posicion for posicion, _ in receta.ingredientes)
+            indices.extend(repeticiones)
+            datos.extend(repeticiones.values())
+            indptr.append(len(indices))
+        totales = [receta.total for receta in compilado.recetas]
+        self._totales = totales
+        # {posición: repeticiones} de cada receta, para el camino puro
+        self._repeticiones = [
+            dict(zip(indices[indptr[r]:indptr[r + 1]], datos[indptr[r]:indptr[r + 1]]))
+            for r in range(len(totales))
+        ]
+
+        if HAY_NUMPY:
+            self.indptr = np.array(indptr, dtype=np.int64)
+            self.indices = np.array(indices, dtype=np.int32)
+            self.datos = np.array(datos, dtype=np.float64)
+            self.totales = np.array(totales, dtype=np.float64)
+            if sparse is not None:
+                self._matriz = sparse.csr_matrix((self.datos, self.indices, self.indptr), shape=self.forma)
+            else:
+                self._matriz = None
+                # Forma por columnas: recetas y repeticiones de cada ingrediente
+                self._columnas = [np.array(recetas, dtype=np.int64) for recetas in compilado.recetas_por_bit]
+                self._pesos_columnas = [
+                    np.array([self._repeticiones[r][posicion] for r in recetas], dtype=np.float64)
+                    for posicion, recetas in enumerate(compilado.recetas_por_bit)
+                ]
+        else:
+            self.indptr, self.indices, self.datos, self.totales = indptr, indices, datos, totales
+            self._matriz = None
+
+    def ratios(self, despensas: List[Set[int]], usar_numpy: bool = None):
+        """
+        Ratio de ingredientes disponibles para cada par receta x despensa.
+
+        Args:
+            despensas (List[Set[int]]): Posiciones de bit de cada despensa
+                (ver GrafoCompilado.posiciones_despensa)
+            usar_numpy (bool): None para usar NumPy si está instalado; False
+                fuerza el camino en Python puro
+
+        Returns:
+            Con NumPy, un ndarray de recetas x despensas. Sin NumPy, una lista
+            de filas (una por receta) con el ratio para cada despensa.
+        """
+        if usar_numpy is None:
+            usar_numpy = HAY_NUMPY
+        if usar_numpy and not HAY_NUMPY:
+            raise RuntimeError("NumPy no está instalado")
+        if usar_numpy:
+            return self._presentes_numpy(despensas) / self.totales[:, None]
+        return self._ratios_python(despensas)
+
+    def _despensas_densas(self, despensas):
+        matriz = np.zeros((self.forma[1], len(despensas)), dtype=np.float64)
+        for columna, posiciones in enumerate(despensas):
+            if posiciones:
+                matriz[list(posiciones), columna] = 1.0
+        return matriz
+
+    def _presentes_numpy(self, despensas):
+        if self._matriz is not None:
+            return self._matriz @ self._despensas_densas(despensas)
+
+        # Sin SciPy: cada columna de A @ D es la suma de las columnas de A de
+        # los ingredientes de la despensa; se toman de la forma por columnas
+        # (recetas de cada ingrediente) y se suman con bincount
+        presentes = np.empty((self.forma[0], len(despensas)), dtype=np.float64)
+        for columna, posiciones in enumerate(despensas):
+            if not posiciones:
+                presentes[:, columna] = 0.0
+                continue
+            recetas = np.concatenate([self._columnas[p] for p in posiciones])
+            pesos = np.concatenate([self._pesos_columnas[p] for p in posiciones])
+            presentes[:, columna] = np.bincount(recetas, weights=pesos, minlength=self.forma[0])
+        return presentes
+
+    def _ratios_python(self, despensas):
+        filas = [[0.0] * len(despensas) for _ in range(self.forma[0])]
+        for columna, posiciones in enumerate(despensas):
+            candidatas = set()
+            for posicion in posiciones:
+                candidatas.update(self._recetas_por_bit[posicion])
+            for indice in candidatas:
+                presentes = sum(veces for posicion, veces in self._repeticiones[indice].items()
+                                if posicion in posiciones)
+                filas[indice][columna] = presentes / self._totales[indice]
+        return filas
@@ -0,0 +1,128 @@
+"""
+Registro (logging) e instrumentación para platos/algoritmos y las vistas.
+
+- Loggers con nombre bajo "platos" (ej: "platos.grafo"), configurables desde
+  LOGGING en settings.py. Los mensajes usan formato perezoso ("%s"), así que
+  no cuestan nada si el nivel no está habilitado.
+- FiltroMuestreo limita cuántos registros de DEBUG por mensaje se emiten en
+  una ventana de tiempo, para que activar la depuración en un ciclo caliente
+  no inunde los logs.
+- medir(fase) registra la duración de una fase en el logger "platos.tiempos"
+  y acumula estadísticas (tiempos.resumen(), expuesto en grafo/monitoreo/).
+  Si ese logger no está en DEBUG, no mide nada.
+
+Este módulo no depende de Django para que los algoritmos se puedan usar solos.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+LOGGER_RAIZ = 'platos'
+LOGGER_TIEMPOS = 'platos.tiempos'
+
+
+def obtener_logger(nombre):
+    """
+    Retorna el logger "platos.<nombre>".
+
+    Args:
+        nombre (str): Nombre corto del componente (ej: "grafo", "vistas")
+    """
+    return logging.getLogger(f'{LOGGER_RAIZ}.{nombre}')
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Limita los registros por debajo de `nivel_maximo` a `maximo` por mensaje
+    (plantilla sin formatear) cada `intervalo` segundos.
+
+    Un registro con el atributo `muestreo` (vía extra=) se cuenta aparte por
+    ese valor, aunque comparta la plantilla: así medir() muestrea cada fase
+    por separado.
+
+    Al abrir una ventana nueva, el primer registro que pasa indica cuántos se
+    descartaron en la ventana anterior.
+    """
+
+    def __init__(self, maximo=20, intervalo=10.0, nivel_maximo=logging.DEBUG):
+        super().__init__()
+        self.maximo = maximo
+        self.intervalo = intervalo
+        self.nivel_maximo = nivel_maximo
+        self._ventanas = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.nivel_maximo:
+            return True
+        clave = (record.name, record.msg, getattr(record, 'muestreo', None))
+        ahora = time.monotonic()
+        with self._lock:
+            inicio, emitidos, descartados = self._ventanas.get(clave, (ahora, 0, 0))
+            if ahora - inicio >= self.intervalo:
+                if descartados:
+                    # Al texto, sin tocar args (pueden ser una tupla o un dict)
+                    record.msg = f'{record.msg} [{descartados} mensajes similares omitidos]'
+                inicio, emitidos, descartados = ahora, 0, 0
+            if emitidos < self.maximo:
+                self._ventanas[clave] = (inicio, emitidos + 1, descartados)
+                return True
+            self._ventanas[clave] = (inicio, emitidos, descartados + 1)
+            return False
+
+
+class RegistroTiempos:
+    """Acumula duraciones por fase: cantidad, total y máximo (en segundos)."""
+
+    def __init__(self):
+        self._fases = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, fase, duracion):
+        with self._lock:
+            cantidad, total, maximo = self._fases.get(fase, (0, 0.0, 0.0))
+            self._fases[fase] = (cantidad + 1, total + duracion, max(maximo, duracion))
+
+    def resumen(self):
+        """Retorna {fase: {"cantidad", "total_ms", "promedio_ms", "maximo_ms"}}."""
+        with self._lock:
+            return {
+                fase: {
+                    'cantidad': cantidad,
+                    'total_ms': round(total * 1000, 3),
+                    'promedio_ms': round(total * 1000 / cantidad, 3),
+                    'maximo_ms': round(maximo * 1000, 3),
+                }
+                for fase, (cantidad, total, maximo) in self._fases.items()
+            }
+
+    def reiniciar(self):
+        with self._lock:
+            self._fases.clear()
+
+
+tiempos = RegistroTiempos()
+_logger_tiempos = logging.getLogger(LOGGER_TIEMPOS)
+
+
+@contextmanager
+def medir(fase):
+    """
+    Mide la duración del bloque si "platos.tiempos" está en DEBUG.
+
+    Uso:
+        with medir('grafo.construccion'):
+            grafo = build_graph_desde_db(platos_db)
+    """
+    if not _logger_tiempos.isEnabledFor(logging.DEBUG):
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracion = time.perf_counter() - inicio
+        tiempos.registrar(fase, duracion)
+        _logger_tiempos.debug('%s: %.3f ms', fase, duracion * 1000, extra={'muestreo': fase})
@@ -0,0 +1,371 @@
+"""
+Skip List indexada para mantener platos ordenados por puntuación.
+
+Reemplaza a ListaDoblementeEnlazada en los caminos calientes: inserciones,
+eliminaciones y consultas por posición en O(log n) esperado, en lugar de
+recorrer la lista desde la cabeza en cada inserción.
+
+Orden:
+- Puntuación total descendente
+- A igual puntuación, por `orden` ascendente (por defecto, orden de inserción)
+
+Conserva la API de ListaDoblementeEnlazada (`insertar_ordenado`,
+`recorrerAdelante`, `cabeza`, `cola`, `tamanio` y nodos con `plato`,
+`puntuacion_total`, `siguiente` y `anterior`).
+"""
+
+import itertools
+import random
+
+NIVEL_MAXIMO = 32
+PROBABILIDAD_NIVEL = 0.25
+
+
+class NodoSkip:
+    """Nodo de la skip list. En el nivel 0 se comporta como un nodo doblemente enlazado."""
+
+    __slots__ = ('plato', 'puntuacion_total', 'orden', 'clave', 'llave',
+                 'siguientes', 'anchos', 'anterior')
+
+    def __init__(self, plato, puntuacion_total, orden, llave, clave, nivel):
+        self.plato = plato
+        self.puntuacion_total = puntuacion_total
+        self.orden = orden
+        self.clave = clave
+        # Llave de ordenamiento única: (-puntuación, orden, secuencia)
+        self.llave = llave
+        self.siguientes = [None] * nivel
+        # anchos[i]: cantidad de posiciones del nivel 0 que salta siguientes[i]
+        self.anchos = [1] * nivel
+        self.anterior = None
+
+    @property
+    def siguiente(self):
+        return self.siguientes[0]
+
+
+class SkipListOrdenada:
+    """
+    Contenedor ordenado por puntuación (descendente) basado en una skip list indexada.
+
+    Complejidades (esperadas):
+        insertar_ordenado, eliminar, posicion, en_posicion: O(log n)
+        top_k(k), rango(...): O(log n + k)
+    """
+
+    def __init__(self, semilla=None):
+        """
+        Args:
+            semilla: Semilla opcional para el generador de niveles (útil en pruebas)
+        """
+        self._aleatorio = random.Random(semilla)
+        self._secuencia = itertools.count()
+        self._centinela = NodoSkip(None, None, None, None, None, NIVEL_MAXIMO)
+        self._nivel = 1
+        self._cola = None
+        self._indice = {}
+        self.tamanio = 0
+
+    # ------------------------------------------------------------------
+    # Compatibilidad con ListaDoblementeEnlazada
+    # ------------------------------------------------------------------
+
+    @property
+    def cabeza(self):
+        """Primer nodo (mayor puntuación) o None si está vacía."""
+        return self._centinela.siguientes[0]
+
+    @property
+    def cola(self):
+        """Último nodo (menor puntuación) o None si está vacía."""
+        return self._cola
+
+    def insertar_ordenado(self, plato, puntuacion_total, orden=None, clave=None):
+        """
+        Inserta un plato manteniendo el orden por puntuación.
+
+        Args:
+            plato: Datos del plato (normalmente un dict)
+            puntuacion_total: Puntuación usada para ordenar (mayor primero)
+            orden: Desempate entre puntuaciones iguales (menor primero).
+                   Por defecto, el orden de inserción.
+            clave: Identificador para eliminar/consultar el plato después.
+                   Por defecto, plato["id"] si el plato es un dict con "id".
+
+        Returns:
+            NodoSkip: El nodo insertado
+
+        Si ya existe un plato con la misma clave, se reemplaza.
+        """
+        if clave is None and isinstance(plato, dict):
+            clave = plato.get('id')
+        if clave is not None and clave in self._indice:
+            self._eliminar_nodo(self._indice[clave])
+
+        secuencia = next(self._secuencia)
+        if orden is None:
+            orden = secuencia
+        llave = (-puntuacion_total, orden, secuencia)
+
+        actualizar = [None] * NIVEL_MAXIMO
+        posiciones = [0] * NIVEL_MAXIMO
+        x = self._centinela
+        posicion = 0
+        for i in reversed(range(self._nivel)):
+            while x.siguientes[i] is not None and x.siguientes[i].llave < llave:
+                posicion += x.anchos[i]
+                x = x.siguientes[i]
+            actualizar[i] = x
+            posiciones[i] = posicion
+
+        nivel = self._nivel_aleatorio()
+        if nivel > self._nivel:
+            for i in range(self._nivel, nivel):
+                actualizar[i] = self._centinela
+                posiciones[i] = 0
+                self._centinela.anchos[i] = self.tamanio + 1
+            self._nivel = nivel
+
+        nuevo = NodoSkip(plato, puntuacion_total, orden, llave, clave, nivel)
+        for i in range(nivel):
+            previo = actualizar[i]
+            salto = posicion - posiciones[i]
+            nuevo.siguientes[i] = previo.siguientes[i]
+            nuevo.anchos[i] = previo.anchos[i] - salto
+            previo.siguientes[i] = nuevo
+            previo.anchos[i] = salto + 1
+        for i in range(nivel, self._nivel):
+            actualizar[i].anchos[i] += 1
+
+        # Enlaces del nivel 0 hacia atrás
+        nuevo.anterior = actualizar[0] if actualizar[0] is not self._centinela else None
+        if nuevo.siguientes[0] is not None:
+            nuevo.siguientes[0].anterior = nuevo
+        else:
+            self._cola = nuevo
+
+        if clave is not None:
+            self._indice[clave] = nuevo
+        self.tamanio += 1
+        return nuevo
+
+    def recorrerAdelante(self):
+        """Representación de la lista de mayor a menor puntuación."""
+        return " <--> ".join(
+            f'{nodo.plato["nombre"]} (Puntuación: {nodo.puntuacion_total})' for nodo in self.nodos()
+        )
+
+    def recorrerAtras(self):
+        """Representación de la lista de menor a mayor puntuación."""
+        return " <--> ".join(
+            f'{nodo.plato["nombre"]} (Puntuación: {nodo.puntuacion_total})' for nodo in self.nodos(reverso=True)
+        )
+
+    # ------------------------------------------------------------------
+    # Eliminación y consultas por clave
+    # ------------------------------------------------------------------
+
+    def eliminar(self, clave):
+        """
+        Elimina el plato con la clave dada.
+
+        Returns:
+            El plato eliminado
+
+        Raises:
+            KeyError: Si la clave no existe
+        """
+        nodo = self._indice[clave]
+        self._eliminar_nodo(nodo)
+        return nodo.plato
+
+    def obtener(self, clave, por_defecto=None):
+        """Retorna el plato con la clave dada (O(1))."""
+        nodo = self._indice.get(clave)
+        return nodo.plato if nodo is not None else por_defecto
+
+    def posicion(self, clave):
+        """
+        Retorna la posición (0 = mayor puntuación) del plato con la clave dada.
+
+        Raises:
+            KeyError: Si la clave no existe
+        """
+        llave = self._indice[clave].llave
+        x = self._centinela
+        posicion = 0
+        for i in reversed(range(self._nivel)):
+            while x.siguientes[i] is not None and x.siguientes[i].llave <= llave:
+                posicion += x.anchos[i]
+                x = x.siguientes[i]
+        return posicion - 1
+
+    def en_posicion(self, posicion):
+        """
+        Retorna el nodo en la posición dada (0 = mayor puntuación).
+
+        Raises:
+            IndexError: Si la posición está fuera de rango
+        """
+        if posicion < 0:
+            posicion += self.tamanio
+        if not 0 <= posicion < self.tamanio:
+            raise IndexError("Posición fuera de rango")
+        restante = posicion + 1
+        x = self._centinela
+        for i in reversed(range(self._nivel)):
+            while x.siguientes[i] is not None and x.anchos[i] <= restante:
+                restante -= x.anchos[i]
+                x = x.siguientes[i]
+        return x
+
+    # ------------------------------------------------------------------
+    # Recorridos
+    # ------------------------------------------------------------------
+
+    def nodos(self, reverso=False):
+        """Itera los nodos en orden (o en orden inverso)."""
+        actual = self._cola if reverso else self.cabeza
+        while actual is not None:
+            yield actual
+            actual = actual.anterior if reverso else actual.siguiente
+
+    def top_k(self, k):
+        """Retorna los k platos con mayor puntuación."""
+        resultado = []
+        actual = self.cabeza
+        while actual is not None and len(resultado) < k:
+            resultado.append(actual.plato)
+            actual = actual.siguiente
+        return resultado
+
+    def rango(self, inicio, fin=None, reverso=False):
+        """
+        Itera los platos en las posiciones [inicio, fin).
+
+        Args:
+            inicio (int): Primera posición (incluida)
+            fin (int): Última posición (excluida). Por defecto, hasta el final.
+            reverso (bool): Si es True, recorre de fin-1 hacia inicio
+        """
+        fin = self.tamanio if fin is None else min(fin, self.tamanio)
+        inicio = max(inicio, 0)
+        if inicio >= fin:
+            return
+        if reverso:
+            actual = self.en_posicion(fin - 1)
+            for _ in range(fin - inicio):
+                yield actual.plato
+                actual = actual.anterior
+        else:
+            actual = self.en_posicion(inicio)
+            for _ in range(fin - inicio):
+                yield actual.plato
+                actual = actual.siguiente
+
+    def rango_puntuacion(self, minimo, maximo, reverso=False):
+        """
+        Itera los platos con minimo <= puntuacion_total <= maximo.
+
+        Por defecto de mayor a menor puntuación; con reverso=True, de menor a mayor.
+        """
+        x = self._centinela
+        if reverso:
+            # Último nodo con puntuación >= minimo
+            for i in reversed(range(self._nivel)):
+                while x.siguientes[i] is not None and x.siguientes[i].puntuacion_total >= minimo:
+                    x = x.siguientes[i]
+            actual = x if x is not self._centinela else None
+            while actual is not None and actual.puntuacion_total <= maximo:
+                yield actual.plato
+                actual = actual.anterior
+        else:
+            # Primer nodo con puntuación <= maximo
+            for i in reversed(range(self._nivel)):
+                while x.siguientes[i] is not None and x.siguientes[i].puntuacion_total > maximo:
+                    x = x.siguientes[i]
+            actual = x.siguientes[0]
+            while actual is not None and actual.puntuacion_total >= minimo:
+                yield actual.plato
+                actual = actual.siguiente
+
+    def desde(self, puntuacion_total, orden, reverso=False):
+        """
+        Itera los platos estrictamente después de la posición (puntuacion_total, orden).
+
+        Es la búsqueda por llave (keyset) que usa la paginación por cursor: cuesta
+        O(log n) llegar al punto de partida sin importar qué tan profunda sea la página.
+        Con reverso=True itera los platos estrictamente anteriores, hacia atrás.
+        """
+        llave = (-puntuacion_total, orden)
+        x = self._centinela
+        for i in reversed(range(self._nivel)):
+            if reverso:
+                while x.siguientes[i] is not None and x.siguientes[i].llave[:2] < llave:
+                    x = x.siguientes[i]
+            else:
+                while x.siguientes[i] is not None and x.siguientes[i].llave[:2] <= llave:
+                    x = x.siguientes[i]
+        if reverso:
+            actual = x if x is not self._centinela else None
+            while actual is not None:
+                yield actual.plato
+                actual = actual.anterior
+        else:
+            actual = x.siguientes[0]
+            while actual is not None:
+                yield actual.plato
+                actual = actual.siguiente
+
+    def __len__(self):
+        return self.tamanio
+
+    def __contains__(self, clave):
+        return clave in self._indice
+
+    def __iter__(self):
+        for nodo in self.nodos():
+            yield nodo.plato
+
+    def __reversed__(self):
+        for nodo in self.nodos(reverso=True):
+            yield nodo.plato
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _nivel_aleatorio(self):
+        nivel = 1
+        while nivel < NIVEL_MAXIMO and self._aleatorio.random() < PROBABILIDAD_NIVEL:
+            nivel += 1
+        return nivel
+
+    def _eliminar_nodo(self, nodo):
+        llave = nodo.llave
+        x = self._centinela
+        actualizar = [None] * self._nivel
+        for i in reversed(range(self._nivel)):
+            while x.siguientes[i] is not None and x.siguientes[i].llave < llave:
+                x = x.siguientes[i]
+            actualizar[i] = x
+
+        for i in range(self._nivel):
+            previo = actualizar[i]
+            if previo.siguientes[i] is nodo:
+                previo.anchos[i] += nodo.anchos[i] - 1
+                previo.siguientes[i] = nodo.siguientes[i]
+            else:
+                previo.anchos[i] -= 1
+
+        while self._nivel > 1 and self._centinela.siguientes[self._nivel - 1] is None:
+            self._nivel -= 1
+
+        if nodo.siguientes[0] is not None:
+            nodo.siguientes[0].anterior = nodo.anterior
+        else:
+            self._cola = nodo.anterior
+
+        if nodo.clave is not None and self._indice.get(nodo.clave) is nodo:
+            del self._indice[nodo.clave]
+        self.tamanio -= 1
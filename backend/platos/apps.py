@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PlatosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'platos'
+
+    def ready(self):
+        # Registra las señales que mantienen el ranking de platos en memoria
+        from . import signals  # noqa: F401
@@ -0,0 +1,312 @@
+"""
+Catálogo de platos compartido (platos_database.json).
+
+El archivo se lee una sola vez por proceso y se expone como una instantánea
+inmutable de registros PlatoCatalogo. Cuando el archivo cambia, se vuelve a
+leer en un hilo en segundo plano y la instantánea nueva reemplaza a la
+anterior de forma atómica (una sola asignación de referencia); mientras
+tanto, las peticiones siguen usando la instantánea anterior.
+
+Cada instantánea tiene un número de versión: las estructuras derivadas (el
+grafo de recetas, el índice de ingredientes) se reconstruyen solo cuando
+cambia la versión.
+
+Con vigilancia (el catálogo global del proceso), un hilo vigilante revisa el
+archivo cada SMARTMEAL_CATALOGO_INTERVALO segundos (o espera sus eventos con
+inotify, si el paquete inotify_simple está instalado) y las peticiones solo
+comparan la versión en memoria, sin llamar a stat() en cada una.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+from platos.algoritmos.registro import obtener_logger, medir
+
+try:
+    from inotify_simple import INotify, flags as flags_inotify
+except ImportError:  # pragma: no cover - depende del entorno
+    INotify = None
+
+logger = obtener_logger('catalogo')
+
+
+@dataclass(frozen=True)
+class PlatoCatalogo:
+    """
+    Plato del catálogo (solo lectura).
+
+    Además de los atributos, admite `plato["campo"]` y `plato.get("campo", defecto)`
+    para que los algoritmos que reciben dicts (build_graph_desde_db,
+    IndiceInvertidoPlatos) lo usen sin cambios.
+    """
+    id: object
+    nombre: str = ''
+    descripcion: str = ''
+    categoria: str = ''
+    tipo: str = ''
+    precio: float = 0
+    imagen: str = ''
+    ingredientes: Tuple = ()
+    tiempo_preparacion: str = ''
+    calorias: float = 0
+    disponible: bool = True
+    puntuacion: float = 4.0
+
+    @classmethod
+    def desde_dict(cls, datos):
+        campos = {campo: datos[campo] for campo in cls.__dataclass_fields__ if campo in datos}
+        campos['ingredientes'] = tuple(datos.get('ingredientes', ()))
+        campos.setdefault('id', None)
+        return cls(**campos)
+
+    def get(self, campo, defecto=None):
+        return getattr(self, campo, defecto)
+
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo)
+
+
+@dataclass(frozen=True)
+class InstantaneaCatalogo:
+    """
+    Contenido del catálogo en un momento dado.
+
+    `huella` es el SHA-256 del archivo leído: identifica el contenido (y con él,
+    la instantánea en disco del grafo que le corresponde).
+    """
+    version: int
+    marca_tiempo: float
+    platos: Tuple[PlatoCatalogo, ...]
+    huella: str = ''
+
+
+def leer_catalogo(ruta):
+    """
+    Lee y valida el archivo JSON de platos.
+
+    Returns:
+        Tuple: (platos, huella SHA-256 del contenido del archivo)
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe
+        json.JSONDecodeError: Si el archivo no es JSON válido
+        ValueError: Si el JSON no es una lista de platos
+    """
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    datos = json.loads(contenido.decode('utf-8'))
+    if not isinstance(datos, list):
+        raise ValueError("El catálogo de platos debe ser una lista")
+    return tuple(PlatoCatalogo.desde_dict(plato) for plato in datos), hashlib.sha256(contenido).hexdigest()
+
+
+def leer_platos(ruta):
+    """Lee y valida el archivo JSON de platos (ver leer_catalogo)."""
+    return leer_catalogo(ruta)[0]
+
+
+class CatalogoPlatos:
+    """
+    Servicio de catálogo: una instantánea por proceso, recargada en segundo plano.
+    """
+
+    def __init__(self, ruta=None, vigilar=False, intervalo=None):
+        """
+        Args:
+            ruta: Archivo JSON de platos; None usa SMARTMEAL_CATALOGO_RUTA
+            vigilar (bool): Revisar el archivo desde un hilo vigilante (iniciado
+                con la primera lectura) en lugar de en cada instantanea()
+            intervalo (float): Segundos entre revisiones del vigilante; None usa
+                SMARTMEAL_CATALOGO_INTERVALO
+        """
+        self._ruta = ruta
+        self._instantanea: Optional[InstantaneaCatalogo] = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._lock_carga = threading.Lock()
+        self._recargando = False
+        self._marca_tiempo_fallida = None
+        self._vigilar = vigilar
+        self._intervalo = intervalo
+        self._vigilante = None
+        self._detener = threading.Event()
+
+    @property
+    def ruta(self):
+        if self._ruta is None:
+            return str(getattr(settings, 'SMARTMEAL_CATALOGO_RUTA',
+                               os.path.join(settings.BASE_DIR, 'platos_database.json')))
+        return self._ruta
+
+    @property
+    def intervalo(self):
+        if self._intervalo is None:
+            return float(getattr(settings, 'SMARTMEAL_CATALOGO_INTERVALO', 2.0))
+        return self._intervalo
+
+    @property
+    def version(self):
+        """Versión de la instantánea vigente (0 si todavía no se ha leído)."""
+        instantanea = self._instantanea
+        return instantanea.version if instantanea is not None else 0
+
+    def instantanea(self):
+        """
+        Retorna la instantánea vigente del catálogo.
+
+        La primera llamada lee el archivo (y propaga sus errores). Las siguientes
+        retornan de inmediato; si el archivo cambió, se lanza la recarga en
+        segundo plano y se sigue sirviendo la instantánea actual hasta el cambio.
+        Con vigilancia, el cambio lo detecta el hilo vigilante y aquí no se
+        consulta el archivo.
+        """
+        instantanea = self._instantanea
+        if instantanea is None:
+            with self._lock_carga:
+                if self._instantanea is None:
+                    instantanea = self.recargar()
+                    if self._vigilar:
+                        self._iniciar_vigilancia()
+                    return instantanea
+                instantanea = self._instantanea
+
+        if self._vigilante is not None:
+            return instantanea
+
+        try:
+            marca_tiempo = os.path.getmtime(self.ruta)
+        except OSError:
+            logger.warning("No se pudo leer %s; se mantiene la versión %d del catálogo",
+                           self.ruta, instantanea.version)
+            return instantanea
+
+        if marca_tiempo != instantanea.marca_tiempo and marca_tiempo != self._marca_tiempo_fallida:
+            self._recargar_en_segundo_plano(marca_tiempo)
+        return instantanea
+
+    def platos(self):
+        """Atajo: tupla de platos de la instantánea vigente."""
+        return self.instantanea().platos
+
+    def recargar(self):
+        """Lee el archivo ahora (en el hilo actual) y publica una instantánea nueva."""
+        ruta = self.ruta
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"Base de datos de platos no encontrada en {ruta}")
+        marca_tiempo = os.path.getmtime(ruta)
+        with medir('catalogo.lectura'):
+            platos, huella = leer_catalogo(ruta)
+        with self._lock:
+            self._version += 1
+            instantanea = InstantaneaCatalogo(self._version, marca_tiempo, platos, huella)
+            self._instantanea = instantanea
+        logger.info("Catálogo cargado: versión %d, %d platos", instantanea.version, len(platos))
+        return instantanea
+
+    def recargar_ahora(self):
+        """
+        Recarga el archivo ya, aunque no haya cambiado (por ejemplo, desde un
+        script de despliegue), sin esperar al vigilante.
+        """
+        with self._lock:
+            self._recargando = True
+        try:
+            return self.recargar()
+        finally:
+            with self._lock:
+                self._recargando = False
+
+    def detener_vigilancia(self):
+        """Detiene el hilo vigilante; las instantáneas vuelven a revisar el archivo."""
+        self._detener.set()
+        vigilante = self._vigilante
+        if vigilante is not None:
+            vigilante.join()
+        self._vigilante = None
+
+    def _iniciar_vigilancia(self):
+        if self._vigilante is not None:
+            return
+        self._detener.clear()
+        self._vigilante = threading.Thread(target=self._vigilar_archivo, name='vigilante-catalogo', daemon=True)
+        self._vigilante.start()
+        logger.info("Vigilando %s cada %.1f s%s", self.ruta, self.intervalo,
+                    " (inotify)" if INotify is not None else "")
+
+    def _crear_inotify(self):
+        if INotify is None:
+            return None
+        try:
+            inotify = INotify()
+            # Se vigila el directorio: un reemplazo atómico (rename) cambia el archivo
+            inotify.add_watch(os.path.dirname(os.path.abspath(self.ruta)),
+                              flags_inotify.CLOSE_WRITE | flags_inotify.MOVED_TO |
+                              flags_inotify.CREATE | flags_inotify.ATTRIB)
+            return inotify
+        except OSError:
+            logger.warning("No se pudo usar inotify; se revisa el archivo cada %.1f s", self.intervalo)
+            return None
+
+    def _vigilar_archivo(self):
+        inotify = self._crear_inotify()
+        nombre = os.path.basename(self.ruta)
+        try:
+            while not self._detener.is_set():
+                if inotify is not None:
+                    # Espera un evento del archivo o, como máximo, el intervalo
+                    eventos = inotify.read(timeout=int(self.intervalo * 1000))
+                    if eventos and not any(evento.name == nombre for evento in eventos):
+                        continue
+                elif self._detener.wait(self.intervalo):
+                    break
+                self._revisar_archivo()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _revisar_archivo(self):
+        instantanea = self._instantanea
+        try:
+            marca_tiempo = os.path.getmtime(self.ruta)
+        except OSError:
+            logger.warning("No se pudo leer %s; se mantiene la versión %d del catálogo",
+                           self.ruta, instantanea.version)
+            return
+        if marca_tiempo != instantanea.marca_tiempo and marca_tiempo != self._marca_tiempo_fallida:
+            with self._lock:
+                if self._recargando:
+                    return
+                self._recargando = True
+            self._recargar_seguro(marca_tiempo)
+
+    def _recargar_en_segundo_plano(self, marca_tiempo):
+        with self._lock:
+            if self._recargando:
+                return
+            self._recargando = True
+        threading.Thread(target=self._recargar_seguro, args=(marca_tiempo,),
+                         name='recarga-catalogo', daemon=True).start()
+
+    def _recargar_seguro(self, marca_tiempo):
+        try:
+            self.recargar()
+        except Exception:
+            # Un archivo a medio escribir o inválido no debe tumbar el servicio:
+            # se reintenta cuando vuelva a cambiar
+            self._marca_tiempo_fallida = marca_tiempo
+            logger.exception("No se pudo recargar el catálogo; se mantiene la versión anterior")
+        finally:
+            with self._lock:
+                self._recargando = False
+
+
+catalogo_platos = CatalogoPlatos(vigilar=True)
@@ -0,0 +1,347 @@
+"""
+Grafo de recetas construido desde los modelos Plato/Ingrediente.
+
+Es la alternativa a platos_database.json como fuente del grafo
+(SMARTMEAL_GRAFO_FUENTE = 'bd'): el grafo se carga una vez desde la base de
+datos, con una sola pasada sobre Plato.ingredientes.through, y se actualiza
+de forma incremental mediante señales (ver platos/signals.py). Editar un
+plato cuesta O(grado del plato), no una reconstrucción.
+
+Correspondencia con el grafo:
+- Cada nombre de plato (sin espacios al inicio y al final) es una receta; dos
+  platos con el mismo nombre comparten la receta y suman sus ingredientes.
+- Cada nombre de ingrediente normalizado (strip + minúsculas) es un
+  ingrediente; dos filas con el mismo nombre normalizado comparten el vértice.
+- Cada fila de la relación es una arista Ingrediente --> Receta.
+
+Notas (como en platos/ranking.py):
+- El grafo vive en el proceso. Las señales lo actualizan al confirmarse la
+  transacción, y los cambios de otros procesos se detectan con el sello de
+  versión de la base de datos, que provoca una recarga (ver platos/sello.py).
+  Las operaciones que no emiten señales (QuerySet.update, bulk_create, SQL
+  directo) deben llamar a avanzar_sello().
+"""
+
+import threading
+from collections import defaultdict
+
+from platos.algoritmos.grafoBusquedaReceta import BipartiteDirectedGraph, Vertex, Edge
+from platos.algoritmos.registro import obtener_logger, medir
+from .models import Plato, Ingrediente
+from .sello import leer_sello
+
+logger = obtener_logger('grafo')
+
+
+def nombre_receta(nombre):
+    return (nombre or '').strip()
+
+
+def nombre_ingrediente(nombre):
+    return (nombre or '').strip().lower()
+
+
+class GrafoPlatosBD:
+    """
+    Grafo bipartito de los platos de la base de datos, residente en memoria.
+
+    Estructuras (además del grafo):
+    - platos: {plato_id: nombre de la receta}
+    - ingredientes: {ingrediente_id: nombre normalizado}
+    - ingredientes_por_plato: {plato_id: [ingrediente_id, ...]} (orden de la relación)
+    - platos_por_ingrediente: {ingrediente_id: {plato_id, ...}} (índice inverso)
+    - platos_por_receta / ingredientes_por_nombre: cuántas filas usan cada
+      vértice, para quitarlo cuando ya no lo usa ninguna
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cargado = False
+        self._version = 0
+        self._sello = None
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._grafo = None
+        self._platos = {}
+        self._ingredientes = {}
+        self._ingredientes_por_plato = {}
+        self._platos_por_ingrediente = defaultdict(set)
+        self._platos_por_receta = defaultdict(set)
+        self._ingredientes_por_nombre = defaultdict(set)
+
+    # ------------------------------------------------------------------
+    # Carga y lectura
+    # ------------------------------------------------------------------
+
+    def cargar(self):
+        """Carga el grafo completo desde la base de datos (cuatro consultas, una pasada)."""
+        with self._lock, medir('grafo.carga_bd'):
+            self._reiniciar()
+            # Antes que los datos: si otro proceso los cambia mientras tanto,
+            # la próxima lectura vuelve a cargar
+            self._sello = leer_sello()
+            self._grafo = BipartiteDirectedGraph()
+            for plato_id, nombre in Plato.objects.values_list('id', 'nombre'):
+                self._registrar_plato(plato_id, nombre_receta(nombre))
+            for ingrediente_id, nombre in Ingrediente.objects.values_list('id', 'nombre'):
+                self._registrar_ingrediente(ingrediente_id, nombre_ingrediente(nombre))
+
+            # Una pasada sobre la relación: cada fila es una arista
+            relacion = Plato.ingredientes.through.objects.order_by('id')
+            for plato_id, ingrediente_id in relacion.values_list('plato_id', 'ingrediente_id'):
+                self._ingredientes_por_plato[plato_id].append(ingrediente_id)
+                self._platos_por_ingrediente[ingrediente_id].add(plato_id)
+                self._poner_arista(plato_id, ingrediente_id)
+            self._cargado = True
+            self._version += 1
+        logger.info("Grafo cargado desde la base de datos: %d platos, %d ingredientes",
+                    len(self._platos), len(self._ingredientes))
+
+    def invalidar(self):
+        """Descarta el grafo; se recarga desde la base de datos en la próxima lectura."""
+        with self._lock:
+            self._cargado = False
+            self._sello = None
+            self._reiniciar()
+
+    def _comprobar_sello(self, sello):
+        """Carga el grafo si no está cargado o si otro proceso cambió los datos (llamar con el lock)."""
+        if not self._cargado or sello != self._sello:
+            self.cargar()
+
+    def obtener(self):
+        """
+        Retorna una instantánea de solo lectura del grafo, cargándolo si hace falta.
+
+        La instantánea no cambia con las señales posteriores, así que una
+        consulta ve un grafo consistente de principio a fin; se reutiliza
+        mientras el grafo no cambie (ver BipartiteDirectedGraph.instantanea).
+        """
+        return self.obtener_versionado()[1]
+
+    def obtener_versionado(self):
+        """Como obtener(), junto con la versión (tomadas juntas, bajo el lock)."""
+        sello = leer_sello()
+        with self._lock:
+            self._comprobar_sello(sello)
+            return self._version, self._grafo.instantanea()
+
+    @property
+    def cargado(self):
+        return self._cargado
+
+    @property
+    def version(self):
+        """Aumenta con cada carga y con cada señal aplicada al grafo."""
+        return self._version
+
+    @property
+    def sello(self):
+        """Sello de la base de datos al que corresponde el grafo (None si no está cargado)."""
+        return self._sello
+
+    # ------------------------------------------------------------------
+    # Actualizaciones incrementales (llamadas desde platos/signals.py)
+    # ------------------------------------------------------------------
+
+    def aplicar_confirmado(self, anterior, nuevo, cambio):
+        """
+        Aplica un cambio ya confirmado en la base de datos (desde transaction.on_commit).
+
+        Igual que RankingPlatos.aplicar_confirmado: solo si el grafo está en el
+        sello `anterior`; si le falta un cambio intermedio, se invalida.
+        """
+        with self._lock:
+            if not self._cargado or self._sello >= nuevo:
+                return
+            if self._sello != anterior:
+                self.invalidar()
+                return
+            cambio()
+            self._sello = nuevo
+
+    def actualizar_plato(self, plato):
+        """Alta o cambio de nombre de un plato: O(grado del plato)."""
+        with self._lock:
+            if not self._cargado:
+                return
+            nuevo = nombre_receta(plato.nombre)
+            anterior = self._platos.get(plato.pk)
+            if anterior == nuevo:
+                return
+            if anterior is not None:
+                self._quitar_aristas(plato.pk)
+                self._olvidar_plato(plato.pk)
+            self._registrar_plato(plato.pk, nuevo)
+            self._poner_aristas(plato.pk)
+            self._version += 1
+
+    def eliminar_plato(self, plato_id):
+        # Las filas de la relación se borran en cascada sin señal m2m_changed
+        with self._lock:
+            if not self._cargado or plato_id not in self._platos:
+                return
+            self._quitar_aristas(plato_id)
+            for ingrediente_id in self._ingredientes_por_plato[plato_id]:
+                self._platos_por_ingrediente[ingrediente_id].discard(plato_id)
+            self._olvidar_plato(plato_id)
+            del self._ingredientes_por_plato[plato_id]
+            self._version += 1
+
+    def actualizar_ingrediente(self, ingrediente):
+        """Alta o cambio de nombre de un ingrediente: rehace solo las aristas de los platos que lo usan."""
+        with self._lock:
+            if not self._cargado:
+                return
+            nuevo = nombre_ingrediente(ingrediente.nombre)
+            anterior = self._ingredientes.get(ingrediente.pk)
+            if anterior == nuevo:
+                return
+            platos = self._platos_por_ingrediente.get(ingrediente.pk, ())
+            for plato_id in platos:
+                self._quitar_aristas(plato_id)
+            if anterior is not None:
+                self._olvidar_ingrediente(ingrediente.pk)
+            self._registrar_ingrediente(ingrediente.pk, nuevo)
+            for plato_id in platos:
+                self._poner_aristas(plato_id)
+            self._version += 1
+
+    def eliminar_ingrediente(self, ingrediente_id):
+        with self._lock:
+            if not self._cargado or ingrediente_id not in self._ingredientes:
+                return
+            platos = self._platos_por_ingrediente.pop(ingrediente_id, set())
+            for plato_id in platos:
+                self._quitar_aristas(plato_id)
+                self._ingredientes_por_plato[plato_id] = [
+                    ing_id for ing_id in self._ingredientes_por_plato[plato_id] if ing_id != ingrediente_id
+                ]
+            self._olvidar_ingrediente(ingrediente_id)
+            for plato_id in platos:
+                self._poner_aristas(plato_id)
+            self._version += 1
+
+    def agregar_relaciones(self, pares):
+        """
+        Registra relaciones plato-ingrediente nuevas.
+
+        Args:
+            pares: Iterable de tuplas (plato_id, ingrediente_id)
+        """
+        with self._lock:
+            if not self._cargado:
+                return
+            for plato_id, ingrediente_id in pares:
+                if plato_id not in self._platos:
+                    continue
+                if ingrediente_id not in self._ingredientes and not self._cargar_ingrediente(ingrediente_id):
+                    continue
+                if ingrediente_id in self._ingredientes_por_plato[plato_id]:
+                    continue
+                self._ingredientes_por_plato[plato_id].append(ingrediente_id)
+                self._platos_por_ingrediente[ingrediente_id].add(plato_id)
+                self._poner_arista(plato_id, ingrediente_id)
+            self._version += 1
+
+    def quitar_relaciones(self, pares):
+        """
+        Elimina relaciones plato-ingrediente.
+
+        Args:
+            pares: Iterable de tuplas (plato_id, ingrediente_id)
+        """
+        with self._lock:
+            if not self._cargado:
+                return
+            for plato_id, ingrediente_id in pares:
+                if ingrediente_id not in self._ingredientes_por_plato.get(plato_id, ()):
+                    continue
+                self._ingredientes_por_plato[plato_id].remove(ingrediente_id)
+                self._platos_por_ingrediente[ingrediente_id].discard(plato_id)
+                self._quitar_arista(plato_id, ingrediente_id)
+            self._version += 1
+
+    def platos_con_ingrediente(self, ingrediente_id):
+        with self._lock:
+            return set(self._platos_por_ingrediente.get(ingrediente_id, ()))
+
+    def ingredientes_de_plato(self, plato_id):
+        with self._lock:
+            return list(self._ingredientes_por_plato.get(plato_id, ()))
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _registrar_plato(self, plato_id, nombre):
+        self._platos[plato_id] = nombre
+        self._ingredientes_por_plato.setdefault(plato_id, [])
+        if nombre:
+            self._platos_por_receta[nombre].add(plato_id)
+            if self._grafo is not None:
+                self._grafo.add_vertex(Vertex(nombre, 'receta'))
+
+    def _olvidar_plato(self, plato_id):
+        nombre = self._platos.pop(plato_id)
+        if nombre:
+            usan = self._platos_por_receta[nombre]
+            usan.discard(plato_id)
+            if not usan:
+                del self._platos_por_receta[nombre]
+                self._grafo.remove_vertex(Vertex(nombre, 'receta'))
+
+    def _registrar_ingrediente(self, ingrediente_id, nombre):
+        self._ingredientes[ingrediente_id] = nombre
+        if nombre:
+            self._ingredientes_por_nombre[nombre].add(ingrediente_id)
+
+    def _olvidar_ingrediente(self, ingrediente_id):
+        nombre = self._ingredientes.pop(ingrediente_id)
+        if nombre:
+            usan = self._ingredientes_por_nombre[nombre]
+            usan.discard(ingrediente_id)
+            if not usan:
+                del self._ingredientes_por_nombre[nombre]
+                vertex = Vertex(nombre, 'ingrediente')
+                if vertex in self._grafo.ingredientes:
+                    self._grafo.remove_vertex(vertex)
+
+    def _cargar_ingrediente(self, ingrediente_id):
+        nombre = Ingrediente.objects.filter(pk=ingrediente_id).values_list('nombre', flat=True).first()
+        if nombre is None:
+            return False
+        self._registrar_ingrediente(ingrediente_id, nombre_ingrediente(nombre))
+        return True
+
+    def _arista(self, plato_id, ingrediente_id):
+        return Edge(Vertex(self._ingredientes[ingrediente_id], 'ingrediente'),
+                    Vertex(self._platos[plato_id], 'receta'))
+
+    def _poner_arista(self, plato_id, ingrediente_id):
+        if not self._platos[plato_id] or not self._ingredientes[ingrediente_id]:
+            return
+        arista = self._arista(plato_id, ingrediente_id)
+        self._grafo.add_vertex(arista.get_origen())
+        self._grafo.add_edge(arista)
+
+    def _poner_aristas(self, plato_id):
+        for ingrediente_id in self._ingredientes_por_plato[plato_id]:
+            self._poner_arista(plato_id, ingrediente_id)
+
+    def _quitar_arista(self, plato_id, ingrediente_id):
+        if not self._platos[plato_id] or not self._ingredientes[ingrediente_id]:
+            return
+        arista = self._arista(plato_id, ingrediente_id)
+        self._grafo.remove_edge(arista)
+        # Como en cargar(), un ingrediente sin recetas no es vértice del grafo
+        if not self._grafo.adyacencia.get(arista.get_origen()):
+            self._grafo.remove_vertex(arista.get_origen())
+
+    def _quitar_aristas(self, plato_id):
+        for ingrediente_id in self._ingredientes_por_plato[plato_id]:
+            self._quitar_arista(plato_id, ingrediente_id)
+
+
+grafo_platos_bd = GrafoPlatosBD()
@@ -0,0 +1,39 @@
+"""
+Genera la instantánea binaria del grafo de recetas a partir del JSON de platos.
+
+Uso:
+    python manage.py generar_instantanea_grafo [--catalogo RUTA] [--salida RUTA]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from platos.catalogo import leer_catalogo
+from platos.algoritmos.grafoCompacto import GrafoCompacto
+from platos.algoritmos.instantaneaGrafo import guardar_instantanea
+
+
+class Command(BaseCommand):
+    help = 'Genera la instantánea binaria del grafo de recetas (ver SMARTMEAL_GRAFO_INSTANTANEA_RUTA)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--catalogo', default=None,
+                            help='JSON de platos (por defecto SMARTMEAL_CATALOGO_RUTA)')
+        parser.add_argument('--salida', default=None,
+                            help='Archivo de la instantánea (por defecto SMARTMEAL_GRAFO_INSTANTANEA_RUTA)')
+
+    def handle(self, *args, **opciones):
+        catalogo = opciones['catalogo'] or settings.SMARTMEAL_CATALOGO_RUTA
+        salida = opciones['salida'] or getattr(settings, 'SMARTMEAL_GRAFO_INSTANTANEA_RUTA', None)
+        if not salida:
+            raise CommandError("No hay ruta de salida: use --salida o SMARTMEAL_GRAFO_INSTANTANEA_RUTA")
+
+        try:
+            platos, huella = leer_catalogo(catalogo)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"No se pudo leer el catálogo {catalogo}: {error}")
+
+        encabezado = guardar_instantanea(GrafoCompacto.desde_db(platos), salida, huella)
+        self.stdout.write(self.style.SUCCESS(
+            f"Instantánea guardada en {salida}: {encabezado.ingredientes} ingredientes, "
+            f"{encabezado.recetas} recetas, {encabezado.aristas} aristas (huella {huella[:12]})"
+        ))
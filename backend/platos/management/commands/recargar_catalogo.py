@@ -0,0 +1,34 @@
+"""
+Pide a los procesos del servidor que recarguen el catálogo de platos.
+
+Cada proceso vigila el archivo del catálogo (ver platos/catalogo.py); este
+comando actualiza su fecha de modificación para que todos lo recarguen en la
+siguiente revisión (de inmediato con inotify), aunque el contenido no cambie.
+Pensado para scripts de despliegue.
+
+Uso:
+    python manage.py recargar_catalogo [--catalogo RUTA]
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Fuerza la recarga del catálogo de platos en los procesos del servidor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--catalogo', default=None,
+                            help='JSON de platos (por defecto SMARTMEAL_CATALOGO_RUTA)')
+
+    def handle(self, *args, **opciones):
+        ruta = opciones['catalogo'] or settings.SMARTMEAL_CATALOGO_RUTA
+        try:
+            os.utime(ruta)
+        except OSError as error:
+            raise CommandError(f"No se pudo actualizar {ruta}: {error}")
+        intervalo = getattr(settings, 'SMARTMEAL_CATALOGO_INTERVALO', 2.0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Recarga solicitada: los procesos leerán {ruta} en menos de {intervalo} s"
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:06
+
+from django.db import migrations, models
+from django.db.models import Avg, OuterRef, Subquery
+
+
+def calcular_puntuaciones(apps, schema_editor):
+    Plato = apps.get_model('platos', 'Plato')
+    relacion = Plato.ingredientes.through.objects.filter(
+        plato_id=OuterRef('pk'), ingrediente__seleccionado=True
+    )
+    promedio = relacion.order_by().values('plato_id').annotate(promedio=Avg('ingrediente__puntuacion'))
+    Plato.objects.update(puntuacion_promedio=Subquery(promedio.values('promedio')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platos', '0003_ingrediente_icono_ingrediente_puntuacion_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plato',
+            name='puntuacion_promedio',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='plato',
+            index=models.Index(fields=['-puntuacion_promedio', 'id'], name='plato_ranking_idx'),
+        ),
+        migrations.RunPython(calcular_puntuaciones, migrations.RunPython.noop),
+    ]
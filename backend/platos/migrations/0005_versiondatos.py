@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+def crear_sello(apps, schema_editor):
+    VersionDatos = apps.get_model('platos', 'VersionDatos')
+    VersionDatos.objects.get_or_create(nombre='platos')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platos', '0004_plato_puntuacion_promedio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionDatos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(crear_sello, migrations.RunPython.noop),
+    ]
@@ -15,6 +15,24 @@ class Plato(models.Model):
     puntuacion = models.IntegerField()  # 1 a 10
     precio = models.DecimalField(max_digits=6, decimal_places=2)
     ingredientes = models.ManyToManyField(Ingrediente, related_name='platos')
+    # Promedio exacto de las puntuaciones de los ingredientes seleccionados
+    # (None si no tiene ninguno). Columna desnormalizada para el ranking en
+    # SQL, mantenida por platos/signals.py (ver platos/ranking.py)
+    puntuacion_promedio = models.FloatField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['-puntuacion_promedio', 'id'], name='plato_ranking_idx')]
+
+    def __str__(self):
+        return self.nombre
+
+
+class VersionDatos(models.Model):
+    # Sello de versión de unos datos, compartido entre procesos a través de la
+    # base de datos: lo avanzan las señales en la misma transacción que el
+    # cambio (ver platos/sello.py)
+    nombre = models.CharField(max_length=50, unique=True)
+    valor = models.BigIntegerField(default=0)
 
     def __str__(self):
-        return self.nombre
\ No newline at end of file
+        return f'{self.nombre}: {self.valor}'
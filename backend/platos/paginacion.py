@@ -0,0 +1,134 @@
+"""
+Paginación por cursor (keyset) para la API de platos.
+
+La paginación es opcional: solo se activa si la petición trae `cursor` o
+`page_size`, de modo que los clientes que esperan la lista completa siguen
+funcionando igual. Las páginas profundas no se vuelven más lentas, porque el
+cursor guarda la última llave vista y la siguiente página empieza a buscar
+desde ahí en lugar de saltar OFFSET filas.
+"""
+
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .ranking import puntuacion_promedio
+
+
+class PaginacionCursorOpcional(CursorPagination):
+    """
+    CursorPagination de DRF ordenada por id, activa solo cuando se pide.
+
+    Uso: ?page_size=50 para la primera página; luego seguir los enlaces
+    `next`/`previous` de la respuesta.
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        if not paginacion_solicitada(request, self):
+            return None
+        return super().get_page_size(request)
+
+
+def paginacion_solicitada(request, paginador):
+    """Indica si la petición pidió paginación explícitamente."""
+    return (paginador.cursor_query_param in request.query_params or
+            paginador.page_size_query_param in request.query_params)
+
+
+class PaginacionCursorRanking:
+    """
+    Paginación por cursor para el ranking de platos-ordenados.
+
+    El orden del ranking es (promedio exacto descendente, id ascendente) y el
+    cursor guarda la llave (promedio, id) del borde de la página, más la
+    dirección. El promedio se toma sin redondear (ver ranking.puntuacion_promedio),
+    no del puntuacion_total redondeado del JSON. Quien pagina entrega una función
+
+        obtener_pagina(posicion, cantidad, reverso) -> list
+
+    que retorna hasta `cantidad` platos estrictamente después de `posicion`
+    (o antes, si `reverso`), en el orden del recorrido. `posicion` es None
+    para la primera página.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = 'Cursor inválido'
+
+    def solicitada(self, request):
+        return paginacion_solicitada(request, self)
+
+    def get_page_size(self, request):
+        try:
+            cantidad = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if cantidad <= 0:
+            return self.page_size
+        return min(cantidad, self.max_page_size)
+
+    def paginar(self, request, obtener_pagina):
+        """
+        Retorna la Response paginada: {"next": url, "previous": url, "results": [...]}.
+        """
+        self.request = request
+        cantidad = self.get_page_size(request)
+        posicion, reverso = self.decode_cursor(request)
+
+        platos = obtener_pagina(posicion, cantidad + 1, reverso)
+        hay_mas = len(platos) > cantidad
+        platos = platos[:cantidad]
+
+        if reverso:
+            platos.reverse()
+            hay_anterior, hay_siguiente = hay_mas, posicion is not None
+        else:
+            hay_anterior, hay_siguiente = posicion is not None, hay_mas
+
+        siguiente = anterior = None
+        if platos:
+            if hay_siguiente:
+                siguiente = self.encode_cursor(self._llave(platos[-1]), reverso=False)
+            if hay_anterior:
+                anterior = self.encode_cursor(self._llave(platos[0]), reverso=True)
+
+        return Response({
+            'next': siguiente,
+            'previous': anterior,
+            'results': platos,
+        })
+
+    @staticmethod
+    def _llave(plato):
+        return puntuacion_promedio(plato), plato['id']
+
+    def decode_cursor(self, request):
+        """Retorna ((puntuacion_promedio, id), reverso), o (None, False) sin cursor."""
+        codificado = request.query_params.get(self.cursor_query_param)
+        if codificado is None:
+            return None, False
+        try:
+            datos = parse.parse_qs(b64decode(codificado.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            posicion = (float(datos['p'][0]), int(datos['i'][0]))
+            reverso = bool(int(datos.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return posicion, reverso
+
+    def encode_cursor(self, posicion, reverso):
+        datos = {'p': repr(float(posicion[0])), 'i': posicion[1]}
+        if reverso:
+            datos['r'] = '1'
+        codificado = b64encode(parse.urlencode(datos).encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'offset')
+        return replace_query_param(url, self.cursor_query_param, codificado)
@@ -0,0 +1,429 @@
+"""
+Ranking de platos mantenido en memoria.
+
+En lugar de leer todos los platos con sus ingredientes y recalcular cada
+`puntuacion_total` en cada GET de /api/platos-ordenados/, el ranking se carga
+una vez desde la base de datos y se actualiza de forma incremental mediante
+señales (ver platos/signals.py): al cambiar un Ingrediente solo se vuelven a
+puntuar los platos que lo usan.
+
+Notas:
+- El ranking vive en el proceso. Las señales lo actualizan al confirmarse la
+  transacción, y los cambios de otros procesos se detectan con el sello de
+  versión de la base de datos, que provoca una recarga (ver platos/sello.py).
+  Las operaciones que no emiten señales (QuerySet.update, bulk_create, SQL
+  directo) deben llamar a avanzar_sello().
+- La puntuación de un plato es el promedio de las puntuaciones de sus
+  ingredientes seleccionados. El ranking se ordena por el promedio exacto y el
+  JSON lo muestra redondeado a 2 decimales con round() de Python (la mitad va
+  al par), en ambos modos. Los platos sin ingredientes seleccionados no
+  aparecen en el ranking.
+"""
+
+import threading
+from collections import defaultdict
+from itertools import islice
+
+from django.db.models import Avg, OuterRef, Prefetch, Q, Subquery
+
+from platos.algoritmos.skipListOrdenada import SkipListOrdenada
+from .models import Plato, Ingrediente
+from .sello import leer_sello
+
+CAMPOS_PLATO = ('id', 'nombre', 'descripcion', 'imagen', 'precio')
+CAMPOS_INGREDIENTE = ('id', 'nombre', 'icono', 'puntuacion', 'seleccionado')
+
+
+def puntuacion_promedio(plato):
+    """
+    Promedio exacto (sin redondear) de las puntuaciones de los ingredientes de
+    un plato de platos-ordenados: la llave de orden del ranking.
+    """
+    ingredientes = plato['ingredientes']
+    return sum(ing['puntuacion'] for ing in ingredientes) / len(ingredientes)
+
+
+def construir_plato_ordenado(plato, ingredientes_seleccionados):
+    """
+    Construye la representación JSON de un plato en platos-ordenados.
+
+    Args:
+        plato: Objeto con atributos id, nombre, descripcion, imagen y precio
+        ingredientes_seleccionados: Objetos con atributos nombre, icono y puntuacion
+
+    Returns:
+        dict: Plato con sus ingredientes seleccionados y su puntuación total
+    """
+    puntuacion_total = round(
+        sum(ing.puntuacion for ing in ingredientes_seleccionados) / len(ingredientes_seleccionados), 2
+    )
+    return {
+        "id": plato.id,
+        "nombre": plato.nombre,
+        "descripcion": plato.descripcion,
+        "imagen": plato.imagen,
+        "precio": plato.precio,
+        "ingredientes": [
+            {"nombre": ing.nombre, "icono": ing.icono, "puntuacion": ing.puntuacion}
+            for ing in ingredientes_seleccionados
+        ],
+        "puntuacion_total": puntuacion_total
+    }
+
+
+def recalcular_puntuaciones(platos=None):
+    """
+    Recalcula la columna Plato.puntuacion_promedio con un solo UPDATE.
+
+    La llaman las señales (ver platos/signals.py) dentro de la misma
+    transacción que el cambio. Tras operaciones que no emiten señales
+    (QuerySet.update, bulk_create, SQL directo) hay que llamarla a mano, junto
+    con avanzar_sello().
+
+    Args:
+        platos: Ids de los platos a recalcular (lista o QuerySet de ids);
+                None recalcula todos
+    """
+    relacion = Plato.ingredientes.through.objects.filter(plato_id=OuterRef('pk'), ingrediente__seleccionado=True)
+    promedio = relacion.order_by().values('plato_id').annotate(promedio=Avg('ingrediente__puntuacion'))
+    queryset = Plato.objects.all() if platos is None else Plato.objects.filter(pk__in=platos)
+    queryset.update(puntuacion_promedio=Subquery(promedio.values('promedio')))
+
+
+def platos_puntuados_queryset():
+    """
+    QuerySet de platos puntuados y ordenados en la base de datos.
+
+    Usa la columna desnormalizada puntuacion_promedio (el promedio exacto de
+    los ingredientes seleccionados, NULL si no hay ninguno), indexada por
+    (-puntuacion_promedio, id): el orden y la llave de la paginación son un
+    recorrido del índice, sin agregar la relación Plato x Ingrediente en cada
+    consulta. El promedio no se redondea en SQL: el ROUND de la base de datos
+    no redondea igual que round() de Python, así que el redondeo se hace al
+    serializar (construir_plato_ordenado).
+    """
+    return (
+        Plato.objects
+        .filter(puntuacion_promedio__isnull=False)
+        .order_by('-puntuacion_promedio', 'id')
+    )
+
+
+def consultar_ranking_sql(offset=0, limite=None, queryset=None):
+    """
+    Retorna una página del ranking calculada en la base de datos.
+
+    Solo se materializan los platos de la página (más una consulta para sus
+    ingredientes seleccionados). El JSON de cada plato es el mismo que el del
+    ranking en memoria.
+
+    Args:
+        offset (int): Cantidad de platos a saltar
+        limite (int): Cantidad máxima de platos a retornar (None = todos)
+        queryset: QuerySet base (por defecto, platos_puntuados_queryset())
+
+    Returns:
+        list: Platos de la página, en orden
+    """
+    if queryset is None:
+        queryset = platos_puntuados_queryset()
+    queryset = queryset.prefetch_related(Prefetch(
+        'ingredientes',
+        queryset=Ingrediente.objects.filter(seleccionado=True).order_by('id'),
+        to_attr='ingredientes_seleccionados',
+    ))
+    pagina = queryset[offset:offset + limite] if limite is not None else queryset[offset:]
+    return [construir_plato_ordenado(plato, plato.ingredientes_seleccionados) for plato in pagina]
+
+
+def consultar_ranking_sql_desde(posicion, cantidad, reverso=False):
+    """
+    Página del ranking en SQL usando la llave (promedio exacto, id) en lugar de OFFSET.
+
+    La llave es la de plato_ranking_idx, así que la condición es un WHERE que
+    la base de datos resuelve buscando en el índice: el costo es el de la
+    página, no el de su profundidad.
+
+    Args:
+        posicion: Tupla (puntuacion_promedio, id) del borde de la página anterior, o None
+        cantidad (int): Cantidad máxima de platos
+        reverso (bool): Si es True, retorna los platos anteriores a `posicion`
+                        (del más cercano al más lejano)
+    """
+    queryset = platos_puntuados_queryset()
+    if reverso:
+        queryset = queryset.order_by('puntuacion_promedio', '-id')
+    if posicion is not None:
+        puntuacion, plato_id = posicion
+        # Escrito como rango sobre la primera columna del índice más un filtro,
+        # para que la base de datos recorra el índice en orden (con un OR de
+        # dos rangos, SQLite une dos búsquedas y vuelve a ordenar)
+        if reverso:
+            queryset = queryset.filter(
+                Q(puntuacion_promedio__gte=puntuacion), Q(puntuacion_promedio__gt=puntuacion) | Q(id__lt=plato_id)
+            )
+        else:
+            queryset = queryset.filter(
+                Q(puntuacion_promedio__lte=puntuacion), Q(puntuacion_promedio__lt=puntuacion) | Q(id__gt=plato_id)
+            )
+    return consultar_ranking_sql(limite=cantidad, queryset=queryset)
+
+
+class _Registro:
+    """Copia liviana de una fila (Plato o Ingrediente) con acceso por atributos."""
+
+    def __init__(self, **campos):
+        self.__dict__.update(campos)
+
+
+def _copiar(instancia, campos):
+    """Copia los campos de una instancia normalizados como los devuelve la base de datos."""
+    return _Registro(**{
+        campo: instancia._meta.get_field(campo).to_python(getattr(instancia, campo))
+        for campo in campos
+    })
+
+
+class RankingPlatos:
+    """
+    Ranking de platos por puntuación total, residente en memoria.
+
+    Estructuras:
+    - platos: {plato_id: _Registro}
+    - ingredientes: {ingrediente_id: _Registro}
+    - ingredientes_por_plato: {plato_id: [ingrediente_id, ...]}
+    - platos_por_ingrediente: {ingrediente_id: {plato_id, ...}} (índice inverso)
+    - lista: SkipListOrdenada con los platos puntuados
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cargado = False
+        self._sello = None
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._platos = {}
+        self._ingredientes = {}
+        self._ingredientes_por_plato = {}
+        self._platos_por_ingrediente = defaultdict(set)
+        self._lista = SkipListOrdenada()
+
+    # ------------------------------------------------------------------
+    # Carga y lectura
+    # ------------------------------------------------------------------
+
+    def cargar(self):
+        """Carga el ranking completo desde la base de datos (cuatro consultas)."""
+        with self._lock:
+            self._reiniciar()
+            # Antes que los datos: si otro proceso los cambia mientras tanto,
+            # la próxima lectura vuelve a cargar
+            self._sello = leer_sello()
+            for fila in Plato.objects.values(*CAMPOS_PLATO):
+                self._platos[fila['id']] = _Registro(**fila)
+                self._ingredientes_por_plato[fila['id']] = []
+            for fila in Ingrediente.objects.values(*CAMPOS_INGREDIENTE):
+                self._ingredientes[fila['id']] = _Registro(**fila)
+
+            relacion = Plato.ingredientes.through.objects.order_by('id')
+            for plato_id, ingrediente_id in relacion.values_list('plato_id', 'ingrediente_id'):
+                self._ingredientes_por_plato[plato_id].append(ingrediente_id)
+                self._platos_por_ingrediente[ingrediente_id].add(plato_id)
+
+            for plato_id in self._platos:
+                self._puntuar(plato_id)
+            self._cargado = True
+
+    def invalidar(self):
+        """Descarta el ranking; se recarga desde la base de datos en la próxima lectura."""
+        with self._lock:
+            self._cargado = False
+            self._sello = None
+            self._reiniciar()
+
+    def _comprobar_sello(self, sello):
+        """Carga el ranking si no está cargado o si otro proceso cambió los datos (llamar con el lock)."""
+        if not self._cargado or sello != self._sello:
+            self.cargar()
+
+    def platos_ordenados(self):
+        """Retorna la lista de platos ordenada por puntuación total (mayor primero)."""
+        sello = leer_sello()
+        with self._lock:
+            self._comprobar_sello(sello)
+            return list(self._lista)
+
+    def platos_desde(self, posicion, cantidad, reverso=False):
+        """
+        Retorna hasta `cantidad` platos estrictamente después de `posicion`.
+
+        Args:
+            posicion: Tupla (puntuacion_promedio, id), o None para empezar por un extremo
+            cantidad (int): Cantidad máxima de platos
+            reverso (bool): Si es True, recorre hacia atrás (platos anteriores)
+
+        Costo: O(log n + cantidad), independiente de la profundidad de la página.
+        """
+        sello = leer_sello()
+        with self._lock:
+            self._comprobar_sello(sello)
+            if posicion is None:
+                platos = reversed(self._lista) if reverso else iter(self._lista)
+            else:
+                platos = self._lista.desde(posicion[0], posicion[1], reverso=reverso)
+            return list(islice(platos, cantidad))
+
+    @property
+    def cargado(self):
+        return self._cargado
+
+    @property
+    def sello(self):
+        """Sello de la base de datos al que corresponde el ranking (None si no está cargado)."""
+        return self._sello
+
+    # ------------------------------------------------------------------
+    # Actualizaciones incrementales (llamadas desde platos/signals.py)
+    # ------------------------------------------------------------------
+
+    def aplicar_confirmado(self, anterior, nuevo, cambio):
+        """
+        Aplica un cambio ya confirmado en la base de datos (desde transaction.on_commit).
+
+        Solo se aplica si el ranking está en el sello `anterior`; si ya
+        incluye el cambio (se recargó después del commit) no hace nada, y si
+        le falta otro cambio intermedio se invalida.
+
+        Args:
+            anterior, nuevo: Sellos antes y después del cambio (ver avanzar_sello)
+            cambio: Función sin argumentos que actualiza el ranking
+        """
+        with self._lock:
+            if not self._cargado or self._sello >= nuevo:
+                return
+            if self._sello != anterior:
+                self.invalidar()
+                return
+            cambio()
+            self._sello = nuevo
+
+    def actualizar_ingrediente(self, ingrediente):
+        """Actualiza un ingrediente y vuelve a puntuar solo los platos que lo usan."""
+        with self._lock:
+            if not self._cargado:
+                return
+            self._ingredientes[ingrediente.pk] = _copiar(ingrediente, CAMPOS_INGREDIENTE)
+            for plato_id in self._platos_por_ingrediente.get(ingrediente.pk, ()):
+                self._puntuar(plato_id)
+
+    def eliminar_ingrediente(self, ingrediente_id):
+        with self._lock:
+            if not self._cargado:
+                return
+            self._ingredientes.pop(ingrediente_id, None)
+            for plato_id in self._platos_por_ingrediente.pop(ingrediente_id, set()):
+                self._ingredientes_por_plato[plato_id] = [
+                    ing_id for ing_id in self._ingredientes_por_plato[plato_id] if ing_id != ingrediente_id
+                ]
+                self._puntuar(plato_id)
+
+    def actualizar_plato(self, plato):
+        with self._lock:
+            if not self._cargado:
+                return
+            self._platos[plato.pk] = _copiar(plato, CAMPOS_PLATO)
+            self._ingredientes_por_plato.setdefault(plato.pk, [])
+            self._puntuar(plato.pk)
+
+    def eliminar_plato(self, plato_id):
+        with self._lock:
+            if not self._cargado:
+                return
+            self._platos.pop(plato_id, None)
+            for ingrediente_id in self._ingredientes_por_plato.pop(plato_id, []):
+                self._platos_por_ingrediente[ingrediente_id].discard(plato_id)
+            if plato_id in self._lista:
+                self._lista.eliminar(plato_id)
+
+    def agregar_relaciones(self, pares):
+        """
+        Registra relaciones plato-ingrediente nuevas.
+
+        Args:
+            pares: Iterable de tuplas (plato_id, ingrediente_id)
+        """
+        with self._lock:
+            if not self._cargado:
+                return
+            afectados = set()
+            for plato_id, ingrediente_id in pares:
+                if plato_id not in self._platos:
+                    continue
+                if ingrediente_id not in self._ingredientes:
+                    self._cargar_ingrediente(ingrediente_id)
+                if ingrediente_id not in self._ingredientes_por_plato[plato_id]:
+                    self._ingredientes_por_plato[plato_id].append(ingrediente_id)
+                self._platos_por_ingrediente[ingrediente_id].add(plato_id)
+                afectados.add(plato_id)
+            for plato_id in afectados:
+                self._puntuar(plato_id)
+
+    def quitar_relaciones(self, pares):
+        """
+        Elimina relaciones plato-ingrediente.
+
+        Args:
+            pares: Iterable de tuplas (plato_id, ingrediente_id)
+        """
+        with self._lock:
+            if not self._cargado:
+                return
+            afectados = set()
+            for plato_id, ingrediente_id in pares:
+                if plato_id not in self._ingredientes_por_plato:
+                    continue
+                self._ingredientes_por_plato[plato_id] = [
+                    ing_id for ing_id in self._ingredientes_por_plato[plato_id] if ing_id != ingrediente_id
+                ]
+                self._platos_por_ingrediente[ingrediente_id].discard(plato_id)
+                afectados.add(plato_id)
+            for plato_id in afectados:
+                self._puntuar(plato_id)
+
+    def platos_con_ingrediente(self, ingrediente_id):
+        with self._lock:
+            return set(self._platos_por_ingrediente.get(ingrediente_id, ()))
+
+    def ingredientes_de_plato(self, plato_id):
+        with self._lock:
+            return list(self._ingredientes_por_plato.get(plato_id, ()))
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _cargar_ingrediente(self, ingrediente_id):
+        fila = Ingrediente.objects.filter(pk=ingrediente_id).values(*CAMPOS_INGREDIENTE).first()
+        if fila is not None:
+            self._ingredientes[ingrediente_id] = _Registro(**fila)
+
+    def _puntuar(self, plato_id):
+        """Recalcula la puntuación de un plato y lo reubica en la lista (O(grado + log n))."""
+        plato = self._platos.get(plato_id)
+        seleccionados = [
+            self._ingredientes[ing_id]
+            for ing_id in self._ingredientes_por_plato.get(plato_id, ())
+            if ing_id in self._ingredientes and self._ingredientes[ing_id].seleccionado
+        ]
+        if plato is None or not seleccionados:
+            if plato_id in self._lista:
+                self._lista.eliminar(plato_id)
+            return
+        plato_dict = construir_plato_ordenado(plato, seleccionados)
+        # Por promedio exacto, como en SQL; a igual promedio, por id (el orden
+        # de lectura de la tabla)
+        self._lista.insertar_ordenado(plato_dict, puntuacion_promedio(plato_dict), orden=plato_id, clave=plato_id)
+
+
+ranking_platos = RankingPlatos()
@@ -0,0 +1,48 @@
+"""
+Sello de versión de los platos e ingredientes, compartido entre procesos.
+
+El ranking (platos/ranking.py) y el grafo de la base de datos (platos/grafo.py)
+viven en la memoria de cada proceso. Para que un cambio hecho en un worker se
+vea en los demás:
+
+- Cada señal que cambia los datos avanza el sello (una fila de VersionDatos)
+  dentro de la misma transacción, y deja para `transaction.on_commit` la
+  actualización en memoria, que se aplica solo si la estructura estaba en el
+  sello anterior. Si la transacción se revierte, ni el sello ni la memoria
+  cambian.
+- Cada lectura compara el sello de la estructura con el de la base de datos
+  (una consulta por la clave única) y la recarga si otro proceso lo movió.
+
+Las operaciones que no emiten señales (QuerySet.update, bulk_create, SQL
+directo) deben llamar a avanzar_sello() para que los procesos recarguen.
+"""
+
+from django.db.models import F
+
+from .models import VersionDatos
+
+NOMBRE_SELLO = 'platos'
+
+
+def leer_sello():
+    """Valor actual del sello (0 si todavía no existe la fila)."""
+    valor = VersionDatos.objects.filter(nombre=NOMBRE_SELLO).values_list('valor', flat=True).first()
+    return valor or 0
+
+
+def avanzar_sello():
+    """
+    Avanza el sello en la transacción actual.
+
+    El UPDATE bloquea la fila hasta el final de la transacción, así que dos
+    transacciones que cambian los datos obtienen sellos consecutivos.
+
+    Returns:
+        tuple: (sello anterior, sello nuevo)
+    """
+    consulta = VersionDatos.objects.filter(nombre=NOMBRE_SELLO)
+    if not consulta.update(valor=F('valor') + 1):
+        VersionDatos.objects.get_or_create(nombre=NOMBRE_SELLO)
+        consulta.update(valor=F('valor') + 1)
+    nuevo = leer_sello()
+    return nuevo - 1, nuevo
@@ -0,0 +1,115 @@
+"""
+Señales que mantienen actualizados en memoria el ranking de platos
+(platos/ranking.py) y el grafo de recetas de la base de datos (platos/grafo.py),
+y la columna desnormalizada Plato.puntuacion_promedio.
+
+La columna y el sello de versión (platos/sello.py) se actualizan en la misma
+transacción que el cambio; las estructuras en memoria, solo cuando la
+transacción se confirma (transaction.on_commit). Una transacción revertida no
+deja platos ni aristas fantasma en memoria.
+"""
+
+import copy
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Plato, Ingrediente
+from .grafo import grafo_platos_bd
+from .ranking import ranking_platos, recalcular_puntuaciones
+from .sello import avanzar_sello
+
+
+def _platos_con_ingrediente(ingrediente_id):
+    return Plato.objects.filter(ingredientes=ingrediente_id).values('pk')
+
+
+def _al_confirmar(cambio):
+    """
+    Avanza el sello y programa `cambio(estructura)` para el ranking y el grafo
+    cuando se confirme la transacción.
+    """
+    anterior, nuevo = avanzar_sello()
+
+    def aplicar():
+        for estructura in (ranking_platos, grafo_platos_bd):
+            estructura.aplicar_confirmado(anterior, nuevo, lambda: cambio(estructura))
+
+    transaction.on_commit(aplicar)
+
+
+@receiver(post_save, sender=Ingrediente)
+def ingrediente_guardado(sender, instance, **kwargs):
+    # Solo se vuelven a puntuar los platos que usan este ingrediente
+    recalcular_puntuaciones(_platos_con_ingrediente(instance.pk))
+    # Copia: la instancia puede cambiar antes del commit
+    ingrediente = copy.copy(instance)
+    _al_confirmar(lambda estructura: estructura.actualizar_ingrediente(ingrediente))
+
+
+@receiver(pre_delete, sender=Ingrediente)
+def ingrediente_por_eliminar(sender, instance, **kwargs):
+    # Las filas de la relación se borran en cascada: después ya no se sabe
+    # qué platos lo usaban
+    instance._platos_afectados = list(_platos_con_ingrediente(instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Ingrediente)
+def ingrediente_eliminado(sender, instance, **kwargs):
+    recalcular_puntuaciones(getattr(instance, '_platos_afectados', []))
+    ingrediente_id = instance.pk
+    _al_confirmar(lambda estructura: estructura.eliminar_ingrediente(ingrediente_id))
+
+
+@receiver(post_save, sender=Plato)
+def plato_guardado(sender, instance, **kwargs):
+    plato = copy.copy(instance)
+    _al_confirmar(lambda estructura: estructura.actualizar_plato(plato))
+
+
+@receiver(post_delete, sender=Plato)
+def plato_eliminado(sender, instance, **kwargs):
+    plato_id = instance.pk
+    _al_confirmar(lambda estructura: estructura.eliminar_plato(plato_id))
+
+
+@receiver(m2m_changed, sender=Plato.ingredientes.through)
+def ingredientes_de_plato_cambiados(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Cambios en la relación Plato.ingredientes, en ambas direcciones:
+    - reverse=False: instance es un Plato y pk_set son ids de Ingrediente
+    - reverse=True: instance es un Ingrediente y pk_set son ids de Plato
+    """
+    # Columna puntuacion_promedio de los platos afectados (en la misma transacción)
+    if action == 'pre_clear' and reverse:
+        instance._platos_afectados = list(_platos_con_ingrediente(instance.pk).values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            recalcular_puntuaciones([instance.pk])
+        elif action == 'post_clear':
+            recalcular_puntuaciones(getattr(instance, '_platos_afectados', []))
+        else:
+            recalcular_puntuaciones(pk_set)
+
+    if action in ('post_add', 'post_remove'):
+        if reverse:
+            pares = [(plato_id, instance.pk) for plato_id in pk_set]
+        else:
+            pares = [(instance.pk, ingrediente_id) for ingrediente_id in pk_set]
+        if action == 'post_add':
+            _al_confirmar(lambda estructura: estructura.agregar_relaciones(pares))
+        else:
+            _al_confirmar(lambda estructura: estructura.quitar_relaciones(pares))
+    elif action == 'post_clear':
+        instancia_id = instance.pk
+
+        def quitar_todas(estructura):
+            # Cada estructura sabe qué relaciones tenía
+            if reverse:
+                pares = [(plato_id, instancia_id) for plato_id in estructura.platos_con_ingrediente(instancia_id)]
+            else:
+                pares = [(instancia_id, ing_id) for ing_id in estructura.ingredientes_de_plato(instancia_id)]
+            estructura.quitar_relaciones(pares)
+
+        _al_confirmar(quitar_todas)
@@ -1,3 +1,1321 @@
-from django.test import TestCase
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from platos.algoritmos.cacheLRU import CacheLRUVersionada
+from platos.algoritmos.grafoBusquedaReceta import BipartiteDirectedGraph, Vertex, Edge, build_graph_desde_db
+from platos.algoritmos.grafoCompacto import GrafoCompacto
+from platos.algoritmos.grafoCompilado import GrafoCompilado
+from platos.algoritmos.instantaneaGrafo import (
+    abrir_instantanea, cargar_instantanea, guardar_instantanea, huella_archivo,
+    CompiladoMapeado, GrafoMapeado, InstantaneaInvalida,
+)
+from platos.algoritmos.matrizIncidencia import HAY_NUMPY
+from platos.algoritmos.registro import LOGGER_TIEMPOS, FiltroMuestreo, medir, tiempos
+from platos.algoritmos.indiceIngredientes import IndiceInvertidoPlatos, coincide_flexible
+from platos.algoritmos.skipListOrdenada import SkipListOrdenada
+from platos.catalogo import CatalogoPlatos
+from platos.grafo import GrafoPlatosBD, grafo_platos_bd
+from platos.models import Plato, Ingrediente
+from platos.ranking import (
+    ranking_platos, construir_plato_ordenado, consultar_ranking_sql, consultar_ranking_sql_desde, puntuacion_promedio,
+    recalcular_puntuaciones,
+)
+from platos.sello import avanzar_sello, leer_sello
+
+
+class SkipListOrdenadaTests(TestCase):
+    def test_orden_y_consultas_coinciden_con_referencia(self):
+        aleatorio = random.Random(7)
+        lista = SkipListOrdenada(semilla=7)
+        referencia = {}
+        for secuencia in range(2000):
+            if referencia and aleatorio.random() < 0.3:
+                clave = aleatorio.choice(list(referencia))
+                lista.eliminar(clave)
+                del referencia[clave]
+            else:
+                clave = aleatorio.randrange(300)
+                puntuacion = aleatorio.randrange(10) / 2
+                lista.insertar_ordenado({'id': clave, 'nombre': str(clave)}, puntuacion)
+                referencia[clave] = (-puntuacion, secuencia)
+
+        esperado = sorted(referencia, key=referencia.get)
+        self.assertEqual([p['id'] for p in lista], esperado)
+        self.assertEqual([p['id'] for p in reversed(lista)], esperado[::-1])
+        self.assertEqual([p['id'] for p in lista.top_k(5)], esperado[:5])
+        self.assertEqual([p['id'] for p in lista.rango(10, 20, reverso=True)], esperado[10:20][::-1])
+        for posicion, clave in enumerate(esperado):
+            self.assertEqual(lista.posicion(clave), posicion)
+            self.assertEqual(lista.en_posicion(posicion).plato['id'], clave)
+
+    def test_empates_conservan_orden_de_insercion(self):
+        lista = SkipListOrdenada()
+        for clave, puntuacion in [(1, 3), (2, 5), (3, 3), (4, 5)]:
+            lista.insertar_ordenado({'id': clave, 'nombre': str(clave)}, puntuacion)
+        self.assertEqual([p['id'] for p in lista], [2, 4, 1, 3])
+        self.assertEqual(lista.cabeza.plato['id'], 2)
+        self.assertEqual(lista.cola.plato['id'], 3)
+        self.assertEqual([p['id'] for p in lista.rango_puntuacion(3, 4)], [1, 3])
+
+
+class FiltroMuestreoTests(TestCase):
+    def test_cuenta_descartados_con_argumentos_de_ambos_tipos(self):
+        filtro = FiltroMuestreo(maximo=1, intervalo=10.0)
+        for mensaje, argumentos in (('%s', (3,)), ('%(x)s', ({'x': 3},))):
+            registros = [logging.LogRecord('platos.prueba', logging.DEBUG, __file__, 1, mensaje, argumentos, None)
+                         for _ in range(3)]
+            with mock.patch('platos.algoritmos.registro.time.monotonic', side_effect=[0.0, 1.0, 20.0]):
+                self.assertEqual([filtro.filter(registro) for registro in registros], [True, False, True])
+            self.assertEqual(registros[2].getMessage(), '3 [1 mensajes similares omitidos]')
+
+    def test_medir_muestrea_cada_fase_por_separado(self):
+        filtro = FiltroMuestreo(maximo=2, intervalo=10.0)
+        logger_tiempos = logging.getLogger(LOGGER_TIEMPOS)
+        logger_tiempos.addFilter(filtro)
+        self.addCleanup(logger_tiempos.removeFilter, filtro)
+        tiempos.reiniciar()
+        self.addCleanup(tiempos.reiniciar)
+        with self.assertLogs(LOGGER_TIEMPOS, logging.DEBUG) as registros:
+            for _ in range(5):
+                with medir('fase.caliente'):
+                    pass
+            with medir('fase.fria'):
+                pass
+        fases = [registro.args[0] for registro in registros.records]
+        self.assertEqual(fases, ['fase.caliente', 'fase.caliente', 'fase.fria'])
+
+        resumen = self.client.get('/api/grafo/monitoreo/').json()['tiempos']
+        self.assertEqual(set(resumen), {'fase.caliente', 'fase.fria'})
+        self.assertEqual(resumen['fase.caliente']['cantidad'], 5)
+        self.assertEqual(resumen['fase.fria']['cantidad'], 1)
+
+
+def _ranking_recalculado():
+    """Ranking calculado desde cero, como lo hacía platos-ordenados originalmente."""
+    platos = []
+    for plato in Plato.objects.prefetch_related('ingredientes').order_by('id'):
+        seleccionados = [ing for ing in plato.ingredientes.order_by('id') if ing.seleccionado]
+        if seleccionados:
+            platos.append(construir_plato_ordenado(plato, seleccionados))
+    return sorted(platos, key=lambda p: -puntuacion_promedio(p))
+
+
+class RankingPlatosTests(TestCase):
+    def setUp(self):
+        ranking_platos.invalidar()
+        self.ingredientes = [
+            Ingrediente.objects.create(nombre=f'ing{i}', puntuacion=i % 5, seleccionado=i % 2 == 0)
+            for i in range(8)
+        ]
+        self.platos = []
+        for i in range(6):
+            plato = Plato.objects.create(nombre=f'plato{i}', imagen='', descripcion='', puntuacion=5, precio='10.00')
+            plato.ingredientes.set(self.ingredientes[i:i + 3])
+            self.platos.append(plato)
+        ranking_platos.cargar()
+
+    def _assert_ranking_actualizado(self):
+        # Los cambios se aplicaron en memoria al confirmar, sin recargar
+        self.assertEqual(ranking_platos.sello, leer_sello())
+        self.assertEqual(ranking_platos.platos_ordenados(), _ranking_recalculado())
+        # La columna desnormalizada del modo SQL sigue a los mismos cambios
+        columna = dict(Plato.objects.filter(puntuacion_promedio__isnull=False)
+                       .values_list('id', 'puntuacion_promedio'))
+        self.assertEqual(columna, {p['id']: puntuacion_promedio(p) for p in _ranking_recalculado()})
+
+    def test_vista_retorna_ranking(self):
+        respuesta = self.client.get('/api/platos-ordenados/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([p['id'] for p in respuesta.json()], [p['id'] for p in _ranking_recalculado()])
+
+    def test_cambios_de_ingrediente_actualizan_el_ranking(self):
+        self._assert_ranking_actualizado()
+        ingrediente = self.ingredientes[3]
+        ingrediente.seleccionado = True
+        ingrediente.puntuacion = 9
+        with self.captureOnCommitCallbacks(execute=True):
+            ingrediente.save()
+        self._assert_ranking_actualizado()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredientes[0].delete()
+        self._assert_ranking_actualizado()
+
+    def test_cambios_en_la_relacion_actualizan_el_ranking(self):
+        self._assert_ranking_actualizado()
+        cambios = [
+            lambda: self.platos[0].ingredientes.add(self.ingredientes[6]),
+            lambda: self.platos[1].ingredientes.remove(self.ingredientes[2]),
+            lambda: self.ingredientes[4].platos.clear(),
+            lambda: self.platos[2].ingredientes.clear(),
+            lambda: self.platos[3].delete(),
+        ]
+        for cambio in cambios:
+            with self.captureOnCommitCallbacks(execute=True):
+                cambio()
+            self._assert_ranking_actualizado()
+
+    def test_transaccion_revertida_no_cambia_la_memoria(self):
+        antes = ranking_platos.platos_ordenados()
+        grafo = grafo_platos_bd.obtener()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                plato = Plato.objects.create(nombre='fantasma', imagen='', descripcion='', puntuacion=5,
+                                             precio='1.00')
+                plato.ingredientes.add(self.ingredientes[0])
+                self.ingredientes[2].delete()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        # Ni el sello ni las estructuras cambiaron: no hace falta recargar
+        self.assertEqual((ranking_platos.sello, grafo_platos_bd.sello), (leer_sello(), leer_sello()))
+        self.assertEqual(ranking_platos.platos_ordenados(), antes)
+        self.assertIs(grafo_platos_bd.obtener(), grafo)
+        self.assertNotIn(Vertex('fantasma', 'receta'), grafo.recetas)
+
+    def test_cambios_de_otro_proceso_recargan_por_el_sello(self):
+        grafo_platos_bd.obtener()
+        # Otro proceso: cambios sin señales en este, más el sello avanzado
+        Ingrediente.objects.filter(pk=self.ingredientes[3].pk).update(seleccionado=True, puntuacion=9)
+        Plato.objects.filter(pk=self.platos[0].pk).update(nombre='renombrado')
+        recalcular_puntuaciones()
+        avanzar_sello()
+        self.assertEqual(ranking_platos.platos_ordenados(), _ranking_recalculado())
+        self.assertIn(Vertex('renombrado', 'receta'), grafo_platos_bd.obtener().recetas)
+        self.assertEqual((ranking_platos.sello, grafo_platos_bd.sello), (leer_sello(), leer_sello()))
+
+    def test_modo_sql_coincide_con_el_ranking_en_memoria(self):
+        self.ingredientes[1].seleccionado = True
+        self.ingredientes[1].save()
+        esperado = ranking_platos.platos_ordenados()
+        self.assertEqual(consultar_ranking_sql(), esperado)
+        self.assertEqual(consultar_ranking_sql(offset=1, limite=2), esperado[1:3])
+        respuesta = self.client.get('/api/platos-ordenados/', {'modo': 'sql', 'limit': 2, 'offset': 1})
+        self.assertEqual(respuesta.json(), self.client.get('/api/platos-ordenados/').json()[1:3])
+
+    def test_paginas_sql_sin_agregar_la_relacion(self):
+        primera = consultar_ranking_sql_desde(None, 2)
+        with CaptureQueriesContext(connection) as consultas:
+            pagina = consultar_ranking_sql_desde((puntuacion_promedio(primera[-1]), primera[-1]['id']), 2)
+        self.assertEqual(pagina, ranking_platos.platos_ordenados()[2:4])
+        sql = consultas.captured_queries[0]['sql']
+        self.assertIn('"puntuacion_promedio" <', sql)
+        self.assertNotIn('GROUP BY', sql)
+        self.assertNotIn('HAVING', sql)
+
+    def test_redondeo_igual_en_sql_y_en_memoria(self):
+        def plato_con(nombre, puntuaciones):
+            plato = Plato.objects.create(nombre=nombre, imagen='', descripcion='', puntuacion=5, precio='1.00')
+            for i, puntuacion in enumerate(puntuaciones):
+                plato.ingredientes.add(Ingrediente.objects.create(nombre=f'{nombre}{i}', puntuacion=puntuacion,
+                                                                  seleccionado=True))
+            return plato
+
+        # 36 / 17 = 2.1176... y 17 / 8 = 2.125: ambos se muestran como 2.12 con
+        # round() de Python (ROUND de SQLite daría 2.13 al segundo), y se
+        # ordenan por el promedio exacto
+        menor = plato_con('menor', [3, 3] + [2] * 15)
+        mayor = plato_con('mayor', [3] + [2] * 7)
+
+        esperado = ranking_platos.platos_ordenados()
+        self.assertEqual(consultar_ranking_sql(), esperado)
+        por_id = {p['id']: p for p in esperado}
+        self.assertEqual((por_id[menor.id]['puntuacion_total'], por_id[mayor.id]['puntuacion_total']), (2.12, 2.12))
+        ids = [p['id'] for p in esperado]
+        self.assertLess(ids.index(mayor.id), ids.index(menor.id))
+        for modo in ('memoria', 'sql'):
+            adelante, atras = self._recorrer_paginas({'modo': modo, 'page_size': 2})
+            self.assertEqual(adelante, esperado)
+            self.assertEqual(atras, esperado)
+
+    def _recorrer_paginas(self, parametros):
+        platos, paginas_previas = [], []
+        respuesta = self.client.get('/api/platos-ordenados/', parametros).json()
+        while True:
+            platos.extend(respuesta['results'])
+            paginas_previas.append(respuesta['previous'])
+            if respuesta['next'] is None:
+                break
+            respuesta = self.client.get(respuesta['next']).json()
+        # Volver hacia atrás desde la última página
+        hacia_atras = respuesta['results']
+        while respuesta['previous'] is not None:
+            respuesta = self.client.get(respuesta['previous']).json()
+            hacia_atras = respuesta['results'] + hacia_atras
+        return platos, hacia_atras
+
+    def test_paginacion_por_cursor_del_ranking(self):
+        for i in range(6, 20):
+            plato = Plato.objects.create(nombre=f'plato{i}', imagen='', descripcion='', puntuacion=5, precio='10.00')
+            plato.ingredientes.set(self.ingredientes[i % 5:i % 5 + 2])
+        esperado = self.client.get('/api/platos-ordenados/').json()
+        for modo in ('memoria', 'sql'):
+            adelante, atras = self._recorrer_paginas({'modo': modo, 'page_size': 3})
+            self.assertEqual(adelante, esperado)
+            self.assertEqual(atras, esperado)
+
+    def test_paginacion_por_cursor_de_ingredientes(self):
+        respuesta = self.client.get('/api/ingredientes/', {'page_size': 5}).json()
+        ids = [ing['id'] for ing in respuesta['results']]
+        respuesta = self.client.get(respuesta['next']).json()
+        ids += [ing['id'] for ing in respuesta['results']]
+        self.assertEqual(ids, sorted(ing.id for ing in self.ingredientes))
+        self.assertIsNone(respuesta['next'])
+        # Sin parámetros de paginación la lista sigue siendo completa
+        self.assertEqual(len(self.client.get('/api/ingredientes/').json()), len(self.ingredientes))
+
+
+RUTA_PLATOS_DB = os.path.join(os.path.dirname(__file__), '..', 'platos_database.json')
+
+
+def _buscar_platos_referencia(platos_db, ingredientes_buscados):
+    """Búsqueda flexible original de SmartMeal (recorre todos los platos)."""
+    platos_coincidentes = []
+    for plato in platos_db:
+        if not plato.get('disponible', True):
+            continue
+        ingredientes_plato = [ing.lower() for ing in plato.get('ingredientes', [])]
+        coincidencias = 0
+        ingredientes_encontrados = []
+        for ing_buscado in ingredientes_buscados:
+            ing_buscado_lower = ing_buscado.lower().strip()
+            for ing_plato in ingredientes_plato:
+                if (ing_buscado_lower in ing_plato or
+                    ing_plato in ing_buscado_lower or
+                    any(palabra in ing_plato for palabra in ing_buscado_lower.split()) or
+                    any(palabra in ing_buscado_lower for palabra in ing_plato.split())):
+                    coincidencias += 1
+                    ingredientes_encontrados.append(ing_plato)
+                    break
+        if coincidencias > 0:
+            score_relevancia = (coincidencias / len(ingredientes_buscados)) * plato.get('puntuacion', 4.0)
+            platos_coincidentes.append({
+                "id": plato["id"],
+                "ingredientes_coincidentes": ingredientes_encontrados,
+                "total_coincidencias": coincidencias,
+                "score_relevancia": round(score_relevancia, 2),
+                "porcentaje_coincidencia": round((coincidencias / len(ingredientes_buscados)) * 100, 2)
+            })
+    platos_coincidentes.sort(key=lambda x: (x['score_relevancia'], x['total_coincidencias']), reverse=True)
+    return platos_coincidentes[:10]
+
+
+class BusquedaPlatosSmartMealTests(TestCase):
+    CONSULTAS = [
+        ['pollo', 'arroz', 'ajo', 'cebolla'],
+        ['Arroz blanco'],
+        ['carne de res', 'papa'],
+        ['  Queso  ', 'tomate', 'pan artesanal'],
+        ['a'],
+        ['de'],
+        [''],
+        ['leche de coco', 'coco'],
+        ['xyz inexistente'],
+        ['huevo', 'huevos', 'Huevos pericos'],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        with open(RUTA_PLATOS_DB, encoding='utf-8') as archivo:
+            cls.platos_db = json.load(archivo)
+
+    def test_indice_coincide_con_la_busqueda_original(self):
+        indice = IndiceInvertidoPlatos(self.platos_db)
+        campos = ('id', 'ingredientes_coincidentes', 'total_coincidencias',
+                  'score_relevancia', 'porcentaje_coincidencia')
+        for consulta in self.CONSULTAS:
+            obtenido = [{campo: plato[campo] for campo in campos} for plato in indice.buscar(consulta)]
+            self.assertEqual(obtenido, _buscar_platos_referencia(self.platos_db, consulta), consulta)
+
+    def test_trigramas_resuelven_igual_que_la_regla_flexible(self):
+        indice = IndiceInvertidoPlatos(self.platos_db + [
+            {'id': 99, 'nombre': 'Raro', 'descripcion': '', 'ingredientes': ['', '  ', 'sal', 'a b']}
+        ])
+        aleatorio = random.Random(3)
+        terminos = {'', 'a', 'ab', 'sal', 'pan', 'a b', 'arroz  blanco', 'pollo asado', 'xyz'}
+        for ingrediente in indice.vocabulario:
+            for _ in range(3):
+                inicio = aleatorio.randrange(len(ingrediente) + 1)
+                fin = aleatorio.randrange(inicio, len(ingrediente) + 1)
+                terminos.add(ingrediente[inicio:fin].strip())
+            terminos.add(ingrediente + ' extra')
+        for termino in terminos:
+            esperado = tuple(
+                i for i, ingrediente in enumerate(indice.vocabulario) if coincide_flexible(termino, ingrediente)
+            )
+            self.assertEqual(indice.entradas_coincidentes(termino), esperado, termino)
+
+    def test_vista_buscar_platos(self):
+        campos = ('id', 'ingredientes_coincidentes', 'total_coincidencias',
+                  'score_relevancia', 'porcentaje_coincidencia')
+        # Mismos términos en otro orden o repetidos: comparten caché pero no respuesta
+        for consulta in (['pollo', 'arroz'], ['arroz', 'pollo'], ['Pollo', 'pollo'], ['pollo'],
+                         ['arroz', 'Pollo', 'arroz'], ['arroz', 'arroz', 'pollo']):
+            respuesta = self.client.post('/api/menu-arbol/buscar-platos/',
+                                         {'ingredientes': consulta}, content_type='application/json')
+            self.assertEqual(respuesta.status_code, 200)
+            obtenido = [{campo: plato[campo] for campo in campos} for plato in respuesta.json()['platos']]
+            self.assertEqual(obtenido, _buscar_platos_referencia(self.platos_db, consulta), consulta)
+
+    def test_vista_cachea_por_conjunto_normalizado(self):
+        from platos import views
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'platos.json')
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                json.dump(self.platos_db, archivo)
+            catalogo = CatalogoPlatos(ruta)
+            views._cache_busquedas_platos.limpiar()
+            antes = views._cache_busquedas_platos.estadisticas()
+
+            def buscar(ingredientes):
+                respuesta = self.client.post('/api/menu-arbol/buscar-platos/', {'ingredientes': ingredientes},
+                                             content_type='application/json')
+                self.assertEqual(respuesta.status_code, 200)
+                return respuesta.json()
+
+            with mock.patch('platos.views.catalogo_platos', catalogo), \
+                    mock.patch.object(views, '_indice_platos_cache', None):
+                primera = buscar(['pollo', 'arroz'])
+                segunda = buscar(['Arroz ', 'POLLO'])
+                self.assertTrue(segunda['success'])
+                self.assertEqual(segunda['ingredientes_buscados'], ['Arroz ', 'POLLO'])
+                self.assertEqual(segunda['total_platos_encontrados'], len(primera['platos']))
+                # Desde la caché, los coincidentes siguen el orden de esta petición
+                for plato, anterior in zip(segunda['platos'], primera['platos']):
+                    self.assertEqual(plato['ingredientes_coincidentes'],
+                                     anterior['ingredientes_coincidentes'][::-1])
+                    self.assertEqual(dict(plato, ingredientes_coincidentes=None),
+                                     dict(anterior, ingredientes_coincidentes=None))
+
+                # Un catálogo nuevo invalida las respuestas guardadas
+                with open(ruta, 'w', encoding='utf-8') as archivo:
+                    json.dump([{'id': 1, 'nombre': 'Arroz con pollo', 'ingredientes': ['arroz', 'pollo']}], archivo)
+                catalogo.recargar_ahora()
+                tercera = buscar(['pollo', 'arroz'])
+                self.assertEqual([plato['id'] for plato in tercera['platos']], [1])
+
+            cache = views._cache_busquedas_platos.estadisticas()
+            self.assertEqual(cache['aciertos'] - antes['aciertos'], 1)
+            self.assertEqual(cache['fallos'] - antes['fallos'], 2)
+            self.assertEqual(cache['invalidaciones'] - antes['invalidaciones'], 1)
+
+
+class CatalogoPlatosTests(TestCase):
+    def _escribir(self, ruta, platos, marca_tiempo):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(platos, archivo)
+        os.utime(ruta, (marca_tiempo, marca_tiempo))
+
+    def test_recarga_en_segundo_plano_con_cambio_atomico(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'platos.json')
+            self._escribir(ruta, [{'id': 1, 'nombre': 'Arepa', 'ingredientes': ['arepa', 'queso']}], 1000)
+            catalogo = CatalogoPlatos(ruta)
+
+            primera = catalogo.instantanea()
+            self.assertEqual(primera.version, 1)
+            self.assertEqual(primera.platos[0].ingredientes, ('arepa', 'queso'))
+            self.assertEqual(primera.platos[0].get('puntuacion', 4.0), 4.0)
+            self.assertIs(catalogo.instantanea(), primera)
+
+            # Un archivo inválido no reemplaza la instantánea vigente
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write('[{"id": ')
+            os.utime(ruta, (2000, 2000))
+            self.assertIs(catalogo.instantanea(), primera)
+            self._esperar_recarga(catalogo)
+            self.assertIs(catalogo.instantanea(), primera)
+
+            self._escribir(ruta, [{'id': 1, 'nombre': 'Arepa'}, {'id': 2, 'nombre': 'Avena'}], 3000)
+            self.assertIs(catalogo.instantanea(), primera)
+            self._esperar_recarga(catalogo)
+            segunda = catalogo.instantanea()
+            self.assertEqual(segunda.version, 2)
+            self.assertEqual([plato.nombre for plato in segunda.platos], ['Arepa', 'Avena'])
+
+    def test_vigilante_sin_stat_por_peticion(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'platos.json')
+            self._escribir(ruta, [{'id': 1, 'nombre': 'Arepa'}], 1000)
+            catalogo = CatalogoPlatos(ruta, vigilar=True, intervalo=0.02)
+            self.addCleanup(catalogo.detener_vigilancia)
+            self.assertEqual(catalogo.instantanea().version, 1)
+
+            principal = threading.current_thread()
+            consultas = []
+            getmtime = os.path.getmtime
+
+            def getmtime_contado(camino):
+                if threading.current_thread() is principal:
+                    consultas.append(camino)
+                return getmtime(camino)
+
+            with mock.patch('platos.catalogo.os.path.getmtime', getmtime_contado):
+                for _ in range(100):
+                    catalogo.instantanea()
+                self.assertEqual(consultas, [])
+
+                self._escribir(ruta, [{'id': 1, 'nombre': 'Arepa'}, {'id': 2, 'nombre': 'Avena'}], 2000)
+                inicio = time.monotonic()
+                while catalogo.version < 2 and time.monotonic() - inicio < 5.0:
+                    time.sleep(0.01)
+                self.assertEqual(len(catalogo.instantanea().platos), 2)
+
+            # Recarga manual (scripts de despliegue), aunque el archivo no cambie
+            self.assertEqual(catalogo.recargar_ahora().version, 3)
+            call_command('recargar_catalogo', catalogo=ruta, stdout=open(os.devnull, 'w'))
+            inicio = time.monotonic()
+            while catalogo.version < 4 and time.monotonic() - inicio < 5.0:
+                time.sleep(0.01)
+            self.assertEqual(catalogo.version, 4)
+
+    def _esperar_recarga(self, catalogo, limite=5.0):
+        inicio = time.monotonic()
+        while catalogo._recargando and time.monotonic() - inicio < limite:
+            time.sleep(0.01)
+
+
+class GrafoBipartitoTests(TestCase):
+    def test_indices_por_nombre_y_construccion_en_una_pasada(self):
+        grafo = build_graph_desde_db([
+            {'id': 1, 'nombre': 'Arroz con pollo', 'ingredientes': ['Pollo', ' arroz ', 'ajo', '', 3]},
+            {'id': 2, 'nombre': 'Ensalada', 'ingredientes': ['tomate', 'AJO']},
+            {'id': 3, 'nombre': ' Arroz con pollo ', 'ingredientes': ['cebolla']},
+        ])
+        receta = grafo.get_vertex_by_name('ARROZ CON POLLO', 'receta')
+        self.assertEqual([i.get_name() for i in grafo.get_ingredientes_por_receta(receta)],
+                         ['pollo', 'arroz', 'ajo', 'cebolla'])
+        self.assertEqual(grafo.get_vertex('Ajo').get_type(), 'ingrediente')
+        self.assertEqual(len(grafo.get_recetas_por_ingrediente(grafo.get_vertex('ajo'))), 2)
+        self.assertIsNone(grafo.get_vertex('papa'))
+        with self.assertRaises(ValueError):
+            grafo.get_vertex_by_name('papa', 'ingrediente')
+
+
+def _aristas(grafo):
+    """{receta: ingredientes ordenados} y {ingrediente: recetas ordenadas} de un grafo."""
+    return (
+        {r.get_name(): sorted(i.get_name() for i in grafo.get_ingredientes_por_receta(r)) for r in grafo.recetas},
+        {i.get_name(): sorted(r.get_name() for r in grafo.get_recetas_por_ingrediente(i))
+         for i in grafo.ingredientes if grafo.get_recetas_por_ingrediente(i)},
+    )
+
+
+def _por_score(resultados):
+    """Resultados de búsqueda con cada categoría ordenada por score y nombre (a igual score el orden puede cambiar)."""
+    return {categoria: sorted(lista, key=lambda r: (-r['score'], r['nombre'])) for categoria, lista in resultados.items()}
+
+
+def _estadisticas_recalculadas(grafo):
+    """Estadísticas recorriendo la adyacencia, como se calculaban antes de los contadores."""
+    grados_ingredientes = Counter(len(grafo.get_recetas_por_ingrediente(i)) for i in grafo.ingredientes)
+    grados_recetas = Counter(len(grafo.get_ingredientes_por_receta(r)) for r in grafo.recetas)
+    aristas = sum(len(recetas) for recetas in grafo.adyacencia.values())
+    usados = sorted(((-len(grafo.get_recetas_por_ingrediente(i)), i.get_name()) for i in grafo.ingredientes
+                     if grafo.get_recetas_por_ingrediente(i)))[:10]
+    return {
+        'total_ingredientes': len(grafo.ingredientes),
+        'total_recetas': len(grafo.recetas),
+        'total_aristas': aristas,
+        'promedio_ingredientes_por_receta': round(aristas / len(grafo.recetas), 2) if grafo.recetas else 0.0,
+        'distribucion_grados': {'ingredientes': dict(sorted(grados_ingredientes.items())),
+                                'recetas': dict(sorted(grados_recetas.items()))},
+        'ingredientes_mas_usados': [{'nombre': nombre, 'recetas': -grado} for grado, nombre in usados],
+    }
+
+
+class GrafoMutableTests(TestCase):
+    def test_contadores_con_aristas_y_vertices_sueltos(self):
+        grafo = BipartiteDirectedGraph()
+        pollo, arroz = Vertex('pollo', 'ingrediente'), Vertex('arroz', 'ingrediente')
+        receta, sopa = Vertex('Arroz con pollo', 'receta'), Vertex('Sopa', 'receta')
+        for vertex in (pollo, arroz, receta, sopa):
+            grafo.add_vertex(vertex)
+        for arista in (Edge(pollo, receta), Edge(arroz, receta), Edge(pollo, sopa), Edge(pollo, sopa)):
+            grafo.add_edge(arista)
+        estadisticas = grafo.estadisticas()
+        self.assertIs(grafo.estadisticas(), estadisticas)
+        self.assertEqual(estadisticas, _estadisticas_recalculadas(grafo))
+        self.assertEqual(estadisticas['distribucion_grados'], {'ingredientes': {1: 1, 3: 1}, 'recetas': {2: 2}})
+        self.assertEqual(estadisticas['ingredientes_mas_usados'][0], {'nombre': 'pollo', 'recetas': 3})
+        self.assertIn('Aristas: 4\n', str(grafo))
+
+        fijada = grafo.instantanea()
+        grafo.remove_edge(Edge(pollo, sopa))
+        grafo.remove_vertex(arroz)
+        self.assertEqual(grafo.estadisticas(), _estadisticas_recalculadas(grafo))
+        self.assertEqual(grafo.total_aristas, 2)
+        grafo.remove_vertex(sopa)
+        self.assertEqual(grafo.estadisticas(), _estadisticas_recalculadas(grafo))
+        self.assertEqual(fijada.estadisticas(), estadisticas)
+        self.assertEqual(fijada.total_aristas, 4)
+
+
+    def test_mutaciones_por_receta_con_instantaneas(self):
+        aleatorio = random.Random(3)
+        nombres = [f'ing {i}' for i in range(30)]
+        modelo = {f'Receta {r}': aleatorio.choices(nombres, k=aleatorio.randint(1, 6)) for r in range(80)}
+        grafo = build_graph_desde_db([{'nombre': n, 'ingredientes': i} for n, i in modelo.items()])
+
+        version = grafo.version
+        for paso in range(200):
+            fijada = grafo.instantanea()
+            esperado_fijado = _aristas(fijada)
+            operacion = aleatorio.random()
+            if operacion < 0.3 or not modelo:
+                nombre = f'Nueva {paso}'
+                modelo[nombre] = aleatorio.choices(nombres, k=aleatorio.randint(1, 6))
+                grafo.agregar_receta(nombre, modelo[nombre])
+            elif operacion < 0.5:
+                nombre = aleatorio.choice(sorted(modelo))
+                del modelo[nombre]
+                grafo.quitar_receta(nombre)
+            else:
+                nombre = aleatorio.choice(sorted(modelo))
+                modelo[nombre] = aleatorio.choices(nombres, k=aleatorio.randint(0, 6))
+                grafo.reemplazar_ingredientes(nombre, [f' {n.upper()} ' for n in modelo[nombre]])
+
+            self.assertGreater(grafo.version, version)
+            version = grafo.version
+            # La instantánea anterior no cambió; el grafo coincide con uno construido desde cero
+            self.assertEqual(_aristas(fijada), esperado_fijado)
+            reconstruido = build_graph_desde_db([{'nombre': n, 'ingredientes': i} for n, i in modelo.items()])
+            self.assertEqual(_aristas(grafo), _aristas(reconstruido))
+            self.assertEqual(grafo.ingredientes, {i for i in reconstruido.ingredientes})
+            # Los contadores siguen a las modificaciones
+            self.assertEqual(grafo.estadisticas(), _estadisticas_recalculadas(grafo))
+            self.assertEqual(grafo.estadisticas(), GrafoCompacto.desde_grafo(reconstruido).estadisticas())
+            for nombre, ingredientes in modelo.items():
+                self.assertEqual([i.get_name() for i in grafo.get_ingredientes_por_receta(Vertex(nombre, 'receta'))],
+                                 ingredientes)
+
+        # Un cambio de una receta solo copia las listas que toca
+        fijada = grafo.instantanea()
+        self.assertIs(grafo.instantanea(), fijada)
+        nombre = next(iter(modelo))
+        tocados = set(grafo.get_ingredientes_por_receta(Vertex(nombre, 'receta')))
+        grafo.reemplazar_ingredientes(nombre, ['ing 0'])
+        tocados.add(Vertex('ing 0', 'ingrediente'))
+        for ingrediente, recetas in fijada.adyacencia.items():
+            if ingrediente not in tocados:
+                self.assertIs(grafo.adyacencia[ingrediente], recetas)
+        self.assertIsNot(grafo.instantanea(), fijada)
+        with self.assertRaises(TypeError):
+            fijada.agregar_receta('Otra', ['sal'])
+        with self.assertRaises(ValueError):
+            grafo.agregar_receta(nombre, ['sal'])
+
+
+class InstantaneaTemporalMixin:
+    """Las instantáneas del grafo que publiquen las vistas van a un directorio temporal."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(SMARTMEAL_GRAFO_INSTANTANEA_RUTA=os.path.join(directorio.name, 'platos_grafo.bin'))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+
+class GrafoPlatosBDTests(InstantaneaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        grafo_platos_bd.invalidar()
+        self.ingredientes = [Ingrediente.objects.create(nombre=f'Ing{i}') for i in range(8)]
+        self.platos = []
+        for i in range(6):
+            plato = Plato.objects.create(nombre=f'Plato {i}', imagen='', descripcion='', puntuacion=5, precio='10.00')
+            plato.ingredientes.set(self.ingredientes[i:i + 3])
+            self.platos.append(plato)
+
+    def _assert_grafo_actualizado(self):
+        # Los cambios se aplicaron en memoria al confirmar, sin recargar
+        self.assertEqual(grafo_platos_bd.sello, leer_sello())
+        recargado = GrafoPlatosBD()
+        recargado.cargar()
+        incremental, completo = grafo_platos_bd.obtener(), recargado.obtener()
+        self.assertEqual(_aristas(incremental), _aristas(completo))
+        self.assertEqual(incremental.ingredientes, completo.ingredientes)
+        self.assertEqual(incremental.recetas, completo.recetas)
+        self.assertEqual(incremental.estadisticas(), completo.estadisticas())
+
+    def test_ingrediente_sin_platos_sale_del_grafo_como_al_recargar(self):
+        grafo_platos_bd.obtener()
+        # Ing0 solo está en Plato 0, Ing7 solo en Plato 5
+        with self.captureOnCommitCallbacks(execute=True):
+            self.platos[0].ingredientes.remove(self.ingredientes[0])
+        self._assert_grafo_actualizado()
+        self.assertNotIn(Vertex('ing0', 'ingrediente'), grafo_platos_bd.obtener().ingredientes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.platos[0].ingredientes.add(self.ingredientes[0])
+            self.platos[5].delete()
+        self._assert_grafo_actualizado()
+        self.assertIn(Vertex('ing0', 'ingrediente'), grafo_platos_bd.obtener().ingredientes)
+        self.assertNotIn(Vertex('ing7', 'ingrediente'), grafo_platos_bd.obtener().ingredientes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.platos[4].nombre = ''  # sin nombre no es receta: sus ingredientes quedan sueltos
+            self.platos[4].save()
+            self.ingredientes[1].nombre = 'Ing0'
+            self.ingredientes[1].save()
+        self._assert_grafo_actualizado()
+
+    def test_carga_en_una_pasada(self):
+        grafo = grafo_platos_bd.obtener()
+        self.assertEqual(grafo.total_aristas, 18)
+        self.assertEqual([i.get_name() for i in grafo.get_ingredientes_por_receta(Vertex('Plato 2', 'receta'))],
+                         ['ing2', 'ing3', 'ing4'])
+
+    def test_senales_actualizan_el_grafo_sin_reconstruirlo(self):
+        grafo = grafo_platos_bd.obtener()
+        antes = _aristas(grafo)
+        version = grafo_platos_bd.version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.platos[0].ingredientes.add(self.ingredientes[7])
+            self.platos[1].ingredientes.remove(self.ingredientes[2])
+            self.ingredientes[4].platos.clear()
+        self._assert_grafo_actualizado()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.platos[2].nombre = 'Plato 3'  # mismo nombre que otro plato: comparten la receta
+            self.platos[2].save()
+            self.ingredientes[5].nombre = ' ING6 '  # mismo nombre normalizado que otro ingrediente
+            self.ingredientes[5].save()
+        self._assert_grafo_actualizado()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredientes[3].delete()
+            self.platos[3].delete()
+            nuevo = Plato.objects.create(nombre='Plato nuevo', imagen='', descripcion='', puntuacion=5,
+                                         precio='1.00')
+            nuevo.ingredientes.add(self.ingredientes[0], self.ingredientes[1])
+        self._assert_grafo_actualizado()
+
+        # La instantánea tomada antes de los cambios no cambió
+        self.assertEqual(_aristas(grafo), antes)
+        self.assertGreater(grafo_platos_bd.version, version)
+        self.assertIs(grafo_platos_bd.obtener(), grafo_platos_bd.obtener())
+
+    @override_settings(SMARTMEAL_GRAFO_FUENTE='bd')
+    def test_vista_con_el_grafo_de_la_bd(self):
+        self.platos[0].ingredientes.add(self.ingredientes[7])
+        respuesta = self.client.post('/api/grafo/buscar/', {'ingredientes': ['ing0', 'ing1', 'ing2', 'ing7']},
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        completas = respuesta.json()['resultados']['completas']
+        self.assertEqual([receta['nombre'] for receta in completas], ['Plato 0'])
+
+
+class GrafoCompiladoTests(InstantaneaTemporalMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with open(RUTA_PLATOS_DB, encoding='utf-8') as archivo:
+            cls.platos_db = json.load(archivo)
+
+    def _grafo_aleatorio(self):
+        aleatorio = random.Random(7)
+        ingredientes = [Vertex(f'Ing {i}', 'ingrediente') for i in range(40)]
+        grafo = BipartiteDirectedGraph()
+        for ingrediente in ingredientes:
+            grafo.add_vertex(ingrediente)
+        for i in range(300):
+            receta = Vertex(f'Receta {i}', 'receta')
+            grafo.add_vertex(receta)
+            # Algunas recetas repiten un ingrediente y otras no tienen ninguno
+            for ingrediente in aleatorio.choices(ingredientes, k=aleatorio.randint(0, 8)):
+                grafo.add_edge(Edge(ingrediente, receta))
+        return grafo, aleatorio
+
+    def test_bitsets_coinciden_con_la_busqueda_original(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        compilado = grafo.compilar()
+        self.assertIs(grafo.compilar(), compilado)
+        # Las recetas con un ingrediente repetido no cuentan con popcount
+        self.assertTrue(any(receta.repetidos for receta in compilado.recetas))
+        for _ in range(30):
+            despensa = [f' ING {i} ' for i in aleatorio.sample(range(45), aleatorio.randint(0, 20))]
+            umbral = aleatorio.choice([0.0, 0.5, 0.75, 1.0])
+            esperado = grafo.buscar_recetas_por_ingredientes(despensa, umbral)
+            self.assertEqual(compilado.buscar_recetas_por_ingredientes(despensa, umbral), esperado)
+            self.assertEqual(compilado.clasificar(compilado.mascara_despensa(despensa), umbral), esperado)
+
+        grafo.add_vertex(Vertex('Receta nueva', 'receta'))
+        self.assertIsNot(grafo.compilar(), compilado)
+
+    def test_bitsets_con_el_catalogo(self):
+        grafo = build_graph_desde_db(self.platos_db)
+        for despensa in (['pollo', 'arroz', 'ajo', 'cebolla'], ['Sal', 'aceite'], []):
+            self.assertEqual(grafo.compilar().buscar_recetas_por_ingredientes(despensa),
+                             grafo.buscar_recetas_por_ingredientes(despensa))
+
+    def test_instantaneas_actualizan_la_forma_compilada(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        grafo.instantanea().compilar()
+        ingredientes = [f'Ing {i}' for i in range(40)] + ['ing nuevo 1', 'ing nuevo 2']
+        for paso in range(60):
+            operacion = aleatorio.random()
+            nombres = sorted(receta.get_name() for receta in grafo.recetas)
+            if operacion < 0.3:
+                grafo.agregar_receta(f'Nueva {paso}', aleatorio.choices(ingredientes, k=aleatorio.randint(1, 6)))
+            elif operacion < 0.5:
+                grafo.quitar_receta(aleatorio.choice(nombres))
+            elif operacion < 0.95:
+                grafo.reemplazar_ingredientes(aleatorio.choice(nombres),
+                                              aleatorio.choices(ingredientes, k=aleatorio.randint(0, 6)))
+            else:
+                grafo.remove_vertex(aleatorio.choice(sorted(grafo.ingredientes, key=Vertex.get_name)))
+            fijada = grafo.instantanea()
+            if paso % 3 == 2:
+                continue  # Instantánea que no se compila: la siguiente parte de la anterior
+            with mock.patch.object(GrafoCompilado, '__init__', side_effect=AssertionError('compilación completa')):
+                compilado = fijada.compilar()
+            desde_cero = GrafoCompilado(fijada)
+            for _ in range(5):
+                despensa = [f' ING {i} ' for i in aleatorio.sample(range(45), aleatorio.randint(0, 15))]
+                despensa.append('ing nuevo 1')
+                umbral = aleatorio.choice([0.0, 0.5, 0.75, 1.0])
+                totales, totales_desde_cero = {}, {}
+                self.assertEqual(
+                    _por_score(compilado.buscar_recetas_por_ingredientes(despensa, umbral, totales=totales)),
+                    _por_score(desde_cero.buscar_recetas_por_ingredientes(despensa, umbral,
+                                                                          totales=totales_desde_cero)))
+                self.assertEqual(totales, totales_desde_cero)
+            nombres, ratios = compilado.puntuar_lote([despensa], usar_numpy=False)
+            nombres_desde_cero, ratios_desde_cero = desde_cero.puntuar_lote([despensa], usar_numpy=False)
+            self.assertEqual(dict(zip(nombres, ratios)), dict(zip(nombres_desde_cero, ratios_desde_cero)))
+
+    def test_compilacion_una_vez_con_hilos_concurrentes(self):
+        grafo, _ = self._grafo_aleatorio()
+        fijada = grafo.instantanea()
+        construcciones = []
+        original = GrafoCompilado.__init__
+
+        def construir_lento(compilado, origen):
+            construcciones.append(origen)
+            time.sleep(0.05)
+            original(compilado, origen)
+
+        resultados = []
+        with mock.patch.object(GrafoCompilado, '__init__', construir_lento):
+            hilos = [threading.Thread(target=lambda: resultados.append(fijada.compilar())) for _ in range(8)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        self.assertEqual(len(construcciones), 1)
+        self.assertEqual(len({id(compilado) for compilado in resultados}), 1)
+
+    def test_candidatas_desde_la_adyacencia(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        por_score = _por_score
+
+        for _ in range(20):
+            despensa = [f'ing {i}' for i in aleatorio.sample(range(45), aleatorio.randint(1, 10))]
+            completo = grafo.buscar_recetas_por_ingredientes(despensa, 0.5)
+            candidatas = grafo.buscar_recetas_candidatas(despensa, 0.5, incluir_sin_coincidencias=False)
+            sin_cero = {categoria: [r for r in lista if r['ingredientes_disponibles']]
+                        for categoria, lista in completo.items()}
+            self.assertEqual(por_score(candidatas), por_score(sin_cero))
+            for lista in candidatas.values():
+                self.assertEqual([r['score'] for r in lista], sorted((r['score'] for r in lista), reverse=True))
+
+            con_cero = grafo.buscar_recetas_candidatas(despensa, 0.5)
+            # Mismo valor por defecto que GrafoCompilado: mismo conjunto de resultados
+            self.assertEqual(por_score(con_cero), por_score(grafo.compilar().buscar_recetas_por_ingredientes(despensa, 0.5)))
+            self.assertEqual(por_score(con_cero), por_score(completo))
+            self.assertEqual(grafo.compilar().buscar_recetas_por_ingredientes(despensa, 0.5, False), sin_cero)
+
+    def test_recorte_con_heaps_acotados(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        compilado = grafo.compilar()
+        for _ in range(30):
+            despensa = [f'ing {i}' for i in aleatorio.sample(range(45), aleatorio.randint(1, 15))]
+            limite = aleatorio.choice([None, 0, 1, 5, 50, 400])
+            desplazamiento = aleatorio.choice([0, 3, 120])
+            top_k = aleatorio.choice([None, 0, 7, 90])
+            completo = grafo.buscar_recetas_por_ingredientes(despensa, 0.5)
+
+            esperado = {}
+            restantes = top_k
+            for categoria in ('completas', 'casi_completas', 'incompletas'):
+                cantidad = limite
+                if restantes is not None:
+                    cantidad = restantes if cantidad is None else min(cantidad, restantes)
+                fin = None if cantidad is None else desplazamiento + cantidad
+                esperado[categoria] = completo[categoria][desplazamiento:fin]
+                if restantes is not None:
+                    restantes -= len(esperado[categoria])
+
+            for buscar in (grafo.buscar_recetas_por_ingredientes, compilado.buscar_recetas_por_ingredientes):
+                totales = {}
+                obtenido = buscar(despensa, 0.5, limite=limite, desplazamiento=desplazamiento,
+                                  top_k=top_k, totales=totales)
+                self.assertEqual(obtenido, esperado)
+                self.assertEqual(totales, {categoria: len(lista) for categoria, lista in completo.items()})
+
+    def test_vista_buscar_con_recorte(self):
+        cuerpo = {'ingredientes': ['pollo', 'arroz', 'ajo']}
+        completa = self.client.post('/api/grafo/buscar/', cuerpo, content_type='application/json').json()
+        recortada = self.client.post('/api/grafo/buscar/', {**cuerpo, 'limit': 2, 'offset': 1, 'top_k': 3},
+                                     content_type='application/json').json()
+        self.assertEqual(recortada['estadisticas'], completa['estadisticas'])
+        self.assertEqual(recortada['resultados']['completas'], completa['resultados']['completas'][1:3])
+        self.assertLessEqual(sum(len(lista) for lista in recortada['resultados'].values()), 3)
+
+        respuesta = self.client.post('/api/grafo/buscar/', {**cuerpo, 'limit': -1}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_grafo_compacto_con_la_misma_api(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        compacto = GrafoCompacto.desde_grafo(grafo)
+        self.assertEqual(len(compacto.recetas), len(grafo.recetas))
+        self.assertEqual(compacto.total_aristas, grafo.total_aristas)
+        for receta in grafo.recetas:
+            self.assertEqual(compacto.get_ingredientes_por_receta(receta), grafo.get_ingredientes_por_receta(receta))
+        for ingrediente in grafo.ingredientes:
+            self.assertIn(ingrediente, compacto.ingredientes)
+            self.assertEqual(sorted(compacto.get_recetas_por_ingrediente(ingrediente), key=str),
+                             sorted(grafo.get_recetas_por_ingrediente(ingrediente), key=str))
+        for _ in range(10):
+            despensa = [f'ING {i}' for i in aleatorio.sample(range(45), aleatorio.randint(1, 12))]
+            esperado = grafo.buscar_recetas_por_ingredientes(despensa, 0.5)
+            self.assertEqual(compacto.buscar_recetas_por_ingredientes(despensa, 0.5), esperado)
+            self.assertEqual(compacto.compilar().buscar_recetas_por_ingredientes(despensa, 0.5), esperado)
+        with self.assertRaises(TypeError):
+            compacto.add_vertex(Vertex('Nueva', 'receta'))
+
+    def test_grafo_compacto_desde_el_catalogo(self):
+        grafo = build_graph_desde_db(self.platos_db)
+        compacto = GrafoCompacto.desde_db(self.platos_db)
+        self.assertEqual(set(compacto.recetas), grafo.recetas)
+        self.assertEqual(set(compacto.ingredientes), grafo.ingredientes)
+        for receta in grafo.recetas:
+            self.assertEqual(compacto.get_ingredientes_por_receta(receta), grafo.get_ingredientes_por_receta(receta))
+        self.assertEqual(compacto.get_vertex('ARROZ'), grafo.get_vertex('ARROZ'))
+
+    def test_instantanea_en_disco(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        compacto = GrafoCompacto.desde_grafo(grafo)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'grafo.bin')
+            huella = 'ab' * 32
+            guardar_instantanea(compacto, ruta, huella)
+            cargado = cargar_instantanea(ruta, huella)
+            self.assertEqual(list(cargado.nombres_recetas), list(compacto.nombres_recetas))
+            self.assertEqual(list(cargado.recetas_de), list(compacto.recetas_de))
+            for _ in range(5):
+                despensa = [f'ing {i}' for i in aleatorio.sample(range(45), aleatorio.randint(1, 12))]
+                self.assertEqual(cargado.compilar().buscar_recetas_por_ingredientes(despensa),
+                                 grafo.buscar_recetas_por_ingredientes(despensa))
+
+            # Otro JSON de origen, o bytes dañados, no se cargan
+            with self.assertRaises(InstantaneaInvalida):
+                cargar_instantanea(ruta, 'cd' * 32)
+            with open(ruta, 'r+b') as archivo:
+                archivo.seek(-1, os.SEEK_END)
+                ultimo = archivo.read(1)
+                archivo.seek(-1, os.SEEK_END)
+                archivo.write(bytes([ultimo[0] ^ 0xFF]))
+            with self.assertRaises(InstantaneaInvalida):
+                cargar_instantanea(ruta, huella)
+
+    def test_comando_generar_instantanea(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'grafo.bin')
+            call_command('generar_instantanea_grafo', salida=ruta, stdout=open(os.devnull, 'w'))
+            cargado = cargar_instantanea(ruta, huella_archivo(RUTA_PLATOS_DB))
+            compacto = GrafoCompacto.desde_db(self.platos_db)
+            self.assertEqual(list(cargado.nombres_ingredientes), list(compacto.nombres_ingredientes))
+            self.assertEqual(list(cargado.ingredientes_de), list(compacto.ingredientes_de))
+
+            with override_settings(SMARTMEAL_GRAFO_INSTANTANEA_RUTA=ruta):
+                from platos import views
+                views._grafo_cache = None
+                grafo = views.obtener_grafo()
+                self.assertIsInstance(grafo, GrafoCompacto)
+                self.assertEqual(list(grafo.recetas_de), list(compacto.recetas_de))
+                views._grafo_cache = None
+
+    def test_instantanea_mapeada_y_publicada(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'grafo.bin')
+            guardar_instantanea(grafo, ruta, 'ab' * 32)
+            mapeado = abrir_instantanea(ruta, 'ab' * 32)
+            self.assertIsInstance(mapeado.recetas_de, memoryview)
+            compacto = GrafoCompacto.desde_grafo(grafo)
+            self.assertEqual(mapeado.total_aristas, compacto.total_aristas)
+            for _ in range(5):
+                despensa = [f'ing {i}' for i in aleatorio.sample(range(45), aleatorio.randint(1, 12))]
+                self.assertEqual(mapeado.buscar_recetas_candidatas(despensa),
+                                 compacto.buscar_recetas_candidatas(despensa))
+            with self.assertRaises(InstantaneaInvalida):
+                abrir_instantanea(ruta, 'cd' * 32)
+
+            # Sin instantánea para el JSON actual, obtener_grafo la guarda y la mapea
+            ruta_publicada = os.path.join(directorio, 'publicada.bin')
+            with override_settings(SMARTMEAL_GRAFO_INSTANTANEA_RUTA=ruta_publicada):
+                from platos import views
+                views._grafo_cache = None
+                publicado = views.obtener_grafo()
+                self.assertIsInstance(publicado, GrafoMapeado)
+                self.assertTrue(os.path.exists(ruta_publicada))
+                self.assertEqual(list(publicado.recetas_de), list(GrafoCompacto.desde_db(self.platos_db).recetas_de))
+                views._grafo_cache = None
+
+    def test_instantanea_mapeada_consulta_desde_el_archivo(self):
+        grafo, aleatorio = self._grafo_aleatorio()
+        # Nombres que solo difieren en mayúsculas o espacios comparten el bit
+        for nombre in ('Sal', 'sal ', 'Ñame'):
+            grafo.add_vertex(Vertex(nombre, 'ingrediente'))
+        grafo.add_vertex(Vertex('Sin uso', 'ingrediente'))
+        for nombre, ingredientes in (('Sopa', ['Sal', 'Ñame', 'Ing 1']), ('sopa', ['sal ', 'Sal'])):
+            grafo.add_vertex(Vertex(nombre, 'receta'))
+            for ingrediente in ingredientes:
+                grafo.add_edge(Edge(Vertex(ingrediente, 'ingrediente'), Vertex(nombre, 'receta')))
+        compacto = GrafoCompacto.desde_grafo(grafo)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'grafo.bin')
+            guardar_instantanea(compacto, ruta, 'ab' * 32)
+            mapeado = abrir_instantanea(ruta, 'ab' * 32)
+
+            # Nombres e índices por nombre salen del archivo, no de estructuras del proceso
+            self.assertNotIsInstance(mapeado.nombres_ingredientes, list)
+            self.assertNotIsInstance(mapeado._id_ingrediente, dict)
+            self.assertEqual(list(mapeado.nombres_ingredientes), list(compacto.nombres_ingredientes))
+            self.assertEqual(list(mapeado.nombres_recetas), list(compacto.nombres_recetas))
+            for nombre in ('SAL', 'sal ', 'ñame', 'SOPA', 'Ing 3', 'sin USO', 'nada'):
+                self.assertEqual(mapeado.get_vertex(nombre), compacto.get_vertex(nombre), nombre)
+            for vertice in (Vertex('sal ', 'ingrediente'), Vertex('Sal ', 'ingrediente'), Vertex('sopa', 'receta')):
+                self.assertEqual(vertice in mapeado.ingredientes or vertice in mapeado.recetas,
+                                 vertice in compacto.ingredientes or vertice in compacto.recetas)
+                self.assertEqual(mapeado.get_recetas_por_ingrediente(vertice),
+                                 compacto.get_recetas_por_ingrediente(vertice))
+                self.assertEqual(mapeado.get_ingredientes_por_receta(vertice),
+                                 compacto.get_ingredientes_por_receta(vertice))
+            self.assertEqual(mapeado.estadisticas(), compacto.estadisticas())
+
+            # La forma compilada también se lee del archivo y da los mismos resultados
+            compilado = mapeado.compilar()
+            self.assertIsInstance(compilado, CompiladoMapeado)
+            self.assertEqual(dict(compilado.bits), compacto.compilar().bits)
+            consultas = []
+            for _ in range(20):
+                despensa = [f'ing {i}' for i in aleatorio.sample(range(45), aleatorio.randint(0, 12))]
+                despensa += aleatorio.sample([' SAL', 'ñame', 'sin uso'], aleatorio.randint(0, 2))
+                umbral = aleatorio.choice([0.0, 0.5, 0.75, 1.0])
+                incluir = aleatorio.choice([True, False])
+                consultas.append((despensa, umbral, incluir))
+                for recorte in ({}, {'limite': 3, 'desplazamiento': 1}, {'top_k': 7}):
+                    totales, esperados_totales = {}, {}
+                    self.assertEqual(
+                        compilado.buscar_recetas_por_ingredientes(despensa, umbral, incluir,
+                                                                  totales=totales, **recorte),
+                        compacto.compilar().buscar_recetas_por_ingredientes(despensa, umbral, incluir,
+                                                                            totales=esperados_totales, **recorte))
+                    self.assertEqual(totales, esperados_totales)
+            self.assertEqual(compilado.buscar_lote(consultas), compacto.compilar().buscar_lote(consultas))
+            nombres, ratios = compilado.puntuar_lote([['ing 1', 'sal']], usar_numpy=False)
+            self.assertEqual((nombres, ratios), compacto.puntuar_lote([['ing 1', 'sal']], usar_numpy=False))
+
+    def _ratios_esperados(self, grafo, despensas):
+        """{(receta, despensa): ratio} con la búsqueda original, una despensa a la vez."""
+        esperados = {}
+        for columna, despensa in enumerate(despensas):
+            for lista in grafo.buscar_recetas_por_ingredientes(despensa).values():
+                for resultado in lista:
+                    esperados[(resultado['nombre'], columna)] = resultado['ratio']
+        return esperados
+
+    def _verificar_lote(self, usar_numpy):
+        grafo, aleatorio = self._grafo_aleatorio()
+        despensas = [[f'ing {i}' for i in aleatorio.sample(range(45), aleatorio.randint(0, 15))]
+                     for _ in range(100)]
+        nombres, ratios = grafo.puntuar_lote(despensas, usar_numpy=usar_numpy)
+        esperados = self._ratios_esperados(grafo, despensas)
+        self.assertEqual(len(esperados), len(nombres) * len(despensas))
+        for fila, nombre in enumerate(nombres):
+            for columna in range(len(despensas)):
+                self.assertEqual(round(float(ratios[fila][columna]), 4), esperados[(nombre, columna)])
+
+    def test_lote_en_python_puro(self):
+        self._verificar_lote(usar_numpy=False)
+
+    @skipUnless(HAY_NUMPY, "NumPy no está instalado")
+    def test_lote_con_numpy(self):
+        self._verificar_lote(usar_numpy=True)
+
+    def test_vista_buscar_lote(self):
+        consultas = [
+            {'ingredientes': ['Pollo', 'arroz', 'ajo']},
+            {'ingredientes': ['ajo', 'pollo ', 'arroz'], 'umbral_casi_completa': 0.5},
+            {'ingredientes': []},
+            {'ingredientes': ['huevo'], 'umbral_casi_completa': 2},
+            {'ingredientes': ['arroz', 'ajo', 'pollo']},
+        ]
+        respuesta = self.client.post('/api/grafo/buscar-lote/', {'consultas': consultas},
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        resultados = respuesta.json()['resultados']
+        self.assertEqual(list(resultados), ['0', '1', '2', '3', '4'])
+        self.assertFalse(resultados['2']['success'])
+        self.assertFalse(resultados['3']['success'])
+
+        for posicion in ('0', '1', '4'):
+            consulta = consultas[int(posicion)]
+            individual = self.client.post('/api/grafo/buscar/', consulta, content_type='application/json').json()
+            self.assertEqual(resultados[posicion]['resultados'], individual['resultados'])
+            self.assertEqual(resultados[posicion]['estadisticas'], individual['estadisticas'])
+
+        respuesta = self.client.post('/api/grafo/buscar-lote/', {'consultas': [{'ingredientes': ['sal']}] * 501},
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class CacheBusquedasGrafoTests(InstantaneaTemporalMixin, TestCase):
+    def test_lru_por_entradas_bytes_y_version(self):
+        cache = CacheLRUVersionada(max_entradas=3, max_bytes=100)
+        for clave in 'abc':
+            cache.guardar('v1', clave, clave.upper(), 10)
+        self.assertEqual(cache.obtener('v1', 'a'), 'A')  # 'a' pasa a ser la más reciente
+        cache.guardar('v1', 'd', 'D', 10)
+        self.assertIsNone(cache.obtener('v1', 'b'))
+        cache.guardar('v1', 'e', 'E', 85)  # excede los bytes: salen las menos recientes
+        self.assertIsNone(cache.obtener('v1', 'c'))
+        self.assertEqual(cache.obtener('v1', 'e'), 'E')
+        cache.guardar('v1', 'f', 'F', 101)  # más grande que la caché: no se guarda
+        self.assertIsNone(cache.obtener('v1', 'f'))
+
+        # Consultar otra versión es un fallo, sin vaciar la caché
+        self.assertIsNone(cache.obtener('v2', 'e'))
+        self.assertIsNone(cache.obtener('v0', 'e'))
+        self.assertEqual(cache.obtener('v1', 'e'), 'E')
+        # Guardar una versión más nueva la vacía; los valores de una más vieja se descartan
+        cache.guardar('v2', 'e', 'E2', 10)
+        cache.guardar('v1', 'd', 'D', 10)
+        self.assertIsNone(cache.obtener('v1', 'e'))
+        self.assertEqual(cache.obtener('v2', 'e'), 'E2')
+        self.assertIsNone(cache.obtener('v2', 'd'))
+        estadisticas = cache.estadisticas()
+        self.assertEqual(estadisticas['entradas'], 1)
+        self.assertEqual((estadisticas['aciertos'], estadisticas['fallos']), (4, 7))
+        self.assertEqual((estadisticas['desalojos'], estadisticas['invalidaciones']), (3, 1))
+
+    def test_vista_reutiliza_la_misma_despensa(self):
+        from platos import views
+        views._cache_busquedas_grafo.limpiar()
+        antes = views._cache_busquedas_grafo.estadisticas()
+        primera = self.client.post('/api/grafo/buscar/', {'ingredientes': ['Pollo', 'arroz', 'ajo']},
+                                   content_type='application/json').json()
+        segunda = self.client.post('/api/grafo/buscar/', {'ingredientes': ['ajo ', 'ARROZ', 'pollo', 'ajo']},
+                                   content_type='application/json').json()
+        self.assertEqual(primera['resultados'], segunda['resultados'])
+        self.assertEqual(segunda['ingredientes_buscados'], ['ajo ', 'ARROZ', 'pollo', 'ajo'])
+        otro_umbral = self.client.post('/api/grafo/buscar/', {'ingredientes': ['pollo', 'arroz', 'ajo'],
+                                                              'umbral_casi_completa': 0.5},
+                                       content_type='application/json').json()
+        self.assertTrue(otro_umbral['success'])
+
+        cache = self.client.get('/api/grafo/monitoreo/').json()['cache_busquedas']
+        self.assertEqual(cache['aciertos'] - antes['aciertos'], 1)
+        self.assertEqual(cache['fallos'] - antes['fallos'], 2)
+        self.assertEqual(cache['entradas'], 2)
+
+
+class GrafoReconstruccionTests(InstantaneaTemporalMixin, TestCase):
+    """Un cambio de catálogo con muchas peticiones concurrentes reconstruye el grafo una sola vez."""
+
+    def setUp(self):
+        super().setUp()
+        from platos import views
+        self.views = views
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        self.ruta = os.path.join(self.directorio.name, 'platos.json')
+        self._escribir('Arepa')
+        self.catalogo = CatalogoPlatos(self.ruta)
+        self.catalogo.recargar()
+        patron = mock.patch.object(views, 'catalogo_platos', self.catalogo)
+        patron.start()
+        self.addCleanup(patron.stop)
+        views._grafo_cache = None
+        self.addCleanup(setattr, views, '_grafo_cache', None)
+
+        self.construcciones = 0
+        desde_db = GrafoCompacto.desde_db
+
+        def construccion_lenta(platos_db):
+            self.construcciones += 1
+            time.sleep(0.2)
+            return desde_db(platos_db)
+
+        patron = mock.patch.object(GrafoCompacto, 'desde_db', construccion_lenta)
+        patron.start()
+        self.addCleanup(patron.stop)
+
+    def _escribir(self, nombre):
+        with open(self.ruta, 'w', encoding='utf-8') as archivo:
+            json.dump([{'id': 1, 'nombre': nombre, 'ingredientes': ['maiz', 'queso']}], archivo)
+
+    def _martillar(self, hilos=12):
+        """Lanza peticiones concurrentes a grafo/buscar/ y retorna los nombres de receta vistos."""
+        nombres = []
+        errores = []
+
+        def peticion():
+            respuesta = Client().post(
+                '/api/grafo/buscar/', {'ingredientes': ['maiz']}, content_type='application/json')
+            if respuesta.status_code != 200:
+                errores.append(respuesta.status_code)
+                return
+            resultados = respuesta.json()['resultados']
+            nombres.extend(receta['nombre'] for lista in resultados.values() for receta in lista)
+
+        trabajadores = [threading.Thread(target=peticion) for _ in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        self.assertEqual(errores, [])
+        return nombres
+
+    def test_reconstruccion_unica_esperando(self):
+        self.assertEqual(set(self._martillar()), {'Arepa'})
+        self.assertEqual(self.construcciones, 1)
+
+        self._escribir('Cachapa')
+        self.catalogo.recargar()
+        self.assertEqual(set(self._martillar()), {'Cachapa'})
+        self.assertEqual(self.construcciones, 2)
+
+    @override_settings(SMARTMEAL_GRAFO_RECONSTRUCCION='anterior')
+    def test_reconstruccion_unica_sirviendo_el_anterior(self):
+        self.views.obtener_grafo()
+        self._escribir('Cachapa')
+        self.catalogo.recargar()
+
+        nombres = self._martillar()
+        self.assertEqual(self.construcciones, 2)
+        self.assertIn('Arepa', nombres)
+        self.assertIn('Cachapa', nombres)
+        self.assertEqual(set(self._martillar()), {'Cachapa'})
+        self.assertEqual(self.construcciones, 2)
+
+
+class GrafoRespuestasCondicionalesTests(InstantaneaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        from platos import views
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        self.ruta = os.path.join(self.directorio.name, 'platos.json')
+        self._escribir(['Arepa'], marca_tiempo=1700000000)
+        self.catalogo = CatalogoPlatos(self.ruta)
+        patron = mock.patch.object(views, 'catalogo_platos', self.catalogo)
+        patron.start()
+        self.addCleanup(patron.stop)
+        views._grafo_cache = None
+        self.addCleanup(setattr, views, '_grafo_cache', None)
+
+    def _escribir(self, nombres, marca_tiempo=None):
+        with open(self.ruta, 'w', encoding='utf-8') as archivo:
+            json.dump([{'id': i, 'nombre': nombre, 'ingredientes': ['maiz', 'queso']}
+                       for i, nombre in enumerate(nombres)], archivo)
+        if marca_tiempo is not None:
+            os.utime(self.ruta, (marca_tiempo, marca_tiempo))
+
+    def test_etag_y_304_por_version_del_grafo(self):
+        for url in ('/api/grafo/ingredientes/', '/api/grafo/recetas/'):
+            primera = self.client.get(url)
+            self.assertEqual(primera.status_code, 200)
+            etag = primera['ETag']
+            self.assertEqual(etag, f'"{huella_archivo(self.ruta)}"')
+            self.assertEqual(primera['Last-Modified'], 'Tue, 14 Nov 2023 22:13:20 GMT')
+            self.assertIn('no-cache', primera['Cache-Control'])
+
+            # El cuerpo se renderiza una vez por versión, pero el timestamp es el de cada respuesta
+            despues = datetime(2030, 1, 1, tzinfo=dt_timezone.utc)
+            with mock.patch('platos.views.timezone.now', return_value=despues):
+                segunda = self.client.get(url).json()
+            self.assertEqual(segunda.pop('timestamp'), despues.isoformat())
+            datos = primera.json()
+            self.assertNotEqual(datos.pop('timestamp'), despues.isoformat())
+            self.assertEqual(segunda, datos)
+            no_modificada = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(no_modificada.status_code, 304)
+            self.assertEqual(no_modificada.content, b'')
+            self.assertEqual(no_modificada['ETag'], etag)
+            # Sin If-None-Match revalida la fecha de modificación del catálogo
+            desde = self.client.get(url, HTTP_IF_MODIFIED_SINCE=primera['Last-Modified'])
+            self.assertEqual(desde.status_code, 304)
+            self.assertEqual(desde['Last-Modified'], primera['Last-Modified'])
+            antes = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Tue, 14 Nov 2023 22:13:19 GMT')
+            self.assertEqual(antes.status_code, 200)
+            # If-None-Match manda sobre If-Modified-Since
+            otra_version = self.client.get(url, HTTP_IF_NONE_MATCH='"otra"',
+                                           HTTP_IF_MODIFIED_SINCE=primera['Last-Modified'])
+            self.assertEqual(otra_version.status_code, 200)
+
+        self.assertEqual(self.client.get('/api/grafo/recetas/').json()['recetas'], ['Arepa'])
+        self._escribir(['Arepa', 'Bandeja'], marca_tiempo=1700000060)
+        self.catalogo.recargar_ahora()
+        nueva = self.client.get('/api/grafo/recetas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(nueva.status_code, 200)
+        self.assertNotEqual(nueva['ETag'], etag)
+        self.assertEqual(nueva.json()['recetas'], ['Arepa', 'Bandeja'])
+        desde = self.client.get('/api/grafo/recetas/', HTTP_IF_MODIFIED_SINCE='Tue, 14 Nov 2023 22:13:20 GMT')
+        self.assertEqual(desde.status_code, 200)
+        self.assertEqual(desde['Last-Modified'], 'Tue, 14 Nov 2023 22:14:20 GMT')
+
+    @override_settings(SMARTMEAL_GRAFO_FUENTE='bd')
+    def test_grafo_de_la_bd_revalida_solo_por_etag(self):
+        respuesta = self.client.get('/api/grafo/recetas/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn('Last-Modified', respuesta)
+        desde = self.client.get('/api/grafo/recetas/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(desde.status_code, 200)
+        self.assertEqual(self.client.get('/api/grafo/recetas/', HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code,
+                         304)
+
+    def test_estadisticas_revalidan_por_version_del_grafo(self):
+        primera = self.client.get('/api/grafo/estadisticas/')
+        datos = primera.json()
+        estadisticas = datos['estadisticas']
+        self.assertEqual((estadisticas['total_ingredientes'], estadisticas['total_recetas'],
+                          estadisticas['total_aristas']), (2, 1, 2))
+        self.assertEqual(estadisticas['promedio_ingredientes_por_receta'], 2.0)
+        self.assertEqual(estadisticas['distribucion_grados'], {'ingredientes': {'1': 2}, 'recetas': {'2': 1}})
+        self.assertEqual(estadisticas['recetas_por_categoria'], {'sin categoría': 1})
+        self.assertNotIn('cache_busquedas', datos)
+        self.assertIn('timestamp', datos)
+        etag = primera['ETag']
+        self.assertEqual(etag, f'"{huella_archivo(self.ruta)}"')
+        self.assertEqual(self.client.get('/api/grafo/estadisticas/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Las búsquedas no cambian el ETag; sus contadores salen en grafo/monitoreo/
+        from platos import views
+        views._cache_busquedas_grafo.limpiar()
+        antes = self.client.get('/api/grafo/monitoreo/')
+        self.assertIn('no-store', antes['Cache-Control'])
+        self.client.post('/api/grafo/buscar/', {'ingredientes': ['maiz']}, content_type='application/json')
+        despues = self.client.get('/api/grafo/estadisticas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(despues.status_code, 304)
+        monitoreo = self.client.get('/api/grafo/monitoreo/')
+        self.assertNotIn('ETag', monitoreo)
+        self.assertEqual(monitoreo.json()['cache_busquedas']['fallos'],
+                         antes.json()['cache_busquedas']['fallos'] + 1)
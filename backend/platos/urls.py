@@ -11,7 +11,9 @@ from .views import (
     smartmeal_buscar_platos_por_ingredientes,
     smartmeal_health_check,
     grafo_buscar_recetas,
+    grafo_buscar_recetas_lote,
     grafo_estadisticas,
+    grafo_monitoreo,
     grafo_ingredientes_disponibles,
     grafo_recetas_disponibles,
     grafo_health_check
@@ -54,9 +56,15 @@ urlpatterns = [
     # Búsqueda principal de recetas por ingredientes
     path('grafo/buscar/', grafo_buscar_recetas, name='grafo-buscar'),
     
+    # Varias búsquedas en una sola petición
+    path('grafo/buscar-lote/', grafo_buscar_recetas_lote, name='grafo-buscar-lote'),
+    
     # Estadísticas del grafo
     path('grafo/estadisticas/', grafo_estadisticas, name='grafo-estadisticas'),
     
+    # Contadores en vivo de la caché de búsquedas
+    path('grafo/monitoreo/', grafo_monitoreo, name='grafo-monitoreo'),
+    
     # Obtener ingredientes disponibles
     path('grafo/ingredientes/', grafo_ingredientes_disponibles, name='grafo-ingredientes'),
     
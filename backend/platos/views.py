@@ -1,62 +1,126 @@
 from rest_framework import viewsets
 from .models import Plato, Ingrediente
 from .serializers import PlatoSerializer, IngredienteSerializer
-from platos.algoritmos.listaDoblementeEnlazada import ListaDoblementeEnlazada
+from .ranking import ranking_platos, consultar_ranking_sql, consultar_ranking_sql_desde
+from .paginacion import PaginacionCursorOpcional, PaginacionCursorRanking
+from .catalogo import catalogo_platos
+from .grafo import grafo_platos_bd
 from platos.algoritmos.arbolDecisionSmartMeal import arbol_smart_meal
+from platos.algoritmos.cacheLRU import CacheLRUVersionada
 from platos.algoritmos.grafoBusquedaReceta import build_graph_desde_db
+from platos.algoritmos.grafoCompacto import GrafoCompacto
+from platos.algoritmos.indiceIngredientes import IndiceInvertidoPlatos, ingredientes_en_orden
+from platos.algoritmos.instantaneaGrafo import (
+    abrir_instantanea, cargar_instantanea, guardar_instantanea, InstantaneaInvalida,
+)
+from platos.algoritmos.registro import obtener_logger, medir, tiempos
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
 
-import os
 import json
+import os
+import threading
+import uuid
+from collections import Counter
 
-# Variable global para cachear el grafo (evita reconstruirlo cada vez)
+logger = obtener_logger('vistas')
+
+# Variable global para cachear el grafo (evita reconstruirlo cada vez):
+# tupla (versión del catálogo, versión del grafo, grafo, fecha de modificación
+# del catálogo), reemplazada de una sola vez
 _grafo_cache = None
-_timestamp_cache = None
+# Solo un hilo reconstruye el grafo a la vez (ver obtener_grafo)
+_lock_grafo = threading.Lock()
+
+# Resultados de grafo/buscar/ por (despensa normalizada, umbral, recorte),
+# válidos mientras no cambie la versión del grafo
+_cache_busquedas_grafo = CacheLRUVersionada(
+    max_entradas=getattr(settings, 'SMARTMEAL_GRAFO_CACHE_ENTRADAS', 256),
+    max_bytes=getattr(settings, 'SMARTMEAL_GRAFO_CACHE_BYTES', 32 * 1024 * 1024),
+)
+
+# Respuestas de menu-arbol/buscar-platos/ ya serializadas, por términos
+# normalizados (sin orden, con repetidos); válidas mientras no cambie la versión
+# del catálogo. Cada plato se guarda partido donde va 'ingredientes_coincidentes'
+_cache_busquedas_platos = CacheLRUVersionada(
+    max_entradas=getattr(settings, 'SMARTMEAL_BUSQUEDA_CACHE_ENTRADAS', 128),
+    max_bytes=getattr(settings, 'SMARTMEAL_BUSQUEDA_CACHE_BYTES', 8 * 1024 * 1024),
+)
+# Dentro de un string JSON las comillas van escapadas: esto solo aparece como llave
+_HUECO_COINCIDENTES = b'"ingredientes_coincidentes":null'
+
+# Distingue las versiones que solo valen dentro de este proceso ('bd-...',
+# 'catalogo-...') de las de otros workers en ETags y cachés compartidas
+_ID_PROCESO = uuid.uuid4().hex[:12]
+
+# Índice invertido de platos por ingrediente (se reconstruye si cambia el catálogo)
+_indice_platos_cache = None
+_version_indice_platos_cache = None
 
 class PlatoViewSet(viewsets.ModelViewSet):
     queryset = Plato.objects.all()
     serializer_class = PlatoSerializer
+    pagination_class = PaginacionCursorOpcional
     
 class IngredientesViewSet(viewsets.ModelViewSet):
     queryset = Ingrediente.objects.all()
     serializer_class = IngredienteSerializer
+    pagination_class = PaginacionCursorOpcional
 
 @api_view(['GET'])
 def platos_ordenados_view(request):
-    lista = ListaDoblementeEnlazada()
-    platos = Plato.objects.prefetch_related('ingredientes').all()
-    for plato in platos:
-        ingredientes_seleccionados = [
-            ing for ing in plato.ingredientes.all() if ing.seleccionado
-        ]
-        if ingredientes_seleccionados:  # Solo platos con ingredientes seleccionados
-            puntuacion_total = round(
-                                    sum(ing.puntuacion for ing in ingredientes_seleccionados) / len(ingredientes_seleccionados), 2
-                                )
-            plato_dict = {
-                "id": plato.id,
-                "nombre": plato.nombre,
-                "descripcion": plato.descripcion,
-                "imagen": plato.imagen,
-                "precio": plato.precio,
-                "ingredientes": [
-                    {"nombre": ing.nombre, "icono": ing.icono, "puntuacion": ing.puntuacion}
-                    for ing in ingredientes_seleccionados
-                ],
-                "puntuacion_total": puntuacion_total
-            }
-            lista.insertar_ordenado(plato_dict, puntuacion_total)
-    lista.recorrerAdelante()
-    # Recorrer la lista y devolver como JSON
-    platos_ordenados = []
-    actual = lista.cabeza
-    while actual:
-        platos_ordenados.append(actual.plato)
-        actual = actual.siguiente
+    """
+    Platos ordenados por la puntuación promedio de sus ingredientes seleccionados.
+
+    Parámetros opcionales (query string):
+        modo: "memoria" (por defecto) o "sql"
+        limit, offset: Página a retornar en modo "sql"
+        page_size, cursor: Paginación por cursor (en ambos modos). La respuesta
+            pasa a ser {"next": url, "previous": url, "results": [...]}.
+
+    En modo "memoria" el ranking vive en el proceso y se actualiza con señales
+    al editar ingredientes o platos (ver platos/ranking.py y platos/signals.py).
+    En modo "sql" la puntuación, el orden y la paginación se resuelven en la base
+    de datos y solo se materializa la página pedida.
+    """
+    modo = request.query_params.get('modo', 'memoria')
+    paginador = PaginacionCursorRanking()
+    if modo in ('memoria', 'sql') and paginador.solicitada(request):
+        obtener_pagina = ranking_platos.platos_desde if modo == 'memoria' else consultar_ranking_sql_desde
+        return paginador.paginar(request, obtener_pagina)
+
+    if modo == 'memoria':
+        platos_ordenados = ranking_platos.platos_ordenados()
+    elif modo == 'sql':
+        try:
+            offset = int(request.query_params.get('offset', 0))
+            limite = request.query_params.get('limit')
+            limite = int(limite) if limite is not None else None
+        except ValueError:
+            return Response(
+                {'error': 'limit y offset deben ser números enteros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if offset < 0 or (limite is not None and limite < 0):
+            return Response(
+                {'error': 'limit y offset no pueden ser negativos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        platos_ordenados = consultar_ranking_sql(offset=offset, limite=limite)
+    else:
+        return Response(
+            {'error': f'Modo "{modo}" no válido. Use "memoria" o "sql"'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     return Response(platos_ordenados)
 
 
@@ -237,6 +301,38 @@ def smartmeal_estructura_completa(request):
         )
 
 
+def serializar_json(datos):
+    """Serializa a JSON (bytes UTF-8) igual que el renderizador JSON de DRF."""
+    return json.dumps(datos, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def obtener_indice_platos():
+    """
+    Obtiene el índice invertido de platos cacheado o lo construye si no existe.
+    El caché se invalida cuando cambia la versión del catálogo.
+    """
+    return obtener_indice_platos_versionado()[1]
+
+
+def obtener_indice_platos_versionado():
+    """Como obtener_indice_platos(), junto con la versión del catálogo con la que se construyó."""
+    global _indice_platos_cache, _version_indice_platos_cache
+    
+    instantanea = catalogo_platos.instantanea()
+    
+    if _indice_platos_cache is not None and _version_indice_platos_cache == instantanea.version:
+        return instantanea.version, _indice_platos_cache
+    
+    logger.info("Construyendo índice de platos (catálogo versión %d)...", instantanea.version)
+    with medir('smartmeal.indice'):
+        indice = IndiceInvertidoPlatos(instantanea.platos)
+    
+    _indice_platos_cache = indice
+    _version_indice_platos_cache = instantanea.version
+    
+    return instantanea.version, indice
+
+
 @api_view(['POST'])
 def smartmeal_buscar_platos_por_ingredientes(request):
     """
@@ -252,9 +348,6 @@ def smartmeal_buscar_platos_por_ingredientes(request):
         - Lista de platos que contienen esos ingredientes
         - Platos ordenados por cantidad de coincidencias
     """
-    import json
-    import os
-    
     try:
         ingredientes_buscados = request.data.get('ingredientes', [])
         
@@ -264,12 +357,8 @@ def smartmeal_buscar_platos_por_ingredientes(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Cargar la base de datos de platos desde el archivo JSON
-        json_path = os.path.join(os.path.dirname(__file__), '..', 'platos_database.json')
-        
         try:
-            with open(json_path, 'r', encoding='utf-8') as file:
-                platos_db = json.load(file)
+            version, indice = obtener_indice_platos_versionado()
         except FileNotFoundError:
             return Response(
                 {'error': 'Base de datos de platos no encontrada'}, 
@@ -281,68 +370,49 @@ def smartmeal_buscar_platos_por_ingredientes(request):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        # Buscar platos que contengan los ingredientes especificados
-        platos_coincidentes = []
-        
-        for plato in platos_db:
-            if not plato.get('disponible', True):
-                continue  # Saltar platos no disponibles
-                
-            ingredientes_plato = [ing.lower() for ing in plato.get('ingredientes', [])]
-            
-            # Contar coincidencias (búsqueda parcial y flexible)
-            coincidencias = 0
-            ingredientes_encontrados = []
-            
-            for ing_buscado in ingredientes_buscados:
-                ing_buscado_lower = ing_buscado.lower().strip()
-                for ing_plato in ingredientes_plato:
-                    # Búsqueda flexible: coincidencia parcial en ambas direcciones
-                    if (ing_buscado_lower in ing_plato or 
-                        ing_plato in ing_buscado_lower or
-                        any(palabra in ing_plato for palabra in ing_buscado_lower.split()) or
-                        any(palabra in ing_buscado_lower for palabra in ing_plato.split())):
-                        coincidencias += 1
-                        ingredientes_encontrados.append(ing_plato)
-                        break
-            
-            if coincidencias > 0:
-                # Calcular score de relevancia
-                score_relevancia = (coincidencias / len(ingredientes_buscados)) * plato.get('puntuacion', 4.0)
-                
-                plato_resultado = {
-                    "id": plato["id"],
-                    "nombre": plato["nombre"],
-                    "descripcion": plato["descripcion"],
-                    "categoria": plato.get("categoria", ""),
-                    "tipo": plato.get("tipo", ""),
-                    "imagen": plato.get("imagen", ""),
-                    "precio": plato.get("precio", 0),
-                    "puntuacion": plato.get("puntuacion", 4.0),
-                    "tiempo_preparacion": plato.get("tiempo_preparacion", ""),
-                    "calorias": plato.get("calorias", 0),
-                    "ingredientes_coincidentes": ingredientes_encontrados,
-                    "total_coincidencias": coincidencias,
-                    "score_relevancia": round(score_relevancia, 2),
-                    "ingredientes_completos": plato.get("ingredientes", []),
-                    "porcentaje_coincidencia": round((coincidencias / len(ingredientes_buscados)) * 100, 2)
-                }
-                platos_coincidentes.append(plato_resultado)
-        
-        # Ordenar por score de relevancia (mayor a menor), luego por coincidencias
-        platos_coincidentes.sort(key=lambda x: (x['score_relevancia'], x['total_coincidencias']), reverse=True)
-        
-        # Limitar resultados a los más relevantes (máximo 10)
-        platos_coincidentes = platos_coincidentes[:10]
+        # El árbol repite pocas listas de ingredientes: los platos y sus puntajes
+        # dependen solo de los términos normalizados y cuántas veces se piden (no
+        # del orden), y se guardan ya serializados para la versión del catálogo
+        # del índice. Lo único que depende del orden, 'ingredientes_coincidentes',
+        # se rehace para cada petición
+        terminos = [ingrediente.lower().strip() for ingrediente in ingredientes_buscados]
+        clave = tuple(sorted(terminos))
+        guardado = _cache_busquedas_platos.obtener(version, clave)
+        if guardado is None:
+            # Buscar platos que contengan los ingredientes especificados, puntuando
+            # solo los candidatos del índice invertido (máximo 10, los más relevantes)
+            with medir('smartmeal.busqueda'):
+                encontrados = indice.buscar_con_terminos(clave)
+            cabecera = serializar_json({
+                'message': f'Se encontraron {len(encontrados)} platos que coinciden con los ingredientes',
+                'total_platos_encontrados': len(encontrados),
+            })[1:-1]
+            platos_serializados = []
+            for resultado, ingrediente_por_termino in encontrados:
+                antes, _, despues = serializar_json(
+                    dict(resultado, ingredientes_coincidentes=None)
+                ).partition(_HUECO_COINCIDENTES)
+                platos_serializados.append((antes, ingrediente_por_termino, despues))
+            guardado = (cabecera, platos_serializados)
+            _cache_busquedas_platos.guardar(
+                version, clave, guardado,
+                len(cabecera) + sum(len(antes) + len(despues) for antes, _, despues in platos_serializados),
+            )
         
-        return Response({
-            'success': True,
-            'message': f'Se encontraron {len(platos_coincidentes)} platos que coinciden con los ingredientes',
-            'ingredientes_buscados': ingredientes_buscados,
-            'total_platos_encontrados': len(platos_coincidentes),
-            'platos': platos_coincidentes,
-            'timestamp': timezone.now().isoformat()
-        })
+        # Solo las partes propias de la petición se serializan cada vez
+        cabecera, platos_serializados = guardado
+        partes = [
+            b'{"success":true,"ingredientes_buscados":', serializar_json(ingredientes_buscados),
+            b',', cabecera, b',"platos":[',
+        ]
+        for posicion, (antes, ingrediente_por_termino, despues) in enumerate(platos_serializados):
+            if posicion:
+                partes.append(b',')
+            partes += (antes, b'"ingredientes_coincidentes":',
+                       serializar_json(ingredientes_en_orden(terminos, ingrediente_por_termino)), despues)
+        partes += (b'],"timestamp":', serializar_json(timezone.now().isoformat()), b'}')
+        cuerpo = b''.join(partes)
+        return HttpResponse(cuerpo, content_type='application/json')
         
     except Exception as e:
         return Response(
@@ -421,40 +491,276 @@ def smartmeal_health_check(request):
 Vistas para búsqueda de recetas usando Grafo Bipartito Dirigido.
 """
 
+def cargar_instantanea_grafo(huella):
+    """
+    Carga el grafo desde la instantánea en disco si corresponde al catálogo actual.
+
+    Con SMARTMEAL_GRAFO_MAPEADO la instantánea se mapea en memoria en lugar de
+    copiarse, así todos los workers comparten sus páginas (aristas, nombres y
+    forma compilada; ver instantaneaGrafo.py).
+
+    Returns:
+        GrafoCompacto o None si no hay instantánea configurada o no es válida
+    """
+    ruta = getattr(settings, 'SMARTMEAL_GRAFO_INSTANTANEA_RUTA', None)
+    if not ruta or not huella or not os.path.exists(ruta):
+        return None
+    abrir = abrir_instantanea if getattr(settings, 'SMARTMEAL_GRAFO_MAPEADO', True) else cargar_instantanea
+    try:
+        grafo = abrir(ruta, huella)
+    except InstantaneaInvalida as error:
+        logger.warning("Instantánea del grafo ignorada (%s); se construye desde el catálogo", error)
+        return None
+    logger.info("Grafo cargado desde la instantánea %s", ruta)
+    return grafo
+
+
+def publicar_instantanea_grafo(grafo, huella):
+    """
+    Guarda el grafo recién construido como instantánea y lo reabre mapeado.
+
+    Así el primer worker que construye el grafo de un catálogo nuevo lo deja
+    en disco y los demás (y él mismo) lo cargan del archivo compartido en
+    lugar de construirlo cada uno. Si no se puede, se usa el grafo construido.
+    """
+    ruta = getattr(settings, 'SMARTMEAL_GRAFO_INSTANTANEA_RUTA', None)
+    if not ruta or not huella or not getattr(settings, 'SMARTMEAL_GRAFO_MAPEADO', True):
+        return grafo
+    try:
+        guardar_instantanea(grafo, ruta, huella)
+        return abrir_instantanea(ruta, huella)
+    except (OSError, InstantaneaInvalida) as error:
+        logger.warning("No se pudo publicar la instantánea del grafo en %s: %s", ruta, error)
+        return grafo
+
+
+def construir_grafo(instantanea):
+    """Carga (instantánea en disco) o construye el grafo de una versión del catálogo."""
+    compacto = getattr(settings, 'SMARTMEAL_GRAFO_COMPACTO', True)
+    grafo = cargar_instantanea_grafo(instantanea.huella) if compacto else None
+    if grafo is None:
+        # Construir el grafo desde los platos del catálogo (ya leídos y validados)
+        logger.info("Construyendo nuevo grafo (catálogo versión %d)...", instantanea.version)
+        with medir('grafo.construccion'):
+            if compacto:
+                grafo = GrafoCompacto.desde_db(instantanea.platos)
+            else:
+                grafo = build_graph_desde_db(instantanea.platos)
+        if compacto:
+            grafo = publicar_instantanea_grafo(grafo, instantanea.huella)
+    return grafo
+
+
 def obtener_grafo():
     """
     Obtiene el grafo cacheado o lo construye si no existe.
-    El caché se invalida si el archivo JSON es más reciente.
-    """
-    global _grafo_cache, _timestamp_cache
+    El caché se invalida cuando cambia la versión del catálogo de platos.
+
+    Con SMARTMEAL_GRAFO_FUENTE = 'bd' el grafo sale de la base de datos (ver
+    platos/grafo.py) y no depende del catálogo.
     
-    json_path = os.path.join(os.path.dirname(__file__), '..', 'platos_database.json')
+    La reconstrucción es de un solo vuelo: un solo hilo construye el grafo.
+    Con SMARTMEAL_GRAFO_RECONSTRUCCION = 'anterior' los demás hilos siguen
+    usando el grafo anterior hasta el cambio; con 'esperar' (o si todavía no
+    hay grafo) esperan a que termine y usan el nuevo.
+    """
+    return obtener_grafo_versionado()[1]
+
+
+def obtener_grafo_versionado():
+    """
+    Como obtener_grafo, junto con la versión del grafo.
+
+    Returns:
+        Tuple: (versión, grafo). La versión es un texto que cambia cuando
+        cambian los datos del grafo: la huella del JSON del catálogo, o la
+        versión del grafo de la base de datos ('bd-<proceso>-N')
+    """
+    return obtener_grafo_ordenado()[1:]
+
+
+def obtener_grafo_ordenado():
+    """
+    Como obtener_grafo_versionado, junto con el número de versión del grafo en
+    este proceso (la versión del catálogo o la del grafo de la base de datos),
+    que crece con cada cambio: sirve para saber cuál de dos versiones es la más
+    nueva (ver CacheLRUVersionada), cosa que la huella no permite.
+
+    Returns:
+        Tuple: (número de versión, versión, grafo)
+    """
+    return obtener_grafo_fechado()[:3]
+
+
+def obtener_grafo_fechado():
+    """
+    Como obtener_grafo_ordenado, junto con la fecha de modificación (segundos
+    desde la época) del archivo del catálogo del que salió el grafo.
+
+    Con SMARTMEAL_GRAFO_FUENTE = 'bd' la fecha es None: el grafo cambia con
+    las señales de los modelos y no hay una fecha que lo represente.
+
+    Returns:
+        Tuple: (número de versión, versión, grafo, fecha de modificación o None)
+    """
+    global _grafo_cache
     
-    # Verificar si el archivo existe
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"Base de datos de platos no encontrada en {json_path}")
+    if getattr(settings, 'SMARTMEAL_GRAFO_FUENTE', 'catalogo') == 'bd':
+        # Grafo de los modelos Plato/Ingrediente, actualizado por señales
+        version, grafo = grafo_platos_bd.obtener_versionado()
+        return version, f'bd-{_ID_PROCESO}-{version}', grafo, None
     
-    # Obtener timestamp del archivo
-    file_timestamp = os.path.getmtime(json_path)
+    instantanea = catalogo_platos.instantanea()
     
-    # Si el caché existe y el archivo no ha cambiado, usar el caché
-    if _grafo_cache is not None and _timestamp_cache == file_timestamp:
-        print("[INFO] Usando grafo cacheado")
-        return _grafo_cache
+    # Si el caché existe y el catálogo no ha cambiado, usar el caché
+    cache = _grafo_cache
+    if cache is not None and cache[0] == instantanea.version:
+        logger.debug("Usando grafo cacheado")
+        return cache
     
-    # Cargar el archivo JSON
-    print("[INFO] Construyendo nuevo grafo desde JSON...")
-    with open(json_path, 'r', encoding='utf-8') as f:
-        platos_db = json.load(f)
+    servir_anterior = getattr(settings, 'SMARTMEAL_GRAFO_RECONSTRUCCION', 'esperar') == 'anterior'
+    if cache is not None and servir_anterior:
+        if not _lock_grafo.acquire(blocking=False):
+            logger.debug("Grafo en reconstrucción; se usa la versión anterior")
+            return cache
+    else:
+        _lock_grafo.acquire()
     
-    # Construir el grafo
-    grafo = build_graph_desde_db(platos_db)
+    try:
+        # Otro hilo pudo haberlo construido mientras se esperaba el lock
+        cache = _grafo_cache
+        if cache is not None and cache[0] >= instantanea.version:
+            return cache
+        grafo = construir_grafo(instantanea)
+        # Sin huella (catálogo sin leer de archivo), la versión del catálogo
+        version = instantanea.huella or f'catalogo-{_ID_PROCESO}-{instantanea.version}'
+        _grafo_cache = (instantanea.version, version, grafo, instantanea.marca_tiempo or None)
+        return _grafo_cache
+    finally:
+        _lock_grafo.release()
+
+
+def respuesta_grafo_condicional(request, version, nombre, renderizar, completar=None, modificado=None):
+    """
+    GET condicional de una respuesta que depende de la versión del grafo.
+
+    Con If-None-Match vigente (o, sin él, con If-Modified-Since no anterior a
+    la fecha de modificación) se responde 304 sin renderizar nada. Si no, el
+    cuerpo se toma de la caché de Django (SMARTMEAL_GRAFO_CACHE_RESPUESTAS),
+    renderizándolo solo la primera vez para cada versión; lo que no depende
+    del grafo, como el "timestamp", lo agrega completar en cada respuesta.
+
+    Last-Modified solo se envía si hay fecha de modificación (el grafo del
+    catálogo, ver obtener_grafo_fechado); si no, se revalida solo por ETag.
+
+    Args:
+        version (str): Versión del grafo (ver obtener_grafo_versionado)
+        nombre (str): Nombre de la respuesta en la clave de la caché
+        renderizar: Función sin argumentos que retorna el diccionario de la respuesta
+        completar: Función opcional que recibe el cuerpo cacheado y retorna el
+            cuerpo final (para agregar datos que no dependen del grafo)
+        modificado (float): Fecha de modificación del grafo (segundos desde la época) o None
+    """
+    etag = quote_etag(version)
+    # HTTP tiene resolución de segundos; dos cambios del catálogo en el mismo
+    # segundo solo se distinguen por ETag
+    modificado = int(modificado) if modificado else None
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if no_modificado is not None:
+        respuesta = no_modificado
+    else:
+        cache = caches[getattr(settings, 'SMARTMEAL_GRAFO_CACHE_RESPUESTAS', 'default')]
+        clave = f'smartmeal:grafo:{version}:{nombre}'
+        cuerpo = cache.get(clave)
+        if cuerpo is None:
+            cuerpo = serializar_json(renderizar())
+            cache.set(clave, cuerpo, timeout=None)
+        if completar is not None:
+            cuerpo = completar(cuerpo)
+        respuesta = HttpResponse(cuerpo, content_type='application/json')
+    respuesta['ETag'] = etag
+    if modificado is not None:
+        respuesta['Last-Modified'] = http_date(modificado)
+    # Los clientes revalidan siempre: el grafo puede cambiar en cualquier momento
+    patch_cache_control(respuesta, no_cache=True)
+    return respuesta
+
+
+def agregar_timestamp(cuerpo):
+    """Agrega el "timestamp" actual a un cuerpo JSON cacheado (ver respuesta_grafo_condicional)."""
+    return b''.join((cuerpo[:-1], b',"timestamp":', serializar_json(timezone.now().isoformat()), b'}'))
+
+
+def contar_recetas_por_categoria(platos):
+    """
+    Recetas por categoría del catálogo, de mayor a menor. Como en el grafo, los
+    platos con el mismo nombre (sin distinguir mayúsculas) son una sola receta,
+    con la categoría del primero.
+    """
+    categorias = {}
+    for plato in platos:
+        nombre = plato.get('nombre', '').strip()
+        if nombre:
+            categorias.setdefault(nombre.lower(), plato.get('categoria') or 'sin categoría')
+    return dict(Counter(categorias.values()).most_common())
+
+
+def validar_busqueda_grafo(ingredientes, umbral, incluir_sin_coincidencias=True):
+    """Retorna el mensaje de error de una búsqueda en el grafo, o None si es válida."""
+    if not isinstance(ingredientes, list) or not ingredientes:
+        return 'Se requiere una lista no vacía de ingredientes.'
+    if not all(isinstance(ingrediente, str) for ingrediente in ingredientes):
+        return 'Los ingredientes deben ser textos.'
+    if isinstance(umbral, bool) or not isinstance(umbral, (int, float)) or not (0 <= umbral <= 1):
+        return 'El umbral debe estar entre 0 y 1.'
+    if not isinstance(incluir_sin_coincidencias, bool):
+        return 'incluir_sin_coincidencias debe ser true o false.'
+    return None
+
+
+def leer_recorte_busqueda(datos):
+    """
+    Lee limit, offset y top_k del body de una búsqueda en el grafo.
     
-    # Cachear el grafo
-    _grafo_cache = grafo
-    _timestamp_cache = file_timestamp
+    Returns:
+        Tuple: (limite, desplazamiento, top_k, error); limite y top_k son None
+        si no se enviaron, y error es None si los valores son válidos
+    """
+    valores = {}
+    for campo in ('limit', 'offset', 'top_k'):
+        valor = datos.get(campo)
+        if valor is None:
+            valores[campo] = None
+            continue
+        if isinstance(valor, bool) or not isinstance(valor, int) or valor < 0:
+            return None, 0, None, f'{campo} debe ser un entero no negativo.'
+        valores[campo] = valor
+    return valores['limit'], valores['offset'] or 0, valores['top_k'], None
+
+
+def tamanio_resultados_grafo(resultados):
+    """Bytes aproximados de los resultados de una búsqueda (para la caché de búsquedas)."""
+    # ~400 bytes por resultado (dict, lista y números) más una referencia por faltante
+    return sum(400 + 8 * len(resultado['ingredientes_faltantes'])
+               for lista in resultados.values() for resultado in lista)
+
+
+def estadisticas_busqueda_grafo(resultados, totales=None):
+    """
+    Totales por categoría de un resultado de búsqueda en el grafo.
     
-    return grafo
+    Args:
+        resultados (dict): Resultado de la búsqueda
+        totales (dict): Totales exactos por categoría si el resultado fue recortado
+    """
+    if totales is None:
+        totales = {categoria: len(lista) for categoria, lista in resultados.items()}
+    return {
+        'total_completas': totales['completas'],
+        'total_casi_completas': totales['casi_completas'],
+        'total_incompletas': totales['incompletas'],
+        'total_recetas': totales['completas'] + totales['casi_completas'] + totales['incompletas']
+    }
 
 
 @api_view(['POST'])
@@ -465,9 +771,18 @@ def grafo_buscar_recetas(request):
     Body esperado:
         {
             "ingredientes": ["pollo", "arroz", "ajo"],
-            "umbral_casi_completa": 0.75
+            "umbral_casi_completa": 0.75,
+            "incluir_sin_coincidencias": true,  (opcional; false omite las recetas
+                                                 sin ningún ingrediente disponible)
+            "limit": 20,                        (opcional, máximo por categoría)
+            "offset": 0,                        (opcional, a saltar en cada categoría)
+            "top_k": 30                         (opcional, máximo en total, llenando en
+                                                 orden completas, casi_completas, incompletas)
         }
     
+    Las estadísticas siempre cuentan todas las recetas de cada categoría,
+    aunque la respuesta venga recortada.
+    
     Retorna:
         {
             "success": True,
@@ -490,43 +805,51 @@ def grafo_buscar_recetas(request):
         # Validar entrada
         ingredientes_buscados = request.data.get('ingredientes', [])
         umbral = request.data.get('umbral_casi_completa', 0.75)
+        incluir_sin_coincidencias = request.data.get('incluir_sin_coincidencias', True)
         
-        if not isinstance(ingredientes_buscados, list) or not ingredientes_buscados:
+        error = validar_busqueda_grafo(ingredientes_buscados, umbral, incluir_sin_coincidencias)
+        limite, desplazamiento, top_k, error_recorte = leer_recorte_busqueda(request.data)
+        error = error or error_recorte
+        if error:
             return Response(
                 {
                     'success': False,
-                    'message': 'Se requiere una lista no vacía de ingredientes.'
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Validar umbral
-        if not (0 <= umbral <= 1):
-            return Response(
-                {
-                    'success': False,
-                    'message': 'El umbral debe estar entre 0 y 1.'
+                    'message': error
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Obtener el grafo
-        grafo = obtener_grafo()
+        numero, version, grafo = obtener_grafo_ordenado()
+        # Comparable y creciente (ver CacheLRUVersionada); con la etiqueta, por
+        # si cambia la fuente del grafo
+        version = (numero, version)
         
-        # Buscar recetas
-        print(f"[INFO] Buscando recetas con ingredientes: {ingredientes_buscados}")
-        resultados = grafo.buscar_recetas_por_ingredientes(
-            ingredientes_buscados,
-            umbral_casi_completa=umbral
-        )
-        
-        # Calcular estadísticas
-        estadisticas = {
-            'total_completas': len(resultados['completas']),
-            'total_casi_completas': len(resultados['casi_completas']),
-            'total_incompletas': len(resultados['incompletas']),
-            'total_recetas': len(resultados['completas']) + len(resultados['casi_completas']) + len(resultados['incompletas'])
-        }
+        # La misma despensa (en cualquier orden y forma de escribirla) con los
+        # mismos parámetros da el mismo resultado mientras el grafo no cambie
+        clave = (frozenset(ingrediente.strip().lower() for ingrediente in ingredientes_buscados),
+                 umbral, incluir_sin_coincidencias, limite, desplazamiento, top_k)
+        guardado = _cache_busquedas_grafo.obtener(version, clave)
+        if guardado is None:
+            # Buscar recetas
+            logger.debug("Buscando recetas con ingredientes: %s", ingredientes_buscados)
+            totales = {}
+            with medir('grafo.busqueda'):
+                resultados = grafo.compilar().buscar_recetas_por_ingredientes(
+                    ingredientes_buscados,
+                    umbral_casi_completa=umbral,
+                    incluir_sin_coincidencias=incluir_sin_coincidencias,
+                    limite=limite,
+                    desplazamiento=desplazamiento,
+                    top_k=top_k,
+                    totales=totales
+                )
+            
+            # Calcular estadísticas (exactas, aunque la respuesta esté recortada)
+            estadisticas = estadisticas_busqueda_grafo(resultados, totales)
+            guardado = (resultados, estadisticas)
+            _cache_busquedas_grafo.guardar(version, clave, guardado, tamanio_resultados_grafo(resultados))
+        resultados, estadisticas = guardado
         
         return Response({
             'success': True,
@@ -557,7 +880,7 @@ def grafo_buscar_recetas(request):
         )
     
     except Exception as e:
-        print(f"[ERROR] {str(e)}")
+        logger.exception("Error al buscar recetas en el grafo")
         return Response(
             {
                 'success': False,
@@ -567,41 +890,159 @@ def grafo_buscar_recetas(request):
         )
 
 
-@api_view(['GET'])
-def grafo_estadisticas(request):
+@api_view(['POST'])
+def grafo_buscar_recetas_lote(request):
     """
-    Retorna estadísticas del grafo (cantidad de ingredientes, recetas, aristas).
-    Útil para debugging y monitoreo.
+    Ejecuta varias búsquedas de recetas en una sola petición, sobre el mismo grafo.
+    
+    Body esperado:
+        {
+            "consultas": [
+                {"ingredientes": ["pollo", "arroz"], "umbral_casi_completa": 0.75},
+                {"ingredientes": ["huevo"]}
+            ],
+            "umbral_casi_completa": 0.75,          (opcional, por defecto para el lote)
+            "incluir_sin_coincidencias": true      (opcional, por defecto para el lote)
+        }
     
     Retorna:
         {
             "success": True,
-            "estadisticas": {
-                "total_ingredientes": 0,
-                "total_recetas": 0,
-                "total_aristas": 0
+            "total_consultas": 2,
+            "resultados": {
+                "0": {"success": True, "ingredientes_buscados": [...], "umbral_utilizado": 0.75,
+                      "resultados": {...}, "estadisticas": {...}},
+                "1": {"success": False, "message": "..."}
             },
             "timestamp": "..."
         }
+    
+    Cada posición se valida por separado: una consulta inválida no anula las demás.
     """
     try:
-        grafo = obtener_grafo()
+        consultas = request.data.get('consultas')
+        umbral_lote = request.data.get('umbral_casi_completa', 0.75)
+        incluir_lote = request.data.get('incluir_sin_coincidencias', True)
+        maximo = getattr(settings, 'SMARTMEAL_GRAFO_LOTE_MAXIMO', 500)
         
-        # Calcular total de aristas
-        total_aristas = sum(len(v) for v in grafo.adyacencia.values())
+        if not isinstance(consultas, list) or not consultas:
+            return Response(
+                {
+                    'success': False,
+                    'message': 'Se requiere una lista no vacía de consultas.'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(consultas) > maximo:
+            return Response(
+                {
+                    'success': False,
+                    'message': f'Se permiten como máximo {maximo} consultas por lote.'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        estadisticas = {
-            'total_ingredientes': len(grafo.ingredientes),
-            'total_recetas': len(grafo.recetas),
-            'total_aristas': total_aristas
-        }
+        # Validar cada consulta; las válidas se resuelven juntas
+        respuestas = {}
+        validas = []
+        for posicion, consulta in enumerate(consultas):
+            if not isinstance(consulta, dict):
+                respuestas[str(posicion)] = {'success': False, 'message': 'Cada consulta debe ser un objeto.'}
+                continue
+            ingredientes = consulta.get('ingredientes', [])
+            umbral = consulta.get('umbral_casi_completa', umbral_lote)
+            incluir = consulta.get('incluir_sin_coincidencias', incluir_lote)
+            error = validar_busqueda_grafo(ingredientes, umbral, incluir)
+            if error:
+                respuestas[str(posicion)] = {'success': False, 'message': error}
+                continue
+            validas.append((posicion, ingredientes, umbral, incluir))
+        
+        # Un solo grafo para todo el lote
+        grafo = obtener_grafo()
+        with medir('grafo.busqueda_lote'):
+            resultados = grafo.compilar().buscar_lote([consulta[1:] for consulta in validas])
+        
+        for (posicion, ingredientes, umbral, _), resultado in zip(validas, resultados):
+            respuestas[str(posicion)] = {
+                'success': True,
+                'ingredientes_buscados': ingredientes,
+                'umbral_utilizado': umbral,
+                'resultados': resultado,
+                'estadisticas': estadisticas_busqueda_grafo(resultado),
+            }
         
         return Response({
             'success': True,
-            'estadisticas': estadisticas,
+            'total_consultas': len(consultas),
+            'resultados': {str(posicion): respuestas[str(posicion)] for posicion in range(len(consultas))},
             'timestamp': timezone.now().isoformat()
         })
     
+    except FileNotFoundError as e:
+        return Response(
+            {
+                'success': False,
+                'message': f'Base de datos no encontrada: {str(e)}'
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    except Exception as e:
+        logger.exception("Error al buscar recetas en lote en el grafo")
+        return Response(
+            {
+                'success': False,
+                'message': f'Error interno: {str(e)}'
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def grafo_estadisticas(request):
+    """
+    Retorna estadísticas del grafo (cantidad de ingredientes, recetas, aristas,
+    distribución de grados, ...). Útil para debugging, monitoreo y
+    planificación de capacidad.
+    
+    Retorna:
+        {
+            "success": True,
+            "estadisticas": {
+                "total_ingredientes": 0,
+                "total_recetas": 0,
+                "total_aristas": 0,
+                "promedio_ingredientes_por_receta": 0.0,
+                "distribucion_grados": {"ingredientes": {"1": 0, ...}, "recetas": {...}},
+                "ingredientes_mas_usados": [{"nombre": "sal", "recetas": 0}, ...],
+                "recetas_por_categoria": {"Almuerzo": 0, ...}   (solo con la fuente 'catalogo')
+            },
+            "timestamp": "..."
+        }
+
+    Las estadísticas del grafo salen de sus contadores (ver
+    BipartiteDirectedGraph.estadisticas) y se renderizan una vez por versión.
+    Admite GET condicional por ETag y Last-Modified (ver
+    respuesta_grafo_condicional). Los contadores de la caché de búsquedas, que
+    cambian con cada búsqueda, están en grafo/monitoreo/.
+    """
+    try:
+        _, version, grafo, modificado = obtener_grafo_fechado()
+        
+        def renderizar():
+            estadisticas = dict(grafo.estadisticas())
+            if getattr(settings, 'SMARTMEAL_GRAFO_FUENTE', 'catalogo') != 'bd':
+                estadisticas['recetas_por_categoria'] = contar_recetas_por_categoria(
+                    catalogo_platos.instantanea().platos)
+            return {
+                'success': True,
+                'estadisticas': estadisticas,
+            }
+        
+        return respuesta_grafo_condicional(request, version, 'estadisticas', renderizar,
+                                           completar=agregar_timestamp, modificado=modificado)
+    
     except Exception as e:
         return Response(
             {
@@ -612,6 +1053,36 @@ def grafo_estadisticas(request):
         )
 
 
+@api_view(['GET'])
+def grafo_monitoreo(request):
+    """
+    Contadores en vivo de este proceso (caché de búsquedas y duración de las
+    fases), sin caché ni GET condicional.
+    
+    Retorna:
+        {
+            "success": True,
+            "cache_busquedas": {           (caché de grafo/buscar/)
+                "entradas": 0, "bytes": 0, "aciertos": 0, "fallos": 0,
+                "desalojos": 0, "invalidaciones": 0, "tasa_aciertos": null, ...
+            },
+            "tiempos": {                   (fases medidas, solo con SMARTMEAL_TIEMPOS=1)
+                "grafo.busqueda": {"cantidad": 0, "total_ms": 0.0,
+                                   "promedio_ms": 0.0, "maximo_ms": 0.0}, ...
+            },
+            "timestamp": "..."
+        }
+    """
+    respuesta = Response({
+        'success': True,
+        'cache_busquedas': _cache_busquedas_grafo.estadisticas(),
+        'tiempos': tiempos.resumen(),
+        'timestamp': timezone.now().isoformat()
+    })
+    patch_cache_control(respuesta, no_store=True)
+    return respuesta
+
+
 @api_view(['GET'])
 def grafo_ingredientes_disponibles(request):
     """
@@ -625,19 +1096,23 @@ def grafo_ingredientes_disponibles(request):
             "total": 0,
             "timestamp": "..."
         }
+
+    Admite GET condicional por ETag y Last-Modified (ver respuesta_grafo_condicional).
     """
     try:
-        grafo = obtener_grafo()
+        _, version, grafo, modificado = obtener_grafo_fechado()
         
-        # Extraer nombres de ingredientes
-        ingredientes = sorted([ing.get_name() for ing in grafo.ingredientes])
+        def renderizar():
+            # Extraer nombres de ingredientes
+            ingredientes = sorted([ing.get_name() for ing in grafo.ingredientes])
+            return {
+                'success': True,
+                'ingredientes': ingredientes,
+                'total': len(ingredientes),
+            }
         
-        return Response({
-            'success': True,
-            'ingredientes': ingredientes,
-            'total': len(ingredientes),
-            'timestamp': timezone.now().isoformat()
-        })
+        return respuesta_grafo_condicional(request, version, 'ingredientes', renderizar,
+                                           completar=agregar_timestamp, modificado=modificado)
     
     except Exception as e:
         return Response(
@@ -661,19 +1136,23 @@ def grafo_recetas_disponibles(request):
             "total": 0,
             "timestamp": "..."
         }
+
+    Admite GET condicional por ETag y Last-Modified (ver respuesta_grafo_condicional).
     """
     try:
-        grafo = obtener_grafo()
+        _, version, grafo, modificado = obtener_grafo_fechado()
         
-        # Extraer nombres de recetas
-        recetas = sorted([receta.get_name() for receta in grafo.recetas])
+        def renderizar():
+            # Extraer nombres de recetas
+            recetas = sorted([receta.get_name() for receta in grafo.recetas])
+            return {
+                'success': True,
+                'recetas': recetas,
+                'total': len(recetas),
+            }
         
-        return Response({
-            'success': True,
-            'recetas': recetas,
-            'total': len(recetas),
-            'timestamp': timezone.now().isoformat()
-        })
+        return respuesta_grafo_condicional(request, version, 'recetas', renderizar,
+                                           completar=agregar_timestamp, modificado=modificado)
     
     except Exception as e:
         return Response(